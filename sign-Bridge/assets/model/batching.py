@@ -0,0 +1,183 @@
+"""
+Micro-batching dinámico para inferencia - SignBridge
+Agrupa peticiones concurrentes en un solo llamado (N, 24, 126) al modelo
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class _PendingRequest:
+    """Secuencia en espera de ser incluida en un lote"""
+
+    __slots__ = ("sequence", "future", "enqueued_at")
+
+    def __init__(self, sequence):
+        self.sequence = sequence
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    Scheduler que junta secuencias concurrentes en un solo lote.
+
+    Un hilo dedicado despacha el lote cuando se alcanza `max_batch_size`
+    o cuando la petición más antigua lleva `max_delay_ms` esperando.
+    Cada llamador recibe solo su fila de probabilidades.
+
+    predict_fn: función (N, 24, 126) → (N, num_classes)
+    on_batch: callback opcional (batch_size, inference_ms) tras cada lote
+    dtype: tipo de las secuencias encoladas (float16 para el motor bf16)
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, max_delay_ms=3.0, name="micro-batcher",
+                 on_batch=None, dtype=np.float32):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size debe ser >= 1")
+        self.predict_fn = predict_fn
+        self.max_batch_size = int(max_batch_size)
+        self.max_delay_ms = float(max_delay_ms)
+        self.on_batch = on_batch
+        self.dtype = dtype
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Estadísticas para ajustar latencia vs throughput
+        self._requests = 0
+        self._batches = 0
+        self._errors = 0
+        self._last_batch_size = 0
+        self._max_queue_depth = 0
+        self._batch_size_counts = {}
+        self._total_queue_wait_ms = 0.0
+        self._total_inference_ms = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def submit(self, sequence):
+        """Encola una secuencia (24, 126) y devuelve un Future con (probs, info)"""
+        pending = _PendingRequest(np.asarray(sequence, dtype=self.dtype))
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("El batcher está cerrado")
+            self._queue.append(pending)
+            depth = len(self._queue)
+            if depth > self._max_queue_depth:
+                self._max_queue_depth = depth
+            self._cond.notify()
+        return pending.future
+
+    def predict(self, sequence, timeout=None):
+        """Versión bloqueante de submit()"""
+        return self.submit(sequence).result(timeout=timeout)
+
+    @property
+    def queue_depth(self):
+        with self._cond:
+            return len(self._queue)
+
+    def stats(self):
+        """Profundidad de cola y tamaño de lote logrado"""
+        with self._cond:
+            batches = self._batches
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_delay_ms": self.max_delay_ms,
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self._max_queue_depth,
+                "requests": self._requests,
+                "batches": batches,
+                "errors": self._errors,
+                "last_batch_size": self._last_batch_size,
+                "avg_batch_size": (self._requests / batches) if batches else 0.0,
+                "avg_queue_wait_ms": (self._total_queue_wait_ms / self._requests) if self._requests else 0.0,
+                "avg_inference_ms": (self._total_inference_ms / batches) if batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._batch_size_counts.items())),
+            }
+
+    def close(self, timeout=1.0):
+        """Detiene el hilo despachador después de vaciar la cola"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=timeout)
+
+    # ------------------------------------------------------------------
+    # Hilo despachador
+    # ------------------------------------------------------------------
+
+    def _next_batch(self):
+        """Espera hasta completar un lote o vencer el plazo del más antiguo"""
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return None
+
+            deadline = self._queue[0].enqueued_at + self.max_delay_ms / 1000.0
+            while len(self._queue) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            size = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(size)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._execute(batch)
+
+    def _execute(self, batch):
+        dispatched_at = time.perf_counter()
+        try:
+            inputs = np.stack([item.sequence for item in batch])
+            probs = np.asarray(self.predict_fn(inputs))
+            if len(probs) != len(batch):
+                raise ValueError(f"predict_fn devolvió {len(probs)} filas para un lote de {len(batch)}")
+        except Exception as e:
+            with self._cond:
+                self._errors += len(batch)
+            for item in batch:
+                item.future.set_exception(e)
+            return
+        inference_ms = (time.perf_counter() - dispatched_at) * 1000
+
+        size = len(batch)
+        waits_ms = [(dispatched_at - item.enqueued_at) * 1000 for item in batch]
+        with self._cond:
+            self._requests += size
+            self._batches += 1
+            self._last_batch_size = size
+            self._batch_size_counts[size] = self._batch_size_counts.get(size, 0) + 1
+            self._total_inference_ms += inference_ms
+            self._total_queue_wait_ms += sum(waits_ms)
+
+        for i, (item, queue_wait_ms) in enumerate(zip(batch, waits_ms)):
+            item.future.set_result((probs[i], {
+                "batch_size": size,
+                "queue_wait_ms": queue_wait_ms,
+                "inference_time_ms": inference_ms,
+            }))
+
+        # El callback de métricas va después: si falla, los futures ya tienen resultado
+        if self.on_batch is not None:
+            try:
+                self.on_batch(size, inference_ms)
+            except Exception as e:
+                print(f"⚠️  on_batch falló: {e}")
@@ -0,0 +1,107 @@
+"""
+Executor de inferencia acotado - SignBridge
+Pool de hilos con límite explícito de cola: cuando está lleno se rechaza
+la petición (QueueFullError) en vez de dejar crecer la latencia sin límite.
+"""
+
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFullError(RuntimeError):
+    """La cola de inferencia está llena; retry_after_s sugiere cuándo reintentar"""
+
+    def __init__(self, retry_after_s):
+        super().__init__(f'Cola de inferencia llena, reintentar en {retry_after_s}s')
+        self.retry_after_s = retry_after_s
+
+
+class BoundedInferenceExecutor:
+    """
+    Ejecuta fn(*args) en `max_workers` hilos con a lo sumo `max_queue` tareas esperando.
+
+    El Future devuelto entrega (valor, timing) con la espera en cola y el
+    tiempo de cómputo medidos por separado.
+    """
+
+    def __init__(self, fn, max_workers=4, max_queue=64, name='inference'):
+        self.fn = fn
+        self.max_workers = int(max_workers)
+        self.max_queue = int(max_queue)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0  # En cola + ejecutándose
+
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.errors = 0
+        self._total_wait_ms = 0.0
+        self._total_compute_ms = 0.0
+        self._max_wait_ms = 0.0
+
+    def submit(self, *args):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise QueueFullError(self._retry_after_locked())
+            self._pending += 1
+            self.submitted += 1
+
+        enqueued_at = time.perf_counter()
+
+        def task():
+            started_at = time.perf_counter()
+            ok = False
+            try:
+                value = self.fn(*args)
+                ok = True
+            finally:
+                finished_at = time.perf_counter()
+                wait_ms = (started_at - enqueued_at) * 1000
+                compute_ms = (finished_at - started_at) * 1000
+                with self._lock:
+                    self._pending -= 1
+                    if ok:
+                        self.completed += 1
+                        self._total_wait_ms += wait_ms
+                        self._total_compute_ms += compute_ms
+                        self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+                    else:
+                        self.errors += 1
+            return value, {'executor_wait_ms': wait_ms, 'compute_ms': compute_ms}
+
+        return self._pool.submit(task)
+
+    def _retry_after_locked(self):
+        """Segundos estimados para vaciar la cola actual (mínimo 1, entero para Retry-After)"""
+        avg_compute_s = (self._total_compute_ms / self.completed / 1000) if self.completed else 0.05
+        drain_s = avg_compute_s * self._pending / max(1, self.max_workers)
+        return max(1, math.ceil(drain_s))
+
+    @property
+    def queue_depth(self):
+        with self._lock:
+            return max(0, self._pending - self.max_workers)
+
+    def stats(self):
+        with self._lock:
+            done = self.completed
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'in_flight': self._pending,
+                'queue_depth': max(0, self._pending - self.max_workers),
+                'submitted': self.submitted,
+                'completed': done,
+                'rejected': self.rejected,
+                'errors': self.errors,
+                'avg_queue_wait_ms': (self._total_wait_ms / done) if done else 0.0,
+                'max_queue_wait_ms': self._max_wait_ms,
+                'avg_compute_ms': (self._total_compute_ms / done) if done else 0.0,
+            }
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
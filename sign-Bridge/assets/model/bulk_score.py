@@ -0,0 +1,307 @@
+"""
+Scoring Masivo Offline - SignBridge
+Pasa un corpus de secuencias (24, 126) por el modelo en lotes grandes y
+escribe el top-k de cada una en CSV o JSONL.
+
+- Entradas: archivos .npy (abiertos con mmap, sin cargarlos enteros), .npz o
+  directorios con ellos. Cada array es (N, 24, 126) o una sola (24, 126).
+- Un hilo lee y copia el lote siguiente desde disco mientras el modelo
+  procesa el actual.
+- La salida se escribe por lotes y un checkpoint registra hasta dónde llegó:
+  si la corrida se interrumpe, volver a ejecutar el mismo comando continúa
+  desde el último lote escrito.
+
+Uso:
+    python bulk_score.py corpus/ --output scores.csv
+    python bulk_score.py shard_*.npy --output scores.jsonl --batch-size 2048 --top-k 3
+    python bulk_score.py corpus/ --output scores.csv --model shared_model.tflite --restart
+"""
+
+import argparse
+import csv
+import glob
+import io
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from postprocessing import top_k_batch
+
+_DONE = object()
+
+
+# ============================================================================
+# SHARDS DE ENTRADA
+# ============================================================================
+
+def expand_inputs(patterns):
+    """Rutas de .npy/.npz a partir de archivos, globs o directorios (orden estable)"""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            matches = glob.glob(pattern) or [pattern]
+        paths.extend(sorted(p for p in matches if p.endswith(('.npy', '.npz'))))
+    if not paths:
+        raise SystemExit(f"❌ No se encontraron archivos .npy/.npz en: {' '.join(patterns)}")
+    return paths
+
+
+def open_shards(paths):
+    """[(nombre, array)] con los .npy mapeados en memoria; valida el shape"""
+    shards = []
+    for path in paths:
+        if path.endswith('.npy'):
+            arrays = [(path, np.load(path, mmap_mode='r'))]
+        else:
+            archive = np.load(path)
+            arrays = [(f"{path}:{key}", archive[key]) for key in archive.files]
+        for name, array in arrays:
+            if array.shape == (24, 126):
+                array = array[np.newaxis]
+            if array.ndim != 3 or array.shape[1:] != (24, 126):
+                raise SystemExit(f"❌ {name}: se esperaba (N, 24, 126), recibido {array.shape}")
+            shards.append((name, array))
+    return shards
+
+
+def corpus_signature(paths, args):
+    """Identifica la corrida: si cambian entradas, modelo o formato no se reanuda"""
+    return {
+        'inputs': [[os.path.abspath(p), os.path.getsize(p), int(os.path.getmtime(p))] for p in paths],
+        'model': os.path.abspath(args.model),
+        'top_k': args.top_k,
+        'format': args.format,
+    }
+
+
+def iter_batches(shards, batch_size, start_shard=0, start_offset=0, prefetch=2):
+    """
+    Entrega (shard, offset, lote float32 contiguo) en orden, sin cruzar shards.
+    Un hilo lee del mmap (E/S de disco) mientras el modelo procesa el lote anterior.
+    """
+    batches = queue.Queue(maxsize=max(1, int(prefetch)))
+    stop = threading.Event()
+
+    def producer():
+        try:
+            for shard_index in range(start_shard, len(shards)):
+                _, array = shards[shard_index]
+                first = start_offset if shard_index == start_shard else 0
+                for offset in range(first, len(array), batch_size):
+                    if stop.is_set():
+                        return
+                    batch = np.ascontiguousarray(array[offset:offset + batch_size], dtype=np.float32)
+                    batches.put((shard_index, offset, batch))
+        except Exception as e:
+            batches.put(e)
+        finally:
+            batches.put(_DONE)
+
+    worker = threading.Thread(target=producer, name='bulk-prefetch', daemon=True)
+    worker.start()
+
+    try:
+        while True:
+            item = batches.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        while worker.is_alive():
+            try:
+                batches.get_nowait()
+            except queue.Empty:
+                worker.join(timeout=0.05)
+
+
+# ============================================================================
+# SALIDA Y CHECKPOINT
+# ============================================================================
+
+def format_rows(source, offset, indices, probs, labels, output_format):
+    """Texto de un lote completo (se escribe con una sola llamada)"""
+    buffer = io.StringIO()
+    if output_format == 'csv':
+        writer = csv.writer(buffer, lineterminator='\n')
+        for i in range(len(indices)):
+            row = [source, offset + i]
+            for idx, prob in zip(indices[i].tolist(), probs[i].tolist()):
+                row.extend((labels[idx], f"{prob:.6f}"))
+            writer.writerow(row)
+    else:
+        for i in range(len(indices)):
+            buffer.write(json.dumps({
+                'source': source,
+                'index': offset + i,
+                'predicted_class': labels[indices[i, 0]],
+                'confidence': round(float(probs[i, 0]), 6),
+                'top_k': [
+                    {'label': labels[idx], 'probability': round(prob, 6)}
+                    for idx, prob in zip(indices[i].tolist(), probs[i].tolist())
+                ],
+            }, ensure_ascii=False))
+            buffer.write('\n')
+    return buffer.getvalue()
+
+
+def csv_header(top_k):
+    columns = ['source', 'index']
+    for rank in range(1, top_k + 1):
+        columns.extend((f'top{rank}_label', f'top{rank}_prob'))
+    return ','.join(columns) + '\n'
+
+
+class Checkpoint:
+    """Progreso en JSON, escrito de forma atómica después de cada lote"""
+
+    def __init__(self, path, signature):
+        self.path = path
+        self.signature = signature
+        self.shard = 0
+        self.offset = 0
+        self.rows = 0
+        self.output_bytes = 0
+
+    def load(self):
+        """True si hay un checkpoint compatible con esta corrida"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('signature') != self.signature:
+            raise SystemExit(f"❌ {self.path} es de otra corrida (entradas, modelo o formato distintos). "
+                             "Usa --restart para empezar de cero.")
+        self.shard = state['shard']
+        self.offset = state['offset']
+        self.rows = state['rows']
+        self.output_bytes = state['output_bytes']
+        return True
+
+    def save(self, shard, offset, rows, output_bytes, done=False):
+        self.shard, self.offset, self.rows, self.output_bytes = shard, offset, rows, output_bytes
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'signature': self.signature,
+                'shard': shard,
+                'offset': offset,
+                'rows': rows,
+                'output_bytes': output_bytes,
+                'done': done,
+            }, f)
+        os.replace(tmp_path, self.path)
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="SignBridge offline bulk scoring")
+    parser.add_argument("inputs", nargs='+', help="Archivos .npy/.npz, globs o directorios")
+    parser.add_argument("--output", required=True, help="scores.csv o scores.jsonl")
+    parser.add_argument("--format", choices=("csv", "jsonl"),
+                        help="Default: según la extensión de --output")
+    parser.add_argument("--model", default=os.getenv("SIGNBRIDGE_MODEL_PATH", "best_model.keras"))
+    parser.add_argument("--backend", help="keras | function | tflite | auto (default: SIGNBRIDGE_ENGINE)")
+    parser.add_argument("--labels", default="labels.json")
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--prefetch", type=int, default=2, help="Lotes leídos por adelantado")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--checkpoint", help="Default: <output>.checkpoint.json")
+    parser.add_argument("--restart", action="store_true", help="Ignorar el checkpoint y reescribir la salida")
+    args = parser.parse_args()
+    args.format = args.format or ('csv' if args.output.endswith('.csv') else 'jsonl')
+    args.checkpoint = args.checkpoint or args.output + '.checkpoint.json'
+    return args
+
+
+def main():
+    args = parse_args()
+
+    print("📦 SignBridge Bulk Scoring")
+    print("=" * 70)
+
+    paths = expand_inputs(args.inputs)
+    shards = open_shards(paths)
+    total = sum(len(array) for _, array in shards)
+    print(f"📂 {len(paths)} archivos, {len(shards)} shards, {total:,} secuencias")
+
+    checkpoint = Checkpoint(args.checkpoint, corpus_signature(paths, args))
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    resumed = checkpoint.load()
+    if resumed and (not os.path.exists(args.output)
+                    or os.path.getsize(args.output) < checkpoint.output_bytes):
+        print(f"⚠️  {args.output} falta o es más corto que el checkpoint: empezando de cero")
+        checkpoint = Checkpoint(args.checkpoint, checkpoint.signature)
+        resumed = False
+
+    from inference_engine import load_engine
+    from model_registry import read_labels
+
+    labels = read_labels(args.labels)
+    # El mismo k para el header CSV y para las filas
+    top_k = max(1, min(args.top_k, len(labels)))
+
+    # Lo escrito después del último checkpoint se descarta (lote a medio escribir)
+    output = open(args.output, 'r+b' if resumed else 'wb')
+    output.truncate(checkpoint.output_bytes if resumed else 0)
+    output.seek(0, os.SEEK_END)
+    if resumed:
+        print(f"↩️  Reanudando desde shard {checkpoint.shard}, offset {checkpoint.offset} "
+              f"({checkpoint.rows:,} filas ya escritas)")
+    elif args.format == 'csv':
+        output.write(csv_header(top_k).encode('utf-8'))
+
+    print(f"🧠 Cargando modelo: {args.model}")
+    engine = load_engine(args.model, args.backend)
+    print(f"✅ Modelo cargado (backend: {engine.name})")
+
+    rows = rows_at_start = checkpoint.rows
+    start = time.perf_counter()
+    last_report = start
+    try:
+        for shard_index, offset, batch in iter_batches(
+                shards, args.batch_size, checkpoint.shard, checkpoint.offset, args.prefetch):
+            probabilities = engine.infer(batch)
+            indices, probs = top_k_batch(probabilities, top_k)
+            source = shards[shard_index][0]
+            output.write(format_rows(source, offset, indices, probs, labels, args.format).encode('utf-8'))
+            output.flush()
+            rows += len(batch)
+
+            next_shard, next_offset = shard_index, offset + len(batch)
+            if next_offset >= len(shards[shard_index][1]):
+                next_shard, next_offset = shard_index + 1, 0
+            checkpoint.save(next_shard, next_offset, rows, output.tell())
+
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                rate = (rows - rows_at_start) / (now - start)
+                print(f"   {rows:,}/{total:,} secuencias · {rate:,.0f} seq/s")
+                last_report = now
+    except KeyboardInterrupt:
+        print(f"\n⏸️  Interrumpido en {rows:,}/{total:,}. Ejecuta el mismo comando para continuar.")
+        return
+    finally:
+        output.close()
+
+    checkpoint.save(len(shards), 0, rows, checkpoint.output_bytes, done=True)
+    elapsed = time.perf_counter() - start
+    print("=" * 70)
+    print(f"✅ {rows:,} secuencias en {args.output} ({elapsed:.1f}s)")
+    print(f"⏱️  Latencia del motor: {engine.latency.as_dict()['avg_ms_per_sample']:.3f}ms por secuencia")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""
+Pipeline por etapas para la cámara - SignBridge
+Cada etapa (captura, landmarks, inferencia, JPEG) corre en su propio hilo y
+se comunica con la siguiente por una cola acotada que, cuando está llena,
+descarta el elemento más antiguo: una etapa lenta pierde trabajo viejo en
+vez de frenar a las demás, y el video sigue al ritmo de la cámara.
+
+Un solo pipeline por cámara alimenta a todos los visores: SharedSource lo
+arranca con el primer suscriptor y FrameBroadcast reparte el último frame
+(ver video_ladder.py para la calidad por visor).
+
+Uso:
+    pipeline = StagedPipeline('camera')
+    frames = pipeline.queue('frames', maxsize=2)
+    pipeline.stage('capture', read_frame, outbox=frames)
+    pipeline.stage('landmarks', process, inbox=frames, outbox=...)
+    pipeline.start()
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class EndOfStream(Exception):
+    """Lanzada por una etapa para detener el pipeline (ej. la cámara dejó de entregar frames)"""
+
+
+class DropOldestQueue:
+    """Cola FIFO acotada: put() nunca bloquea, descarta el elemento más antiguo si está llena"""
+
+    def __init__(self, maxsize=1, name='queue'):
+        self.maxsize = max(1, int(maxsize))
+        self.name = name
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.put_count = 0
+        self.dropped = 0
+        self._depth_sum = 0  # Profundidad observada en cada put (ocupación media)
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self.put_count += 1
+            self._depth_sum += len(self._items)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Siguiente elemento, o None si vence el timeout o la cola se cerró"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout):
+                return None
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'depth': len(self._items),
+                'maxsize': self.maxsize,
+                'mean_occupancy': (self._depth_sum / self.put_count / self.maxsize) if self.put_count else 0.0,
+                'put': self.put_count,
+                'dropped': self.dropped,
+            }
+
+
+class PipelineStage(threading.Thread):
+    """
+    Hilo que aplica fn a cada elemento de `inbox` y deja el resultado en
+    `outbox`. Sin inbox es una fuente: llama fn() en bucle. Un resultado None
+    no se propaga.
+    """
+
+    def __init__(self, pipeline, name, fn, inbox=None, outbox=None):
+        super().__init__(name=f'{pipeline.name}-{name}', daemon=True)
+        self.pipeline = pipeline
+        self.stage_name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self._lock = threading.Lock()
+        self._completed_at = deque(maxlen=64)
+        self.processed = 0
+        self.errors = 0
+        self.busy_s = 0.0
+        self.started_at = None
+
+    def run(self):
+        self.started_at = time.perf_counter()
+        while not self.pipeline.stopping:
+            if self.inbox is not None:
+                item = self.inbox.get(timeout=0.1)
+                if item is None:
+                    continue
+                args = (item,)
+            else:
+                args = ()
+
+            start = time.perf_counter()
+            try:
+                result = self.fn(*args)
+            except EndOfStream as e:
+                print(f"⏹️  Pipeline '{self.pipeline.name}' detenido por '{self.stage_name}': {e}")
+                self.pipeline.stop()
+                return
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                print(f"⚠️  Etapa '{self.stage_name}': {e}")
+                continue
+            end = time.perf_counter()
+
+            with self._lock:
+                self.processed += 1
+                self.busy_s += end - start
+                self._completed_at.append(end)
+            if result is not None and self.outbox is not None:
+                self.outbox.put(result)
+
+    def stats(self):
+        with self._lock:
+            now = time.perf_counter()
+            recent = [t for t in self._completed_at if now - t <= 2.0]
+            fps = (len(recent) - 1) / (recent[-1] - recent[0]) if len(recent) > 1 and recent[-1] > recent[0] else 0.0
+            elapsed = now - self.started_at if self.started_at else 0.0
+            return {
+                'fps': fps,
+                'processed': self.processed,
+                'errors': self.errors,
+                'avg_ms': (self.busy_s / self.processed * 1000) if self.processed else 0.0,
+                'busy_ratio': (self.busy_s / elapsed) if elapsed else 0.0,
+            }
+
+
+class StagedPipeline:
+    """Conjunto de etapas y colas; stats() da throughput por etapa y ocupación por cola"""
+
+    def __init__(self, name='pipeline'):
+        self.name = name
+        self.stages = []
+        self.queues = []
+        self._stop = threading.Event()
+        self._cleanups = []
+        self._cleanup_lock = threading.Lock()
+
+    def queue(self, name, maxsize=1):
+        queue = DropOldestQueue(maxsize, name)
+        self.queues.append(queue)
+        return queue
+
+    def stage(self, name, fn, inbox=None, outbox=None):
+        stage = PipelineStage(self, name, fn, inbox, outbox)
+        self.stages.append(stage)
+        return stage
+
+    def on_stop(self, fn):
+        """fn() se ejecuta una vez, después de detener las etapas (ej. liberar la cámara)"""
+        self._cleanups.append(fn)
+
+    @property
+    def stopping(self):
+        return self._stop.is_set()
+
+    @property
+    def running(self):
+        return not self._stop.is_set() and any(stage.is_alive() for stage in self.stages)
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """
+        Detiene las etapas (puede llamarse desde una de ellas) y corre los on_stop.
+        Al volver, los on_stop ya terminaron aunque los haya corrido otra llamada.
+        """
+        self._stop.set()
+        for queue in self.queues:
+            queue.close()
+        current = threading.current_thread()
+        for stage in self.stages:
+            if stage is not current and stage.is_alive():
+                stage.join(timeout)
+        with self._cleanup_lock:
+            cleanups, self._cleanups = self._cleanups, []
+            for fn in cleanups:
+                fn()
+
+    def stats(self):
+        return {
+            'stages': {stage.stage_name: stage.stats() for stage in self.stages},
+            'queues': {queue.name: queue.stats() for queue in self.queues},
+        }
+
+
+class FrameBroadcast:
+    """
+    Último frame publicado con su número de secuencia. Cada suscriptor espera
+    un número mayor al último que vio: un visor lento salta frames en vez de
+    acumularlos, y publicar no depende de cuántos visores haya.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self.published = 0
+
+    def publish(self, frame):
+        with self._cond:
+            self._frame = frame
+            self._seq += 1
+            self.published += 1
+            self._cond.notify_all()
+
+    def wait(self, last_seq=0, timeout=1.0):
+        """(seq, frame) del siguiente frame después de last_seq, o (last_seq, None) si vence el timeout"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > last_seq, timeout):
+                return last_seq, None
+            return self._seq, self._frame
+
+    def reset(self):
+        with self._cond:
+            self._frame = None
+
+
+class SharedSource:
+    """
+    Productor compartido de una fuente física (cámara) para cualquier número de visores.
+
+    start_fn(broadcast) abre la fuente y devuelve un StagedPipeline ya iniciado
+    que publica en `broadcast` (o None si la fuente no está disponible). Arranca
+    con el primer suscriptor y se detiene `idle_timeout_s` después del último.
+
+    start_fn corre fuera del lock: los visores que llegan durante el arranque
+    esperan su resultado. Antes de reabrir la fuente se espera a que el
+    pipeline anterior termine de liberarla.
+    """
+
+    def __init__(self, name, start_fn, idle_timeout_s=5.0):
+        self.name = name
+        self.start_fn = start_fn
+        self.idle_timeout_s = float(idle_timeout_s)
+        self.broadcast = FrameBroadcast()
+        self.pipeline = None
+        self.subscribers = 0
+        self.starts = 0
+        self._lock = threading.Lock()
+        self._idle_timer = None
+        self._starting = None  # Event del arranque en curso
+        self._stopping = None  # Pipeline que se está deteniendo
+
+    @property
+    def running(self):
+        pipeline = self.pipeline
+        return pipeline is not None and pipeline.running
+
+    def frames(self, with_seq=False):
+        """Generador de frames para un visor (una conexión a /video_feed); (seq, frame) si with_seq"""
+        if not self._subscribe():
+            return
+        try:
+            seq = 0
+            while True:
+                seq, frame = self.broadcast.wait(seq, timeout=1.0)
+                if frame is None:
+                    if not self.running:
+                        return
+                    continue
+                yield (seq, frame) if with_seq else frame
+        finally:
+            self._unsubscribe()
+
+    def _subscribe(self):
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            self.subscribers += 1
+            if self._starting is not None:
+                starting, leader = self._starting, False
+            elif self.running:
+                return True
+            else:
+                starting, leader = threading.Event(), True
+                self._starting = starting
+                previous = self._stopping or self.pipeline
+                self.pipeline = None
+
+        if leader:
+            pipeline = None
+            try:
+                if previous is not None:
+                    previous.stop()  # La fuente debe quedar libre antes de reabrirla
+                self.broadcast.reset()
+                pipeline = self.start_fn(self.broadcast)
+            finally:
+                with self._lock:
+                    self.pipeline = pipeline
+                    self._starting = None
+                    if pipeline is not None:
+                        self.starts += 1
+                starting.set()
+            if pipeline is not None:
+                print(f"📡 Fuente '{self.name}' iniciada")
+        else:
+            starting.wait()
+
+        with self._lock:
+            if self.pipeline is not None:
+                return True
+            self.subscribers -= 1
+            return False
+
+    def _unsubscribe(self):
+        with self._lock:
+            self.subscribers -= 1
+            if self.subscribers == 0 and self.pipeline is not None:
+                self._idle_timer = threading.Timer(self.idle_timeout_s, self._stop_if_idle)
+                self._idle_timer.daemon = True
+                self._idle_timer.start()
+
+    def _stop_if_idle(self):
+        with self._lock:
+            if self.subscribers or self.pipeline is None or self._starting is not None:
+                return
+            pipeline, self.pipeline = self.pipeline, None
+            self._stopping = pipeline
+            self._idle_timer = None
+        pipeline.stop()
+        with self._lock:
+            if self._stopping is pipeline:
+                self._stopping = None
+        print(f"💤 Fuente '{self.name}' detenida (sin visores)")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'running': self.running,
+                'subscribers': self.subscribers,
+                'starts': self.starts,
+                'frames_published': self.broadcast.published,
+            }
@@ -6,13 +6,21 @@ Captura video de la webcam y hace predicciones en tiempo real
 from flask import Flask, render_template, request, jsonify, Response
 from flask_cors import CORS
 import numpy as np
-import tensorflow as tf
 import json
 import cv2
 import mediapipe as mp
+import os
 import time
 from collections import deque
 
+from camera_pipeline import EndOfStream, SharedSource, StagedPipeline
+from gating import DeltaGate, HandPresenceGate, NO_SIGN_LABEL
+from hand_roi import region_from_env
+from metrics import MetricsRegistry, CONTENT_TYPE as METRICS_CONTENT_TYPE, BATCH_SIZE_BUCKETS
+from scheduler import scheduler_from_env
+from startup import ModelStartup
+from video_ladder import ladder_from_env
+
 app = Flask(__name__)
 CORS(app)
 
@@ -23,11 +31,23 @@ CORS(app)
 print("🚀 Iniciando SignBridge Camera Server...")
 print("=" * 70)
 
-# Cargar modelo
-MODEL_PATH = "best_model.keras"
+# Cargar modelo (FAST_START=1: en segundo plano, el video arranca sin esperar)
+MODEL_PATH = os.getenv("SIGNBRIDGE_MODEL_PATH", "best_model.keras")
+FAST_START = os.getenv('FAST_START', '0') == '1'
+CAMERA_INDEX = int(os.getenv('CAMERA_INDEX', '0'))
+engine = None  # Se asigna en on_model_ready()
+
+
+def on_model_ready(loaded_engine):
+    global engine
+    engine = loaded_engine
+    print(f"✅ Modelo cargado (backend: {engine.name})")
+
+
+startup = ModelStartup(MODEL_PATH, warmup_batch_sizes=(1,), on_ready=on_model_ready)
+startup.register_routes(app)
 print(f"🧠 Cargando modelo: {MODEL_PATH}")
-model = tf.keras.models.load_model(MODEL_PATH)
-print(f"✅ Modelo cargado")
+startup.start(background=FAST_START)
 
 # Cargar etiquetas
 with open("labels.json", 'r', encoding='utf-8') as f:
@@ -48,10 +68,84 @@ hands = mp_hands.Hands(
 )
 print(f"✅ MediaPipe listo")
 
+# Resolución de video (cámara) y de procesamiento (MediaPipe) por separado;
+# HAND_ROI=1 recorta alrededor de las manos del frame anterior
+DISPLAY_WIDTH = int(os.getenv('DISPLAY_WIDTH', '640'))
+DISPLAY_HEIGHT = int(os.getenv('DISPLAY_HEIGHT', '480'))
+hand_region = region_from_env()
+
 # Buffer para almacenar frames
 frame_buffer = deque(maxlen=24)
 current_prediction = {"class": "Esperando...", "confidence": 0.0}
 
+# Gating: con menos de GATE_MIN_HAND_FRAMES frames con mano no se llama al modelo
+gate = HandPresenceGate(int(os.getenv('GATE_MIN_HAND_FRAMES', '1')))
+# Delta: ventana casi igual a la última inferida → se mantiene la predicción
+delta_gate = DeltaGate(float(os.getenv('DELTA_THRESHOLD', '0')), int(os.getenv('DELTA_MAX_STALE', '4')))
+
+# Métricas Prometheus (/metrics): latencia por etapa y contadores
+metrics = MetricsRegistry()
+STAGE_SECONDS = metrics.histogram(
+    'signbridge_stage_duration_seconds', 'Duración de cada etapa del pipeline de cámara', ['stage'])
+STAGE_CAPTURE = STAGE_SECONDS.labels(stage='capture')
+STAGE_LANDMARKS = STAGE_SECONDS.labels(stage='landmarks')
+STAGE_INFERENCE = STAGE_SECONDS.labels(stage='inference')
+STAGE_POSTPROCESS = STAGE_SECONDS.labels(stage='postprocess')
+STAGE_SERIALIZE = STAGE_SECONDS.labels(stage='serialize')
+FRAMES = metrics.counter('signbridge_frames_total', 'Frames de cámara procesados')
+PREDICTIONS = metrics.counter('signbridge_predictions_total', 'Inferencias ejecutadas')
+ERRORS = metrics.counter('signbridge_errors_total', 'Errores del pipeline', ['stage'])
+INFERENCES_SAVED = metrics.counter(
+    'signbridge_inferences_saved_total', 'Ventanas respondidas sin llamar al modelo', ['reason'])
+BATCH_SIZE = metrics.histogram(
+    'signbridge_batch_size', 'Secuencias por llamada al modelo', buckets=BATCH_SIZE_BUCKETS)
+metrics.gauge('signbridge_frame_buffer_size', 'Frames en el buffer de 24', lambda: len(frame_buffer))
+# Pipeline de la cámara compartida (throughput por etapa y ocupación de colas)
+active_pipeline = None
+metrics.gauge('signbridge_pipeline_stage_fps', 'Elementos por segundo de cada etapa del pipeline',
+              lambda: {name: s['fps'] for name, s in active_pipeline.stats()['stages'].items()}, ['stage'])
+metrics.gauge('signbridge_pipeline_stage_busy_ratio', 'Fracción del tiempo que cada etapa está ocupada',
+              lambda: {name: s['busy_ratio'] for name, s in active_pipeline.stats()['stages'].items()}, ['stage'])
+metrics.gauge('signbridge_pipeline_queue_depth', 'Elementos esperando en cada cola del pipeline',
+              lambda: {name: q['depth'] for name, q in active_pipeline.stats()['queues'].items()}, ['queue'])
+metrics.gauge('signbridge_pipeline_queue_dropped', 'Elementos descartados (drop-oldest) por cola',
+              lambda: {name: q['dropped'] for name, q in active_pipeline.stats()['queues'].items()}, ['queue'])
+# Video MJPEG: un JPEG por nivel de calidad, compartido; cada visor baja de nivel si se atrasa
+ladder = ladder_from_env(default_quality=95)
+metrics.gauge('signbridge_video_encode_ms', 'Tiempo medio de codificación JPEG por nivel',
+              lambda: {name: s['encode_ms'] for name, s in ladder.stats()['levels'].items()}, ['level'])
+metrics.gauge('signbridge_video_bandwidth_bytes_per_second', 'Bytes enviados por segundo por nivel',
+              lambda: {name: s['bandwidth_bps'] for name, s in ladder.stats()['levels'].items()}, ['level'])
+metrics.gauge('signbridge_video_bytes_sent', 'Bytes enviados por nivel (acumulado)',
+              lambda: {name: s['bytes_sent'] for name, s in ladder.stats()['levels'].items()}, ['level'])
+metrics.gauge('signbridge_video_viewers_by_level', 'Visores en cada nivel de calidad',
+              ladder.viewers_by_level, ['level'])
+metrics.gauge('signbridge_video_frames_missed', 'Frames publicados mientras un visor seguía enviando',
+              lambda: sum(c['missed'] for c in ladder.stats()['clients']))
+metrics.gauge('signbridge_video_frames_skipped', 'Frames salteados a propósito por visores atrasados',
+              lambda: sum(c['skipped'] for c in ladder.stats()['clients']))
+metrics.gauge('signbridge_video_viewers', 'Clientes conectados a /video_feed',
+              lambda: camera_source.subscribers)
+metrics.gauge('signbridge_model_ready', 'Modelo cargado y calentado (1) o cargando (0)',
+              lambda: int(startup.ready))
+
+# Stride adaptativo: cada cuántos frames se infiere (latencia, presupuesto de CPU y movimiento)
+scheduler = scheduler_from_env()
+metrics.gauge('signbridge_inference_stride', 'Frames entre inferencias elegidos por el scheduler',
+              lambda: scheduler.stride)
+metrics.gauge('signbridge_inference_cpu_budget', 'Fracción del tiempo permitida para inferencia',
+              lambda: scheduler.cpu_budget)
+metrics.gauge('signbridge_inference_cpu_usage', 'Fracción del tiempo estimada usada por inferencia',
+              lambda: scheduler.cpu_usage)
+metrics.gauge('signbridge_landmarks_pixel_fraction',
+              'Píxeles que recibe MediaPipe respecto al frame de cámara (promedio)',
+              lambda: hand_region.stats()['pixel_fraction'])
+metrics.gauge('signbridge_hand_roi_frames', 'Frames procesados en frame completo o recorte ROI',
+              lambda: {'full': hand_region.stats()['full_frames'], 'roi': hand_region.stats()['roi_frames']},
+              ['mode'])
+metrics.gauge('signbridge_motion_energy', 'Cambio medio de landmarks entre frames (promedio móvil)',
+              lambda: scheduler.motion_energy)
+
 print("=" * 70)
 
 # ============================================================================
@@ -68,11 +162,12 @@ def extract_landmarks(hand_landmarks, hand_type="Left"):
 
 def process_frame(frame):
     """Procesa un frame y extrae landmarks de ambas manos"""
-    # Convertir BGR a RGB
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    # Región para MediaPipe (recorte ROI y resolución de procesamiento) en RGB
+    rgb_frame = hand_region.prepare(frame)
     
-    # Detectar manos
+    # Detectar manos; landmarks de vuelta a coordenadas del frame completo
     results = hands.process(rgb_frame)
+    hand_region.to_full_frame(results)
     
     # Crear array de features (126 valores)
     features = np.zeros(126, dtype=np.float32)
@@ -103,25 +198,42 @@ def process_frame(frame):
     return frame, features
 
 
-def make_prediction_from_buffer():
-    """Hace predicción usando el buffer de frames"""
+def make_prediction_from_window(sequence):
+    """Hace predicción sobre una ventana (24, 126) ya copiada del buffer"""
     global current_prediction
     
-    if len(frame_buffer) < 24:
+    if not startup.ready:
+        return
+    
+    # Sin manos en la ventana: resultado "sin seña" sin llamar al modelo
+    allowed, _ = gate.check(sequence)
+    if not allowed:
+        INFERENCES_SAVED.labels(reason='no_hands').inc()
+        delta_gate.reset()
+        current_prediction = {"class": NO_SIGN_LABEL, "confidence": 0.0, "inference_time": 0.0}
         return
     
-    # Crear secuencia de 24 frames
-    sequence = np.array(list(frame_buffer))
+    # Ventana casi igual a la última inferida: se mantiene current_prediction
+    reused, _ = delta_gate.check(sequence)
+    if reused is not None:
+        INFERENCES_SAVED.labels(reason='delta').inc()
+        return
     
     # Hacer predicción
     start = time.time()
     input_batch = sequence.reshape(1, 24, 126)
-    prediction = model.predict(input_batch, verbose=0)
+    prediction = engine.infer(input_batch)
     inference_time = (time.time() - start) * 1000
+    STAGE_INFERENCE.observe(inference_time / 1000)
+    BATCH_SIZE.observe(1)
+    PREDICTIONS.inc()
+    scheduler.observe_latency(inference_time)
+    delta_gate.update(sequence, prediction[0])
     
     # Obtener clase predicha
-    predicted_idx = np.argmax(prediction[0])
-    confidence = prediction[0][predicted_idx]
+    with STAGE_POSTPROCESS.time():
+        predicted_idx = np.argmax(prediction[0])
+        confidence = prediction[0][predicted_idx]
     
     current_prediction = {
         "class": labels[predicted_idx],
@@ -130,83 +242,137 @@ def make_prediction_from_buffer():
     }
 
 
-def generate_frames():
-    """Generador de frames para streaming de video"""
-    camera = cv2.VideoCapture(0)
+def draw_overlay(frame):
+    """Dibuja buffer, predicción y confianza sobre el frame"""
+    cv2.putText(
+        frame,
+        f"Frames: {len(frame_buffer)}/24",
+        (10, 30),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        0.7,
+        (0, 255, 0),
+        2
+    )
     
-    if not camera.isOpened():
-        print("❌ Error: No se pudo abrir la cámara")
-        return
+    cv2.putText(
+        frame,
+        f"Prediccion: {current_prediction['class']}",
+        (10, 60),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        0.7,
+        (0, 255, 255),
+        2
+    )
     
-    # Configurar cámara
-    camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    camera.set(cv2.CAP_PROP_FPS, 30)
+    cv2.putText(
+        frame,
+        f"Confianza: {current_prediction['confidence']*100:.1f}%",
+        (10, 90),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        0.7,
+        (0, 255, 255),
+        2
+    )
     
-    frame_count = 0
+    schedule = scheduler.stats()
+    cv2.putText(
+        frame,
+        f"Stride: {schedule['stride']} ({schedule['reason']}) | "
+        f"CPU {schedule['cpu_usage']*100:.0f}%/{schedule['cpu_budget']*100:.0f}%",
+        (10, 120),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        0.6,
+        (255, 255, 0),
+        2
+    )
+
+
+def build_pipeline(camera, broadcast):
+    """
+    captura → landmarks → JPEG → broadcast, con la inferencia como rama aparte:
+    cuando el scheduler lo indica, landmarks deja una copia de la ventana en
+    `windows` (tamaño 1) y el hilo de inferencia toma siempre la más reciente.
+    """
+    pipeline = StagedPipeline('camera')
+    captured = pipeline.queue('captured', maxsize=2)
+    annotated = pipeline.queue('annotated', maxsize=2)
+    windows = pipeline.queue('windows', maxsize=1)
     
-    try:
-        while True:
+    def capture():
+        with STAGE_CAPTURE.time():
             success, frame = camera.read()
-            if not success:
-                break
-            
-            # Voltear frame horizontalmente (efecto espejo)
-            frame = cv2.flip(frame, 1)
-            
-            # Procesar frame y extraer landmarks
+        if not success:
+            ERRORS.labels(stage='capture').inc()
+            raise EndOfStream("la cámara no entregó un frame")
+        FRAMES.inc()
+        # Voltear frame horizontalmente (efecto espejo)
+        return cv2.flip(frame, 1)
+    
+    def landmarks(frame):
+        with STAGE_LANDMARKS.time():
             processed_frame, features = process_frame(frame)
-            
-            # Agregar features al buffer
-            frame_buffer.append(features)
-            
-            # Hacer predicción cada 5 frames
-            if frame_count % 5 == 0 and len(frame_buffer) == 24:
-                make_prediction_from_buffer()
-            
-            # Dibujar información en el frame
-            cv2.putText(
-                processed_frame,
-                f"Frames: {len(frame_buffer)}/24",
-                (10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.7,
-                (0, 255, 0),
-                2
-            )
-            
-            cv2.putText(
-                processed_frame,
-                f"Prediccion: {current_prediction['class']}",
-                (10, 60),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.7,
-                (0, 255, 255),
-                2
-            )
-            
-            cv2.putText(
-                processed_frame,
-                f"Confianza: {current_prediction['confidence']*100:.1f}%",
-                (10, 90),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.7,
-                (0, 255, 255),
-                2
-            )
-            
-            # Codificar frame como JPEG
-            ret, buffer = cv2.imencode('.jpg', processed_frame)
-            frame = buffer.tobytes()
-            
-            # Yield frame en formato multipart
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-            
-            frame_count += 1
+        frame_buffer.append(features)
+        scheduler.observe_frame(features)
+        
+        # Ventana para inferencia según el stride adaptativo
+        if len(frame_buffer) == 24 and scheduler.should_infer():
+            windows.put(np.array(frame_buffer))
+        return processed_frame
     
-    finally:
+    def encode(frame):
+        draw_overlay(frame)
+        with STAGE_SERIALIZE.time():
+            encoded = ladder.wrap(frame)
+        if encoded is None:
+            ERRORS.labels(stage='serialize').inc()
+            return
+        broadcast.publish(encoded)
+    
+    pipeline.stage('capture', capture, outbox=captured)
+    pipeline.stage('landmarks', landmarks, inbox=captured, outbox=annotated)
+    pipeline.stage('inference', make_prediction_from_window, inbox=windows)
+    pipeline.stage('encode', encode, inbox=annotated)
+    return pipeline
+
+
+def start_camera(broadcast):
+    """Abre la cámara y arranca el único pipeline que comparten todos los visores"""
+    global active_pipeline
+    camera = cv2.VideoCapture(CAMERA_INDEX)
+    
+    if not camera.isOpened():
+        print("❌ Error: No se pudo abrir la cámara")
         camera.release()
+        return None
+    
+    # Configurar cámara
+    camera.set(cv2.CAP_PROP_FRAME_WIDTH, DISPLAY_WIDTH)
+    camera.set(cv2.CAP_PROP_FRAME_HEIGHT, DISPLAY_HEIGHT)
+    camera.set(cv2.CAP_PROP_FPS, 30)
+    
+    # El buffer y el delta gating empiezan de cero con cada sesión de cámara
+    frame_buffer.clear()
+    delta_gate.reset()
+    scheduler.reset()
+    hand_region.reset()
+    
+    pipeline = build_pipeline(camera, broadcast)
+    pipeline.on_stop(camera.release)
+    active_pipeline = pipeline.start()
+    return pipeline
+
+
+# Un productor por cámara; cada /video_feed lee el último frame en su nivel de calidad
+camera_source = SharedSource(f'camera-{CAMERA_INDEX}', start_camera,
+                             idle_timeout_s=float(os.getenv('CAMERA_IDLE_TIMEOUT_S', '5')))
+
+
+def generate_frames():
+    """Generador de frames para streaming de video (un visor del productor compartido)"""
+    for frame in ladder.stream(camera_source.frames(with_seq=True)):
+        # Yield frame en formato multipart
+        yield (b'--frame\r\n'
+               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
 
 
 # ============================================================================
@@ -471,6 +637,22 @@ def get_current_prediction():
     return jsonify(current_prediction)
 
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Métricas en formato texto de Prometheus"""
+    return Response(metrics.render(), mimetype=METRICS_CONTENT_TYPE)
+
+
+@app.route('/api/pipeline')
+def api_pipeline():
+    """Throughput por etapa y ocupación de colas del pipeline activo"""
+    if active_pipeline is None:
+        return jsonify({"running": False})
+    return jsonify({"running": active_pipeline.running, "source": camera_source.stats(),
+                    "hand_region": hand_region.stats(), "video": ladder.stats(),
+                    **active_pipeline.stats()})
+
+
 @app.route('/api/info')
 def api_info():
     """Información del modelo"""
@@ -478,7 +660,8 @@ def api_info():
         "model": "SignBridge LSTM",
         "classes": len(labels),
         "input_shape": [24, 126],
-        "labels": labels
+        "labels": labels,
+        "gating": {"hands": gate.stats(), "delta": delta_gate.stats()}
     })
 
 
@@ -495,7 +678,7 @@ if __name__ == '__main__':
     print("\n🎥 Características:")
     print("   • Captura de cámara en tiempo real")
     print("   • Detección de manos con MediaPipe")
-    print("   • Predicciones automáticas cada 5 frames")
+    print("   • Predicciones con stride adaptativo (movimiento y presupuesto de CPU)")
     print("   • Visualización de landmarks en el video")
     print("\n💡 Presiona Ctrl+C para detener")
     print("=" * 70)
@@ -6,7 +6,6 @@ Captura video de la webcam y hace predicciones en tiempo real
 from flask import Flask, Response
 from flask_cors import CORS
 import numpy as np
-import tensorflow as tf
 import json
 import cv2
 import mediapipe as mp
@@ -14,17 +13,39 @@ import time
 from collections import deque
 import os
 
+from camera_pipeline import EndOfStream, SharedSource, StagedPipeline
+from gating import DeltaGate, HandPresenceGate, NO_SIGN_LABEL
+from hand_roi import region_from_env
+from metrics import MetricsRegistry, CONTENT_TYPE as METRICS_CONTENT_TYPE, BATCH_SIZE_BUCKETS
+from scheduler import scheduler_from_env
+from startup import ModelStartup
+from video_ladder import ladder_from_env
+
 app = Flask(__name__)
 CORS(app)
 
 print("🚀 Iniciando SignBridge Camera Server...")
 print("=" * 80)
 
-# Cargar modelo
-MODEL_PATH = "best_model.keras"
+# Cargar modelo (FAST_START=1: en segundo plano, el video arranca sin esperar)
+MODEL_PATH = os.getenv("SIGNBRIDGE_MODEL_PATH", "best_model.keras")
+FAST_START = os.getenv('FAST_START', '0') == '1'
+engine = None  # Se asigna en on_model_ready()
+
+
+def on_model_ready(loaded_engine):
+    global engine
+    engine = loaded_engine
+    if engine.model is not None:
+        print(f"✅ Modelo cargado ({engine.model.count_params():,} parámetros, backend: {engine.name})")
+    else:
+        print(f"✅ Modelo cargado (backend: {engine.name})")
+
+
+startup = ModelStartup(MODEL_PATH, warmup_batch_sizes=(1,), on_ready=on_model_ready)
+startup.register_routes(app)
 print(f"🧠 Cargando modelo: {MODEL_PATH}")
-model = tf.keras.models.load_model(MODEL_PATH)
-print(f"✅ Modelo cargado ({model.count_params():,} parámetros)")
+startup.start(background=FAST_START)
 
 # Cargar etiquetas
 with open("labels.json", 'r', encoding='utf-8') as f:
@@ -44,9 +65,81 @@ hands = mp_hands.Hands(
 )
 print(f"✅ MediaPipe listo")
 
+# Resolución de video (cámara) y de procesamiento (MediaPipe) por separado;
+# HAND_ROI=1 recorta alrededor de las manos del frame anterior
+DISPLAY_WIDTH = int(os.getenv('DISPLAY_WIDTH', '640'))
+DISPLAY_HEIGHT = int(os.getenv('DISPLAY_HEIGHT', '480'))
+hand_region = region_from_env()
+
 # Buffer para almacenar frames
 frame_buffer = deque(maxlen=24)
-current_prediction = {"class": "Esperando...", "confidence": 0.0, "time": 0.0}
+# finished_at: time.monotonic() de la última predicción terminada (edad en el overlay)
+current_prediction = {"class": "Esperando...", "confidence": 0.0, "time": 0.0, "finished_at": None}
+
+# Gating: con menos de GATE_MIN_HAND_FRAMES frames con mano no se llama al modelo
+gate = HandPresenceGate(int(os.getenv('GATE_MIN_HAND_FRAMES', '1')))
+# Delta: ventana casi igual a la última inferida → se mantiene la predicción
+delta_gate = DeltaGate(float(os.getenv('DELTA_THRESHOLD', '0')), int(os.getenv('DELTA_MAX_STALE', '4')))
+
+# Métricas Prometheus (/metrics): latencia por etapa y contadores
+metrics = MetricsRegistry()
+STAGE_SECONDS = metrics.histogram(
+    'signbridge_stage_duration_seconds', 'Duración de cada etapa del pipeline de cámara', ['stage'])
+STAGE_CAPTURE = STAGE_SECONDS.labels(stage='capture')
+STAGE_LANDMARKS = STAGE_SECONDS.labels(stage='landmarks')
+STAGE_INFERENCE = STAGE_SECONDS.labels(stage='inference')
+STAGE_POSTPROCESS = STAGE_SECONDS.labels(stage='postprocess')
+STAGE_SERIALIZE = STAGE_SECONDS.labels(stage='serialize')
+FRAMES = metrics.counter('signbridge_frames_total', 'Frames de cámara procesados')
+PREDICTIONS = metrics.counter('signbridge_predictions_total', 'Inferencias ejecutadas')
+ERRORS = metrics.counter('signbridge_errors_total', 'Errores del pipeline', ['stage'])
+INFERENCES_SAVED = metrics.counter(
+    'signbridge_inferences_saved_total', 'Ventanas respondidas sin llamar al modelo', ['reason'])
+BATCH_SIZE = metrics.histogram(
+    'signbridge_batch_size', 'Secuencias por llamada al modelo', buckets=BATCH_SIZE_BUCKETS)
+metrics.gauge('signbridge_frame_buffer_size', 'Frames en el buffer de 24', lambda: len(frame_buffer))
+metrics.gauge('signbridge_prediction_age_seconds', 'Segundos desde la última predicción terminada',
+              lambda: prediction_age())
+metrics.gauge('signbridge_pipeline_stage_fps', 'Elementos por segundo de cada etapa del pipeline',
+              lambda: {name: s['fps'] for name, s in camera_source.pipeline.stats()['stages'].items()}, ['stage'])
+metrics.gauge('signbridge_pipeline_queue_dropped', 'Elementos descartados (drop-oldest) por cola',
+              lambda: {name: q['dropped'] for name, q in camera_source.pipeline.stats()['queues'].items()},
+              ['queue'])
+# Video MJPEG: un JPEG por nivel de calidad, compartido; cada visor baja de nivel si se atrasa
+ladder = ladder_from_env(default_quality=85)
+metrics.gauge('signbridge_video_encode_ms', 'Tiempo medio de codificación JPEG por nivel',
+              lambda: {name: s['encode_ms'] for name, s in ladder.stats()['levels'].items()}, ['level'])
+metrics.gauge('signbridge_video_bandwidth_bytes_per_second', 'Bytes enviados por segundo por nivel',
+              lambda: {name: s['bandwidth_bps'] for name, s in ladder.stats()['levels'].items()}, ['level'])
+metrics.gauge('signbridge_video_bytes_sent', 'Bytes enviados por nivel (acumulado)',
+              lambda: {name: s['bytes_sent'] for name, s in ladder.stats()['levels'].items()}, ['level'])
+metrics.gauge('signbridge_video_viewers_by_level', 'Visores en cada nivel de calidad',
+              ladder.viewers_by_level, ['level'])
+metrics.gauge('signbridge_video_frames_missed', 'Frames publicados mientras un visor seguía enviando',
+              lambda: sum(c['missed'] for c in ladder.stats()['clients']))
+metrics.gauge('signbridge_video_frames_skipped', 'Frames salteados a propósito por visores atrasados',
+              lambda: sum(c['skipped'] for c in ladder.stats()['clients']))
+metrics.gauge('signbridge_video_viewers', 'Clientes conectados a /video_feed',
+              lambda: camera_source.subscribers)
+metrics.gauge('signbridge_model_ready', 'Modelo cargado y calentado (1) o cargando (0)',
+              lambda: int(startup.ready))
+
+# Stride adaptativo: cada cuántos frames se infiere (latencia, presupuesto de CPU y movimiento)
+scheduler = scheduler_from_env()
+metrics.gauge('signbridge_inference_stride', 'Frames entre inferencias elegidos por el scheduler',
+              lambda: scheduler.stride)
+metrics.gauge('signbridge_inference_cpu_budget', 'Fracción del tiempo permitida para inferencia',
+              lambda: scheduler.cpu_budget)
+metrics.gauge('signbridge_inference_cpu_usage', 'Fracción del tiempo estimada usada por inferencia',
+              lambda: scheduler.cpu_usage)
+metrics.gauge('signbridge_landmarks_pixel_fraction',
+              'Píxeles que recibe MediaPipe respecto al frame de cámara (promedio)',
+              lambda: hand_region.stats()['pixel_fraction'])
+metrics.gauge('signbridge_hand_roi_frames', 'Frames procesados en frame completo o recorte ROI',
+              lambda: {'full': hand_region.stats()['full_frames'], 'roi': hand_region.stats()['roi_frames']},
+              ['mode'])
+metrics.gauge('signbridge_motion_energy', 'Cambio medio de landmarks entre frames (promedio móvil)',
+              lambda: scheduler.motion_energy)
 
 print("=" * 80)
 print("🌐 Servidor iniciado. Abre tu navegador en: http://localhost:5001")
@@ -61,15 +154,71 @@ def extract_landmarks(hand_landmarks):
     return np.array(landmarks, dtype=np.float32)
 
 
-def process_frame(frame):
-    """Procesa un frame y extrae landmarks de ambas manos"""
+def predict_window(sequence):
+    """Hilo de inferencia: predicción para la ventana (24, 126) más reciente"""
     global current_prediction
+    allowed, _ = gate.check(sequence)
+    
+    if not allowed:
+        # Sin manos en la ventana: resultado "sin seña" sin llamar al modelo
+        INFERENCES_SAVED.labels(reason='no_hands').inc()
+        delta_gate.reset()
+        current_prediction = {"class": NO_SIGN_LABEL, "confidence": 0.0, "time": 0.0,
+                              "finished_at": time.monotonic()}
+        return
     
-    # Convertir BGR a RGB para MediaPipe
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    if delta_gate.check(sequence)[0] is not None:
+        # Ventana casi igual a la última inferida: se mantiene la predicción,
+        # pero vale para esta ventana (la edad no debe crecer con la escena quieta)
+        INFERENCES_SAVED.labels(reason='delta').inc()
+        current_prediction = dict(current_prediction, finished_at=time.monotonic())
+        return
+    
+    # Hacer predicción
+    start = time.time()
+    input_batch = sequence.reshape(1, 24, 126)
+    prediction = engine.infer(input_batch)
+    inference_time = (time.time() - start) * 1000
+    STAGE_INFERENCE.observe(inference_time / 1000)
+    BATCH_SIZE.observe(1)
+    PREDICTIONS.inc()
+    scheduler.observe_latency(inference_time)
+    delta_gate.update(sequence, prediction[0])
+    
+    # Obtener clase predicha
+    with STAGE_POSTPROCESS.time():
+        predicted_idx = np.argmax(prediction[0])
+        confidence = prediction[0][predicted_idx]
     
-    # Detectar manos
-    results = hands.process(rgb_frame)
+    current_prediction = {
+        "class": labels[predicted_idx],
+        "confidence": float(confidence),
+        "time": inference_time,
+        "finished_at": time.monotonic()
+    }
+
+
+def prediction_age():
+    """Segundos desde la última ventana resuelta, inferida o reutilizada (None si aún no hay)"""
+    finished_at = current_prediction.get("finished_at")
+    return None if finished_at is None else time.monotonic() - finished_at
+
+
+def process_frame(frame, windows=None):
+    """
+    Procesa un frame y extrae landmarks de ambas manos.
+    La inferencia no se hace aquí: la ventana se deja en `windows` para el hilo
+    de inferencia y el overlay muestra la última predicción terminada.
+    """
+    prediction = current_prediction
+    
+    # Región para MediaPipe (recorte ROI y resolución de procesamiento) en RGB
+    rgb_frame = hand_region.prepare(frame)
+    
+    # Detectar manos; landmarks de vuelta a coordenadas del frame completo
+    with STAGE_LANDMARKS.time():
+        results = hands.process(rgb_frame)
+    hand_region.to_full_frame(results)
     
     # Crear array de features (126 valores: 63 por mano izquierda + 63 por mano derecha)
     features = np.zeros(126, dtype=np.float32)
@@ -103,31 +252,18 @@ def process_frame(frame):
     # Agregar features al buffer
     frame_buffer.append(features)
     
-    # Hacer predicción cuando tenemos 24 frames
-    if len(frame_buffer) == 24:
-        # Crear secuencia de 24 frames
-        sequence = np.array(list(frame_buffer))
-        
-        # Hacer predicción
-        start = time.time()
-        input_batch = sequence.reshape(1, 24, 126)
-        prediction = model.predict(input_batch, verbose=0)
-        inference_time = (time.time() - start) * 1000
-        
-        # Obtener clase predicha
-        predicted_idx = np.argmax(prediction[0])
-        confidence = prediction[0][predicted_idx]
-        
-        current_prediction = {
-            "class": labels[predicted_idx],
-            "confidence": float(confidence),
-            "time": inference_time
-        }
+    scheduler.observe_frame(features)
+    
+    # Con 24 frames (y el modelo cargado) la ventana va al hilo de inferencia
+    # según el stride adaptativo; si el hilo todavía está ocupado con otra,
+    # la pendiente se reemplaza por esta
+    if len(frame_buffer) == 24 and startup.ready and windows is not None and scheduler.should_infer():
+        windows.put(np.array(frame_buffer))
     
     # Dibujar información en el frame
     # Fondo para mejor legibilidad
-    cv2.rectangle(frame, (5, 5), (635, 120), (0, 0, 0), -1)
-    cv2.rectangle(frame, (5, 5), (635, 120), (0, 255, 0), 2)
+    cv2.rectangle(frame, (5, 5), (635, 145), (0, 0, 0), -1)
+    cv2.rectangle(frame, (5, 5), (635, 145), (0, 255, 0), 2)
     
     # Información
     cv2.putText(frame, f"Frames: {len(frame_buffer)}/24", 
@@ -136,12 +272,19 @@ def process_frame(frame):
     cv2.putText(frame, f"Manos detectadas: {hands_detected}", 
                 (15, 55), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
     
-    cv2.putText(frame, f"Prediccion: {current_prediction['class']}", 
+    cv2.putText(frame, f"Prediccion: {prediction['class']}", 
                 (15, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
     
-    cv2.putText(frame, f"Confianza: {current_prediction['confidence']*100:.1f}%  ({current_prediction['time']:.1f}ms)", 
+    age = prediction_age()
+    age_text = f", hace {age:.1f}s" if age is not None else ""
+    cv2.putText(frame, f"Confianza: {prediction['confidence']*100:.1f}%  ({prediction['time']:.1f}ms{age_text})", 
                 (15, 105), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
     
+    schedule = scheduler.stats()
+    cv2.putText(frame, f"Stride: {schedule['stride']} ({schedule['reason']}) | "
+                       f"CPU {schedule['cpu_usage']*100:.0f}%/{schedule['cpu_budget']*100:.0f}%", 
+                (15, 130), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+    
     return frame
 
 
@@ -162,8 +305,12 @@ def _try_open_camera(index: int, use_dshow: bool = False):
     return None
 
 
-def generate_frames():
-    """Generador de frames para streaming de video con lógica de fallback de cámara"""
+def start_camera(broadcast):
+    """
+    Busca una cámara (con fallback de índice y backend) y arranca el único
+    productor que comparten todos los visores: captura, procesa y codifica
+    cada frame una sola vez y lo publica en `broadcast`.
+    """
     print("🔍 Buscando cámara disponible...")
     candidate_indices = list(range(0, 6))  # Probar 0..5
     camera = None
@@ -196,13 +343,13 @@ def generate_frames():
         print("   2. Revisa Privacidad > Cámara en Configuración de Windows")
         print("   3. Si usas cámara USB externa, desconecta y vuelve a conectar")
         print("   4. Prueba ejecutar: python - <<EOF\nimport cv2; print([i for i in range(10) if cv2.VideoCapture(i).isOpened()])\nEOF")
-        return
+        return None
 
     print(f"📹 Cámara inicializada correctamente (índice {chosen_index}, backend {backend_used})")
 
     # Configurar parámetros deseados (no todos se aplican en todas las cámaras)
-    camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    camera.set(cv2.CAP_PROP_FRAME_WIDTH, DISPLAY_WIDTH)
+    camera.set(cv2.CAP_PROP_FRAME_HEIGHT, DISPLAY_HEIGHT)
     camera.set(cv2.CAP_PROP_FPS, 30)
     camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reducir buffer para frames más recientes
     
@@ -212,54 +359,82 @@ def generate_frames():
         camera.read()
     print("✅ Cámara lista para streaming")
 
+    # El buffer y el delta gating empiezan de cero con cada sesión de cámara
+    frame_buffer.clear()
+    delta_gate.reset()
+    scheduler.reset()
+    hand_region.reset()
+
     dropped_frames = 0
     consecutive_failures = 0
+    windows = None  # Se asigna al armar el pipeline
 
-    try:
-        while True:
+    def capture_and_process():
+        nonlocal camera, dropped_frames, consecutive_failures
+        with STAGE_CAPTURE.time():
             success, frame = camera.read()
-            if not success or frame is None:
-                dropped_frames += 1
-                consecutive_failures += 1
-                if consecutive_failures == 1:
-                    print("⚠️ Fallo al leer frame. Intentando recuperar...")
-                # Si falla demasiado, intentar reabrir cámara una vez
-                if consecutive_failures > 30:
-                    print("❗ Demasiados fallos consecutivos. Reintentando apertura de cámara...")
-                    camera.release()
-                    camera = _try_open_camera(chosen_index, use_dshow=(backend_used == "CAP_DSHOW"))
-                    if camera is None:
-                        print("❌ Reapertura falló. Terminando streaming.")
-                        break
-                    consecutive_failures = 0
-                time.sleep(0.01)
-                continue
-
-            consecutive_failures = 0
-
-            # Voltear para efecto espejo
-            frame = cv2.flip(frame, 1)
-
-            # Procesar
-            processed_frame = process_frame(frame)
-
-            # Codificar JPEG
-            ret, buffer = cv2.imencode('.jpg', processed_frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            if not ret:
-                print("⚠️ Fallo al codificar frame JPEG")
-                continue
-            frame_bytes = buffer.tobytes()
-
-            # Enviar frame
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-
-    except Exception as e:
-        print(f"❌ Error durante streaming: {e}")
-    finally:
-        camera.release()
+        if not success or frame is None:
+            ERRORS.labels(stage='capture').inc()
+            dropped_frames += 1
+            consecutive_failures += 1
+            if consecutive_failures == 1:
+                print("⚠️ Fallo al leer frame. Intentando recuperar...")
+            # Si falla demasiado, intentar reabrir cámara una vez
+            if consecutive_failures > 30:
+                print("❗ Demasiados fallos consecutivos. Reintentando apertura de cámara...")
+                camera.release()
+                camera = _try_open_camera(chosen_index, use_dshow=(backend_used == "CAP_DSHOW"))
+                if camera is None:
+                    raise EndOfStream("reapertura de la cámara falló")
+                consecutive_failures = 0
+            time.sleep(0.01)
+            return
+
+        consecutive_failures = 0
+        FRAMES.inc()
+
+        # Voltear para efecto espejo
+        frame = cv2.flip(frame, 1)
+
+        # Procesar (la inferencia corre en su propio hilo)
+        processed_frame = process_frame(frame, windows)
+
+        # Codificar JPEG (una vez por nivel de calidad en uso)
+        with STAGE_SERIALIZE.time():
+            encoded = ladder.wrap(processed_frame)
+        if encoded is None:
+            ERRORS.labels(stage='serialize').inc()
+            print("⚠️ Fallo al codificar frame JPEG")
+            return
+        broadcast.publish(encoded)
+
+    def release():
+        if camera is not None:
+            camera.release()
         print(f"📹 Cámara liberada. Frames descartados: {dropped_frames}")
 
+    # Cola de tamaño 1: el hilo de inferencia siempre toma la ventana más nueva
+    # y las que no alcanza a procesar se descartan; el video no lo espera
+    pipeline = StagedPipeline('camera')
+    windows = pipeline.queue('windows', maxsize=1)
+    pipeline.stage('camera', capture_and_process)
+    pipeline.stage('inference', predict_window, inbox=windows)
+    pipeline.on_stop(release)
+    return pipeline.start()
+
+
+# Un productor por cámara; cada /video_feed lee el último frame en su nivel de calidad
+camera_source = SharedSource('camera', start_camera,
+                             idle_timeout_s=float(os.getenv('CAMERA_IDLE_TIMEOUT_S', '5')))
+
+
+def generate_frames():
+    """Generador de frames para streaming de video (un visor del productor compartido)"""
+    for frame_bytes in ladder.stream(camera_source.frames(with_seq=True)):
+        # Enviar frame
+        yield (b'--frame\r\n'
+               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+
 
 @app.route('/')
 def index():
@@ -456,6 +631,12 @@ def video_feed():
     )
 
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Métricas en formato texto de Prometheus"""
+    return Response(metrics.render(), mimetype=METRICS_CONTENT_TYPE)
+
+
 if __name__ == '__main__':
     print("\n🚀 Iniciando servidor Flask...")
     print("📱 Presiona Ctrl+C para detener\n")
@@ -0,0 +1,328 @@
+"""
+Compresión del Modelo - SignBridge
+Destila best_model.keras (profesor: 2 × BiLSTM(160) + Dense(128)) en
+estudiantes más chicos y los exporta por el mismo camino que el servidor y
+la app móvil:
+
+- Estudiantes: menos unidades, una sola dirección, una o dos capas LSTM y,
+  opcionalmente, poda por magnitud de los kernels
+- Datos: secuencias grabadas (.npy/.npz) y/o sintéticas; las etiquetas son
+  las probabilidades del profesor suavizadas con temperatura
+- Exportación por estudiante: model.keras, model.tflite (convert_to_tflite),
+  labels.json (bundle compatible con model_registry) y, con --tfjs, el
+  conversor de convert_simple.py
+- Reporte: parámetros, tamaño en disco, latencia CPU (TFLite, batch 1) y
+  acuerdo top-1 con el profesor sobre secuencias no vistas en el entrenamiento
+
+Especificación de estudiantes (separados por coma):
+    lstm64          LSTM unidireccional de 64 unidades
+    bilstm96x2      dos BiLSTM de 96 unidades
+    lstm64-p50      LSTM de 64 con 50% de los kernels podados
+
+Uso:
+    python compress_model.py
+    python compress_model.py --students bilstm64x2,lstm96,lstm64-p50 --replay grabaciones/*.npy --tfjs
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import re
+import shutil
+import time
+
+import numpy as np
+
+from load_test import load_replay
+from model_registry import read_labels
+from precision_report import parity, throughput
+from synthetic_data import generate_mixed
+
+DEFAULT_STUDENTS = "bilstm64x2,bilstm64,lstm96,lstm64,lstm64-p50"
+_SPEC = re.compile(r"^(bi)?lstm(\d+)(?:x(\d+))?(?:-p(\d+))?$")
+
+
+# ============================================================================
+# ESTUDIANTES
+# ============================================================================
+
+def parse_student(spec):
+    """'bilstm64x2-p50' → dict con bidirectional, units, layers, sparsity"""
+    match = _SPEC.match(spec.strip().lower())
+    if not match:
+        raise ValueError(f"Estudiante inválido '{spec}'. Formato: [bi]lstm<unidades>[x<capas>][-p<poda %>]")
+    bidirectional, units, layers, sparsity = match.groups()
+    sparsity = int(sparsity or 0)
+    if not 0 <= sparsity < 100:
+        raise ValueError(f"Poda fuera de rango en '{spec}': debe ser 0-99%")
+    return {
+        "name": spec.strip().lower(),
+        "bidirectional": bool(bidirectional),
+        "units": int(units),
+        "layers": int(layers or 1),
+        "sparsity": sparsity / 100,
+    }
+
+
+def build_student(spec, input_shape, num_classes, dropout=0.2):
+    """
+    Misma estructura que el profesor en pequeño. Devuelve (modelo, logits):
+    el modelo termina en softmax (lo que esperan los servidores) y `logits`
+    se usa para entrenar con temperatura.
+    """
+    import tensorflow as tf
+    layers = tf.keras.layers
+
+    inputs = tf.keras.Input(shape=input_shape)
+    x = layers.Masking(mask_value=0.0)(inputs)
+    for i in range(spec["layers"]):
+        recurrent = layers.LSTM(spec["units"], return_sequences=i < spec["layers"] - 1)
+        x = layers.Bidirectional(recurrent)(x) if spec["bidirectional"] else recurrent(x)
+        x = layers.Dropout(dropout)(x)
+    x = layers.Dense(spec["units"], activation="relu")(x)
+    x = layers.Dropout(dropout)(x)
+    logits = layers.Dense(num_classes, name="logits")(x)
+    outputs = layers.Activation("softmax", name="probabilities")(logits)
+    return tf.keras.Model(inputs, outputs, name=f"student_{spec['name']}"), logits
+
+
+def soften(probabilities, temperature):
+    """Probabilidades del profesor a temperatura T: softmax(log(p) / T)"""
+    logits = np.log(np.clip(probabilities, 1e-8, 1.0)) / temperature
+    logits -= logits.max(axis=1, keepdims=True)
+    soft = np.exp(logits)
+    return (soft / soft.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+def _prunable(model):
+    """Kernels de LSTM y Dense (los bias no se podan)"""
+    return [w for w in model.trainable_weights if "kernel" in w.name]
+
+
+def make_pruning_callback(model, sparsity, ramp_epochs):
+    """
+    Poda por magnitud gradual: al inicio de cada época sube la fracción podada
+    hasta `sparsity` (en `ramp_epochs` épocas) y recalcula las máscaras; después
+    de cada lote vuelve a poner en cero los pesos podados.
+    """
+    import tensorflow as tf
+
+    weights = _prunable(model)
+
+    class MagnitudePruning(tf.keras.callbacks.Callback):
+        def __init__(self):
+            super().__init__()
+            self.masks = None
+
+        def on_epoch_begin(self, epoch, logs=None):
+            current = sparsity * min(1.0, (epoch + 1) / max(1, ramp_epochs))
+            self.masks = []
+            for w in weights:
+                magnitude = np.abs(w.numpy())
+                k = int(magnitude.size * current)
+                threshold = np.partition(magnitude, k, axis=None)[k] if k else -1.0
+                self.masks.append((magnitude > threshold).astype(w.dtype.as_numpy_dtype))
+            self._apply()
+
+        def on_train_batch_end(self, batch, logs=None):
+            self._apply()
+
+        def _apply(self):
+            for w, mask in zip(weights, self.masks):
+                w.assign(w.numpy() * mask)
+
+    return MagnitudePruning()
+
+
+def sparsity_of(model):
+    weights = [w.numpy() for w in _prunable(model)]
+    total = sum(w.size for w in weights)
+    return float(sum((w == 0).sum() for w in weights) / total) if total else 0.0
+
+
+def distill(student, logits, sequences, soft_targets, temperature, epochs, batch_size, callbacks=()):
+    """Entrena el estudiante para imitar las probabilidades suavizadas del profesor"""
+    import tensorflow as tf
+
+    tempered = tf.keras.layers.Activation("softmax")(
+        tf.keras.layers.Rescaling(1.0 / temperature)(logits))
+    trainer = tf.keras.Model(student.input, tempered)  # Comparte pesos con el estudiante
+    trainer.compile(optimizer=tf.keras.optimizers.Adam(1e-3), loss=tf.keras.losses.KLDivergence())
+    history = trainer.fit(sequences, soft_targets, epochs=epochs, batch_size=batch_size,
+                          validation_split=0.1, callbacks=list(callbacks), verbose=2)
+    return history.history["loss"][-1]
+
+
+# ============================================================================
+# EXPORTACIÓN Y MEDICIÓN
+# ============================================================================
+
+def export_student(model, output_dir, labels_path, tfjs=False):
+    """Bundle model.keras + model.tflite + labels.json (y tfjs/ opcional); devuelve rutas"""
+    from inference_engine import convert_to_tflite
+
+    os.makedirs(output_dir, exist_ok=True)
+    keras_path = os.path.join(output_dir, "model.keras")
+    tflite_path = os.path.join(output_dir, "model.tflite")
+    model.save(keras_path)
+    with open(tflite_path, "wb") as f:
+        f.write(convert_to_tflite(model))
+    shutil.copyfile(labels_path, os.path.join(output_dir, "labels.json"))
+
+    paths = {"keras": keras_path, "tflite": tflite_path}
+    if tfjs:
+        from convert_simple import convert_to_tfjs_manual, generate_metadata
+
+        tfjs_dir = os.path.join(output_dir, "tfjs")
+        if convert_to_tfjs_manual(model, tfjs_dir, model_path=keras_path):
+            generate_metadata(model, tfjs_dir)
+            paths["tfjs"] = tfjs_dir
+    return paths
+
+
+def file_sizes(paths):
+    """KB en disco por artefacto; el TFLite también comprimido (los pesos podados son ceros)"""
+    sizes = {}
+    for kind, path in paths.items():
+        if os.path.isdir(path):
+            sizes[f"{kind}_kb"] = sum(os.path.getsize(p) for p in glob.glob(os.path.join(path, "*"))) / 1024
+        else:
+            sizes[f"{kind}_kb"] = os.path.getsize(path) / 1024
+    with open(paths["tflite"], "rb") as f:
+        sizes["tflite_gzip_kb"] = len(gzip.compress(f.read())) / 1024
+    return sizes
+
+
+def measure(name, model, paths, teacher_engine, holdout, runs):
+    """Tamaño, latencia CPU del .tflite exportado y acuerdo con el profesor"""
+    from inference_engine import TFLiteEngine
+
+    engine = TFLiteEngine(tflite_path=paths["tflite"], num_threads=1)
+    latency = throughput(engine, holdout, 1, runs)
+    result = {
+        "name": name,
+        "params": int(model.count_params()),
+        "sparsity": sparsity_of(model),
+        **file_sizes(paths),
+        "latency_ms_batch1": latency["batch_ms"],
+        "throughput_batch32": throughput(engine, holdout, 32, runs)["sequences_per_s"],
+    }
+    agreement = parity(teacher_engine, engine, holdout)
+    result["top1_agreement"] = agreement["top1_agreement"]
+    result["mean_prob_delta"] = agreement["mean_prob_delta"]
+    return result
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def load_sequences(args):
+    """Secuencias grabadas (--replay) más `--synthetic` sintéticas, mezcladas"""
+    parts = []
+    for pattern in args.replay or ():
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            parts.append(load_replay(path))
+    if args.synthetic or not parts:
+        synthetic, _ = generate_mixed(args.synthetic or 20000, rng=args.seed)
+        parts.append(synthetic)
+    sequences = np.concatenate(parts)
+    return sequences[np.random.default_rng(args.seed).permutation(len(sequences))]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="SignBridge knowledge distillation and pruning")
+    parser.add_argument("--model", default="best_model.keras", help="Profesor")
+    parser.add_argument("--labels", default="labels.json")
+    parser.add_argument("--students", default=DEFAULT_STUDENTS)
+    parser.add_argument("--replay", nargs="*", help="Secuencias grabadas .npy/.npz (N, 24, 126) o (T, 126)")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Secuencias sintéticas extra (default: 20000 si no hay --replay)")
+    parser.add_argument("--holdout", type=float, default=0.1, help="Fracción reservada para medir acuerdo")
+    parser.add_argument("--temperature", type=float, default=4.0)
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--prune-epochs", type=int, default=5, help="Ajuste fino con poda gradual")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--runs", type=int, default=50, help="Repeticiones para la latencia")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tfjs", action="store_true", help="Exportar también a TensorFlow.js")
+    parser.add_argument("--output", default="compressed")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    specs = [parse_student(spec) for spec in args.students.split(",") if spec.strip()]
+    import tensorflow as tf
+    from inference_engine import TFFunctionEngine, convert_to_tflite
+
+    print("🗜️  SignBridge - Compresión del modelo")
+    print("=" * 70)
+    tf.keras.utils.set_random_seed(args.seed)
+    teacher = tf.keras.models.load_model(args.model)
+    labels = read_labels(args.labels)
+    print(f"🧑‍🏫 Profesor: {args.model} ({teacher.count_params():,} parámetros)")
+
+    sequences = load_sequences(args)
+    split = int(len(sequences) * (1 - args.holdout))
+    train, holdout = sequences[:split], sequences[split:]
+    print(f"📊 {len(train):,} secuencias de entrenamiento, {len(holdout):,} reservadas")
+
+    teacher_engine = TFFunctionEngine(teacher)
+    teacher_probs = np.concatenate([
+        teacher_engine.infer(train[start:start + 1024]) for start in range(0, len(train), 1024)
+    ])
+    soft_targets = soften(teacher_probs, args.temperature)
+
+    # Línea base: el profesor exportado por el mismo camino
+    os.makedirs(args.output, exist_ok=True)
+    teacher_tflite = os.path.join(args.output, "teacher.tflite")
+    with open(teacher_tflite, "wb") as f:
+        f.write(convert_to_tflite(teacher))
+    teacher_paths = {"keras": args.model, "tflite": teacher_tflite}
+    results = [measure("teacher", teacher, teacher_paths, teacher_engine, holdout, args.runs)]
+
+    for spec in specs:
+        print(f"\n🎓 Estudiante {spec['name']}")
+        print("-" * 70)
+        student, logits = build_student(spec, teacher.input_shape[1:], teacher.output_shape[-1])
+        start = time.perf_counter()
+        loss = distill(student, logits, train, soft_targets, args.temperature, args.epochs, args.batch_size)
+        if spec["sparsity"]:
+            pruning = make_pruning_callback(student, spec["sparsity"], max(1, args.prune_epochs - 1))
+            loss = distill(student, logits, train, soft_targets, args.temperature,
+                           args.prune_epochs, args.batch_size, callbacks=[pruning])
+        train_s = time.perf_counter() - start
+
+        paths = export_student(student, os.path.join(args.output, spec["name"]), args.labels, args.tfjs)
+        result = measure(spec["name"], student, paths, teacher_engine, holdout, args.runs)
+        result.update(spec=spec, distill_loss=float(loss), train_s=train_s)
+        results.append(result)
+        print(f"✅ {result['params']:,} parámetros · acuerdo top-1 {result['top1_agreement'] * 100:.2f}%")
+
+    print("\n" + "=" * 70)
+    print(f"{'modelo':<14} {'params':>10} {'tflite KB':>10} {'gzip KB':>9} {'ms (b=1)':>9} {'top-1':>8}")
+    for r in results:
+        print(f"{r['name']:<14} {r['params']:>10,} {r['tflite_kb']:>10,.0f} {r['tflite_gzip_kb']:>9,.0f} "
+              f"{r['latency_ms_batch1']:>9.2f} {r['top1_agreement'] * 100:>7.2f}%")
+
+    report_path = os.path.join(args.output, "report.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "teacher": args.model,
+            "labels": len(labels),
+            "train_sequences": len(train),
+            "holdout_sequences": len(holdout),
+            "replay": args.replay or [],
+            "temperature": args.temperature,
+            "epochs": args.epochs,
+            "results": results,
+        }, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Reporte: {report_path}")
+    print(f"📦 Cada estudiante en {args.output}/<nombre>/ es un bundle para MODEL_REGISTRY_DIR")
+
+
+if __name__ == "__main__":
+    main()
@@ -59,10 +59,12 @@ def test_inference(model):
     print(f"   Confianza: {prediction[0][np.argmax(prediction[0])]:.4f}")
 
 
-def convert_to_tfjs_manual(model, output_dir):
+def convert_to_tfjs_manual(model, output_dir, model_path=MODEL_INPUT):
     """
     Conversión manual usando solo TensorFlow
     Evita problemas con tensorflow_decision_forests
+
+    model_path: archivo .keras que convierte el subproceso (default: MODEL_INPUT)
     """
     print(f"\n🔄 Convirtiendo a TensorFlow.js...")
     
@@ -101,7 +103,7 @@ keras_h5_conversion.save_keras_model(
 )
 print("✅ Conversión exitosa")
         """,
-        MODEL_INPUT,
+        str(model_path),
         str(output_path.absolute())
     ]
     
@@ -0,0 +1,164 @@
+"""
+Reporte de Delta Gating - SignBridge
+Reproduce streams grabados (T, 126) con el mismo stride que los servidores de
+cámara y, para cada umbral, mide cuántas inferencias ahorra DeltaGate y cuánto
+se aparta del resultado de inferir siempre:
+
+- reuse_rate: fracción de ventanas respondidas con probabilidades reutilizadas
+- top1_agreement: acuerdo top-1 con la inferencia completa de cada ventana
+- mean_prob_delta: diferencia absoluta media de probabilidades
+- Distribución de distancias entre ventanas, para elegir DELTA_THRESHOLD
+
+Uso:
+    python delta_report.py grabacion.npy
+    python delta_report.py sesiones.npz --thresholds 0.002,0.005,0.01 --max-stale 4 --stride 5
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from gating import DeltaGate, hand_frames, window_distance
+from synthetic_data import generate_batch
+from timeline import sliding_windows
+
+NUM_FRAMES = 24
+# Patrones con geometría de mano: poses sostenidas y movimientos
+SYNTHETIC_PATTERNS = ("hand_static", "move_right", "hand_static", "open_close", "move_up")
+
+
+def load_streams(paths):
+    """[(nombre, (T, 126))] desde .npy o cada array de un .npz"""
+    streams = []
+    for path in paths:
+        data = np.load(path)
+        arrays = [(f"{path}:{key}", data[key]) for key in data.files] if path.endswith('.npz') else [(path, data)]
+        for name, array in arrays:
+            if array.ndim != 2 or array.shape[1] != 126:
+                raise SystemExit(f"❌ {name}: se esperaba un stream (T, 126), recibido {array.shape}")
+            streams.append((name, np.asarray(array, dtype=np.float32)))
+    return streams
+
+
+def synthetic_stream(repeats=4, seed=0):
+    """Stream (T, 126) que alterna poses sostenidas y movimientos de synthetic_data"""
+    rng = np.random.default_rng(seed)
+    chunks = [generate_batch(pattern, 1, rng, NUM_FRAMES * 2)[0]
+              for _ in range(repeats) for pattern in SYNTHETIC_PATTERNS]
+    return np.concatenate(chunks)
+
+
+def infer_windows(engine, windows, batch_size=256):
+    """Probabilidades de inferir siempre (referencia)"""
+    return np.concatenate([
+        engine.infer(np.ascontiguousarray(windows[start:start + batch_size]))
+        for start in range(0, len(windows), batch_size)
+    ])
+
+
+def simulate(windows, probabilities, threshold, max_stale, min_hand_frames=1):
+    """
+    Aplica DeltaGate ventana por ventana sobre probabilidades ya calculadas.
+    Las ventanas sin manos no cuentan (las resuelve HandPresenceGate).
+    """
+    gate = DeltaGate(threshold, max_stale)
+    has_hands = hand_frames(windows) >= min_hand_frames
+    served = np.empty_like(probabilities)
+    for i, window in enumerate(windows):
+        if not has_hands[i]:
+            gate.reset()
+            served[i] = probabilities[i]
+            continue
+        reused, _ = gate.check(window)
+        if reused is None:
+            gate.update(window, probabilities[i])
+            served[i] = probabilities[i]
+        else:
+            served[i] = reused
+
+    evaluated = has_hands.sum()
+    agree = np.argmax(served, axis=1) == np.argmax(probabilities, axis=1)
+    stats = gate.stats()
+    return {
+        "threshold": threshold,
+        "windows": int(evaluated),
+        "reused": stats["reused"],
+        "forced": stats["forced"],
+        "reuse_rate": stats["reused"] / evaluated if evaluated else 0.0,
+        "top1_agreement": float(agree[has_hands].mean()) if evaluated else 1.0,
+        "mean_prob_delta": float(np.abs(served - probabilities)[has_hands].mean()) if evaluated else 0.0,
+    }
+
+
+def consecutive_distances(windows):
+    """Distancia de cada ventana a la anterior (sin gating)"""
+    return np.array([window_distance(windows[i], windows[i - 1]) for i in range(1, len(windows))])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="SignBridge delta gating: reuse rate vs accuracy")
+    parser.add_argument("streams", nargs='*', help="Streams grabados (T, 126) en .npy/.npz; default: sintético")
+    parser.add_argument("--model", default="best_model.keras")
+    parser.add_argument("--backend", help="keras | function | tflite | auto (default: SIGNBRIDGE_ENGINE)")
+    parser.add_argument("--stride", type=int, default=5, help="Frames entre ventanas (camera_server: 5)")
+    parser.add_argument("--thresholds", default="0.001,0.002,0.005,0.01,0.02,0.05")
+    parser.add_argument("--max-stale", type=int, default=4)
+    parser.add_argument("--output", default="delta_report.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    from inference_engine import load_engine
+
+    print("🔁 SignBridge - Reporte de delta gating")
+    print("=" * 70)
+    streams = load_streams(args.streams) if args.streams else [("synthetic", synthetic_stream())]
+    # Ventanas por stream: la referencia del gate no cruza de una grabación a otra
+    windows = [sliding_windows(stream, NUM_FRAMES, args.stride) for _, stream in streams]
+    print(f"📊 {len(streams)} streams, {sum(len(w) for w in windows)} ventanas (stride {args.stride})")
+
+    engine = load_engine(args.model, args.backend)
+    print(f"🧠 Modelo: {args.model} (backend: {engine.name})")
+    probabilities = [infer_windows(engine, w) for w in windows]
+
+    distances = np.concatenate([consecutive_distances(w) for w in windows])
+    report = {
+        "model": args.model,
+        "streams": [name for name, _ in streams],
+        "stride": args.stride,
+        "max_stale": args.max_stale,
+        "distance_percentiles": {
+            str(p): float(np.percentile(distances, p)) for p in (10, 25, 50, 75, 90)
+        } if len(distances) else {},
+        "thresholds": [],
+    }
+    if report["distance_percentiles"]:
+        print("📏 Distancia entre ventanas consecutivas: " + " · ".join(
+            f"p{p} {value:.4f}" for p, value in report["distance_percentiles"].items()))
+
+    print(f"\n{'umbral':>8} {'reuso':>8} {'forzadas':>9} {'top-1':>8} {'Δ prob':>9}")
+    for threshold in (float(t) for t in args.thresholds.split(',') if t.strip()):
+        results = [simulate(w, p, threshold, args.max_stale) for w, p in zip(windows, probabilities)]
+        total = sum(r["windows"] for r in results) or 1
+        result = {
+            "threshold": threshold,
+            "windows": sum(r["windows"] for r in results),
+            "reused": sum(r["reused"] for r in results),
+            "forced": sum(r["forced"] for r in results),
+            "top1_agreement": sum(r["top1_agreement"] * r["windows"] for r in results) / total,
+            "mean_prob_delta": sum(r["mean_prob_delta"] * r["windows"] for r in results) / total,
+        }
+        result["reuse_rate"] = result["reused"] / total
+        report["thresholds"].append(result)
+        print(f"{threshold:>8.4f} {result['reuse_rate'] * 100:>7.1f}% {result['forced']:>9} "
+              f"{result['top1_agreement'] * 100:>7.2f}% {result['mean_prob_delta']:>9.5f}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Reporte: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,19 @@ Muestra el modelo haciendo predicciones en tiempo real
 
 import json
 import numpy as np
-import tensorflow as tf
 import time
 
+from inference_engine import load_engine
+from synthetic_data import generate_batch, generate_sequence
+
 print("=" * 80)
 print("🚀 DEMO INTERACTIVO - MODELO LSTM SIGNBRIDGE")
 print("=" * 80)
 
 # Cargar modelo
 print("\n🧠 Cargando modelo...")
-model = tf.keras.models.load_model("best_model.keras")
-print("✅ Modelo cargado")
+engine = load_engine("best_model.keras")
+print(f"✅ Modelo cargado (backend: {engine.name})")
 
 # Cargar etiquetas
 with open("labels.json", 'r', encoding='utf-8') as f:
@@ -24,79 +26,8 @@ with open("labels.json", 'r', encoding='utf-8') as f:
 
 print(f"📋 {len(labels)} clases cargadas")
 
-# ============================================================================
-# FUNCIÓN PARA GENERAR DATOS SIMULADOS
-# ============================================================================
-
-def generar_patron_mano(tipo="estatico", frame_idx=0, total_frames=24):
-    """
-    Genera un patrón de landmarks de mano simulado
-    
-    tipo:
-    - "estatico": mano quieta en el centro
-    - "movimiento_derecha": mano moviendose a la derecha
-    - "movimiento_arriba": mano moviendose hacia arriba
-    - "cerrar_abrir": simula abrir y cerrar la mano
-    """
-    landmarks = np.zeros(63)  # 21 landmarks × 3 coords
-    
-    # Posición base de la muñeca
-    base_x = 0.5
-    base_y = 0.5
-    base_z = 0.0
-    
-    if tipo == "movimiento_derecha":
-        # Movimiento horizontal
-        base_x = 0.3 + (frame_idx / total_frames) * 0.4
-        
-    elif tipo == "movimiento_arriba":
-        # Movimiento vertical
-        base_y = 0.7 - (frame_idx / total_frames) * 0.4
-        
-    elif tipo == "cerrar_abrir":
-        # Simula abrir y cerrar la mano
-        progress = (frame_idx / total_frames) * 2 * np.pi
-        spread = 0.05 + 0.03 * np.sin(progress)
-    else:
-        spread = 0.05
-    
-    # Generar 21 landmarks con posiciones relativas realistas
-    for i in range(21):
-        # Muñeca (0) en el centro
-        if i == 0:
-            landmarks[i*3] = base_x
-            landmarks[i*3 + 1] = base_y
-            landmarks[i*3 + 2] = base_z
-        else:
-            # Otros landmarks dispersos alrededor
-            angle = (i / 21) * 2 * np.pi
-            if tipo == "cerrar_abrir":
-                dist = spread
-            else:
-                dist = 0.05 + (i % 4) * 0.02
-            
-            landmarks[i*3] = base_x + np.cos(angle) * dist
-            landmarks[i*3 + 1] = base_y + np.sin(angle) * dist
-            landmarks[i*3 + 2] = base_z + np.random.uniform(-0.02, 0.02)
-    
-    return landmarks
-
-
-def generar_secuencia(tipo="estatico"):
-    """Genera una secuencia completa de 24 frames"""
-    frames = []
-    for i in range(24):
-        # Mano izquierda
-        left_hand = generar_patron_mano(tipo, i, 24)
-        # Mano derecha (similar pero con offset)
-        right_hand = generar_patron_mano(tipo, i, 24)
-        right_hand[::3] += 0.1  # Offset en X
-        
-        # Combinar ambas manos (126 features)
-        frame = np.concatenate([left_hand, right_hand])
-        frames.append(frame)
-    
-    return np.array(frames)
+# Datos simulados vectorizados (ver synthetic_data.py); semilla fija para repetir la demo
+rng = np.random.default_rng(42)
 
 
 # ============================================================================
@@ -118,7 +49,7 @@ def predecir_y_mostrar(secuencia, nombre_patron):
     # Predicción
     print(f"⚙️  Ejecutando modelo...", end=" ")
     start_time = time.time()
-    prediction = model.predict(input_data, verbose=0)
+    prediction = engine.infer(input_data)
     inference_time = (time.time() - start_time) * 1000
     print(f"✓ ({inference_time:.1f}ms)")
     
@@ -177,35 +108,35 @@ print("=" * 80)
 
 # Demo 1: Mano estática
 print("\n🖐️  DEMO 1: Mano estática (simulando número '1')")
-seq1 = generar_secuencia("estatico")
+seq1 = generate_sequence("hand_static", rng)
 predecir_y_mostrar(seq1, "Mano estática en el centro")
 
 time.sleep(1)
 
 # Demo 2: Movimiento horizontal
 print("\n👉 DEMO 2: Movimiento horizontal (simulando 'a la derecha')")
-seq2 = generar_secuencia("movimiento_derecha")
+seq2 = generate_sequence("move_right", rng)
 predecir_y_mostrar(seq2, "Movimiento hacia la derecha")
 
 time.sleep(1)
 
 # Demo 3: Movimiento vertical
 print("\n👆 DEMO 3: Movimiento vertical (simulando gesto hacia arriba)")
-seq3 = generar_secuencia("movimiento_arriba")
+seq3 = generate_sequence("move_up", rng)
 predecir_y_mostrar(seq3, "Movimiento hacia arriba")
 
 time.sleep(1)
 
 # Demo 4: Abrir y cerrar
 print("\n✊✋ DEMO 4: Abrir y cerrar mano (simulando señal dinámica)")
-seq4 = generar_secuencia("cerrar_abrir")
+seq4 = generate_sequence("open_close", rng)
 predecir_y_mostrar(seq4, "Abrir y cerrar la mano")
 
 time.sleep(1)
 
 # Demo 5: Datos completamente aleatorios
 print("\n🎲 DEMO 5: Datos aleatorios (ruido)")
-seq5 = np.random.rand(24, 126).astype(np.float32)
+seq5 = generate_sequence("random", rng)
 predecir_y_mostrar(seq5, "Datos completamente aleatorios")
 
 # ============================================================================
@@ -218,12 +149,9 @@ print("=" * 80)
 
 print("\n🔄 Generando 20 muestras aleatorias y analizando predicciones...")
 
-predicciones_totales = np.zeros(len(labels))
-
-for i in range(20):
-    sample = np.random.rand(1, 24, 126).astype(np.float32)
-    pred = model.predict(sample, verbose=0)
-    predicciones_totales += pred[0]
+# Las 20 muestras en un solo lote: una llamada al modelo
+samples = generate_batch("random", 20, rng)
+predicciones_totales = engine.infer(samples).sum(axis=0)
 
 # Top 10 clases más predichas
 top_10_idx = np.argsort(predicciones_totales)[-10:][::-1]
@@ -0,0 +1,170 @@
+"""
+Gating de inferencias - SignBridge
+- Presencia de manos: un frame sin manos detectadas llega como 126 ceros. Si
+  una ventana tiene menos de `min_hand_frames` frames con alguna mano, se
+  responde "sin seña" sin llamar al modelo.
+- Delta: ventanas consecutivas comparten 23 de 24 frames. Si la ventana nueva
+  casi no cambió respecto a la última inferida, se reutilizan sus
+  probabilidades (hasta `max_stale` veces seguidas).
+"""
+
+import threading
+
+import numpy as np
+
+NO_SIGN_LABEL = "Sin seña"
+
+
+def hand_frames(windows):
+    """(..., F, 126) → (...,) cantidad de frames con al menos un valor distinto de cero"""
+    return np.count_nonzero(np.any(np.asarray(windows) != 0, axis=-1), axis=-1)
+
+
+class HandPresenceGate:
+    """
+    Decide si una ventana merece inferencia y cuenta las inferencias ahorradas.
+
+    min_hand_frames: frames con mano necesarios (1 = solo se omiten ventanas vacías,
+    0 = gating desactivado)
+    """
+
+    def __init__(self, min_hand_frames=1):
+        self.min_hand_frames = int(min_hand_frames)
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.skipped = 0
+        # Resultado "sin seña" armado una sola vez; se entregan copias
+        self._no_sign = {
+            'predicted_class': NO_SIGN_LABEL,
+            'confidence': 0.0,
+            'inference_time_ms': 0.0,
+            'top_5': [],
+            'no_sign': True,
+        }
+
+    @property
+    def enabled(self):
+        return self.min_hand_frames > 0
+
+    def mask(self, windows):
+        """(N, F, 126) → (N,) bool, True = ejecutar el modelo"""
+        windows = np.asarray(windows)
+        if not self.enabled:
+            return np.ones(len(windows), dtype=bool)
+        keep = hand_frames(windows) >= self.min_hand_frames
+        skipped = int(len(keep) - np.count_nonzero(keep))
+        with self._lock:
+            self.checked += len(keep)
+            self.skipped += skipped
+        return keep
+
+    def check(self, window):
+        """(allowed, frames con mano) para una ventana (F, 126)"""
+        if not self.enabled:
+            return True, None
+        count = int(hand_frames(window))
+        allowed = count >= self.min_hand_frames
+        with self._lock:
+            self.checked += 1
+            if not allowed:
+                self.skipped += 1
+        return allowed, count
+
+    def no_sign_result(self, hand_frame_count=None, extra=None):
+        result = dict(self._no_sign)
+        if hand_frame_count is not None:
+            result['hand_frames'] = hand_frame_count
+        if extra:
+            result.update(extra)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'min_hand_frames': self.min_hand_frames,
+                'checked': self.checked,
+                'skipped': self.skipped,
+                'skip_rate': (self.skipped / self.checked) if self.checked else 0.0,
+            }
+
+
+def window_distance(window, reference):
+    """
+    Distancia entre dos ventanas (F, 126): el mayor, entre frames, del cambio
+    absoluto medio de sus landmarks. Una mano que aparece o desaparece cuenta
+    como un cambio grande.
+    """
+    return float(np.abs(np.asarray(window) - reference).mean(axis=-1).max())
+
+
+class DeltaGate:
+    """
+    Reutiliza las últimas probabilidades mientras la ventana se mantenga a
+    menos de `threshold` de la última ventana inferida.
+
+    threshold: distancia máxima para reutilizar (0 = gating desactivado)
+    max_stale: reutilizaciones seguidas permitidas antes de forzar una inferencia
+    """
+
+    def __init__(self, threshold=0.0, max_stale=4):
+        self.threshold = float(threshold)
+        self.max_stale = int(max_stale)
+        self._lock = threading.Lock()
+        self._reference = None
+        self._probabilities = None
+        self._stale = 0
+        self.checked = 0
+        self.reused = 0
+        self.forced = 0  # Inferencias forzadas por max_stale
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def check(self, window):
+        """
+        (probabilidades a reutilizar o None, distancia) para una ventana (F, 126).
+        None = hay que inferir y luego llamar a update().
+        """
+        if not self.enabled:
+            return None, None
+        with self._lock:
+            self.checked += 1
+            if self._reference is None:
+                return None, None
+            distance = window_distance(window, self._reference)
+            if distance >= self.threshold:
+                return None, distance
+            if self._stale >= self.max_stale:
+                self.forced += 1
+                return None, distance
+            self._stale += 1
+            self.reused += 1
+            return self._probabilities, distance
+
+    def update(self, window, probabilities):
+        """Registra la ventana recién inferida como nueva referencia"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._reference = np.array(window, dtype=np.float32)
+            self._probabilities = probabilities
+            self._stale = 0
+
+    def reset(self):
+        """Descarta la referencia (p. ej. tras un resultado "sin seña")"""
+        with self._lock:
+            self._reference = None
+            self._probabilities = None
+            self._stale = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'threshold': self.threshold,
+                'max_stale': self.max_stale,
+                'checked': self.checked,
+                'reused': self.reused,
+                'forced': self.forced,
+                'reuse_rate': (self.reused / self.checked) if self.checked else 0.0,
+            }
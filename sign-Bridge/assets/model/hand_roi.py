@@ -0,0 +1,125 @@
+"""
+Región de procesamiento para MediaPipe - SignBridge
+Lo que recibe hands.process() se configura aparte de lo que se muestra:
+
+- Resolución de procesamiento: la región se reduce a `process_width` píxeles
+  de ancho (0 = sin reducir), manteniendo la proporción
+- Modo ROI: se recorta alrededor de las manos del frame anterior (unión de
+  sus cajas + margen); sin manos, o cada `redetect_every` frames, se vuelve
+  al frame completo para re-detectar
+
+to_full_frame() lleva los landmarks de vuelta a coordenadas normalizadas del
+frame completo, así los 126 features que espera el LSTM no cambian.
+"""
+
+import os
+import threading
+
+import cv2
+
+
+class HandRegion:
+    """prepare(frame) → RGB para MediaPipe; to_full_frame(results) corrige los landmarks"""
+
+    def __init__(self, process_width=0, roi=False, margin=0.3, redetect_every=30, min_fraction=0.25):
+        self.process_width = int(process_width)
+        self.roi = bool(roi)
+        self.margin = float(margin)
+        self.redetect_every = max(1, int(redetect_every))
+        self.min_fraction = float(min_fraction)  # Lado mínimo del recorte (fracción del frame)
+        self._lock = threading.Lock()
+        self._next_box = None  # (x0, y0, x1, y1) normalizado para el próximo frame
+        self._region = (0.0, 0.0, 1.0, 1.0)  # (x0, y0, ancho, alto) del frame actual
+        self._since_full = 0
+        self.full_frames = 0
+        self.roi_frames = 0
+        self._pixel_fraction_sum = 0.0
+
+    def reset(self):
+        """Olvida el recorte anterior (nueva sesión de cámara)"""
+        self._next_box = None
+        self._since_full = 0
+
+    def prepare(self, frame):
+        """Recorte (si corresponde), reducción y BGR → RGB del frame de cámara"""
+        height, width = frame.shape[:2]
+        box = None
+        if self.roi and self._next_box is not None and self._since_full < self.redetect_every:
+            box = self._next_box
+
+        if box is None:
+            x0, y0, x1, y1 = 0, 0, width, height
+            self._since_full = 0
+        else:
+            x0, y0 = int(box[0] * width), int(box[1] * height)
+            x1, y1 = max(x0 + 1, int(box[2] * width)), max(y0 + 1, int(box[3] * height))
+            self._since_full += 1
+        self._region = (x0 / width, y0 / height, (x1 - x0) / width, (y1 - y0) / height)
+
+        region = frame[y0:y1, x0:x1]
+        if self.process_width and region.shape[1] > self.process_width:
+            scale = self.process_width / region.shape[1]
+            region = cv2.resize(region, (self.process_width, max(1, int(region.shape[0] * scale))),
+                                interpolation=cv2.INTER_AREA)
+
+        with self._lock:
+            if box is None:
+                self.full_frames += 1
+            else:
+                self.roi_frames += 1
+            self._pixel_fraction_sum += region.shape[0] * region.shape[1] / (width * height)
+        return cv2.cvtColor(region, cv2.COLOR_BGR2RGB)
+
+    def to_full_frame(self, results):
+        """
+        Reescribe en el lugar los landmarks de `results` a coordenadas normalizadas
+        del frame completo y calcula el recorte del próximo frame.
+        """
+        rx, ry, rw, rh = self._region
+        hands = results.multi_hand_landmarks or []
+        for hand_landmarks in hands:
+            for landmark in hand_landmarks.landmark:
+                landmark.x = rx + landmark.x * rw
+                landmark.y = ry + landmark.y * rh
+                landmark.z = landmark.z * rw  # z usa la misma escala que x
+
+        if not self.roi:
+            return results
+        if not hands:
+            self._next_box = None  # Re-detectar en el frame completo
+            return results
+
+        xs = [lm.x for hand in hands for lm in hand.landmark]
+        ys = [lm.y for hand in hands for lm in hand.landmark]
+        self._next_box = self._expand(min(xs), min(ys), max(xs), max(ys))
+        return results
+
+    def _expand(self, x0, y0, x1, y1):
+        """Caja con margen y lado mínimo, recortada a [0, 1]"""
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        half_w = max((x1 - x0) * (1 + 2 * self.margin), self.min_fraction) / 2
+        half_h = max((y1 - y0) * (1 + 2 * self.margin), self.min_fraction) / 2
+        return (max(0.0, cx - half_w), max(0.0, cy - half_h),
+                min(1.0, cx + half_w), min(1.0, cy + half_h))
+
+    def stats(self):
+        with self._lock:
+            frames = self.full_frames + self.roi_frames
+            return {
+                'process_width': self.process_width,
+                'roi': self.roi,
+                'full_frames': self.full_frames,
+                'roi_frames': self.roi_frames,
+                # Píxeles que recibe MediaPipe respecto al frame de cámara (promedio)
+                'pixel_fraction': (self._pixel_fraction_sum / frames) if frames else 1.0,
+            }
+
+
+def region_from_env():
+    """HandRegion con PROCESS_WIDTH, HAND_ROI, ROI_MARGIN y ROI_REDETECT_EVERY"""
+    return HandRegion(
+        process_width=int(os.getenv('PROCESS_WIDTH', '0')),
+        roi=os.getenv('HAND_ROI', '0') == '1',
+        margin=float(os.getenv('ROI_MARGIN', '0.3')),
+        redetect_every=int(os.getenv('ROI_REDETECT_EVERY', '30')),
+    )
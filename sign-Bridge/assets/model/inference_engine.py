@@ -0,0 +1,405 @@
+"""
+Motor de Inferencia Intercambiable - SignBridge
+Un solo contrato `infer(batch) -> probs` con varios backends elegibles al inicio:
+
+- keras:    model.predict (comportamiento original)
+- function: llamada directa a un tf.function trazado (sin overhead de predict)
+- tflite:   tf.lite.Interpreter con XNNPACK
+- bf16:     entrada float16 y cómputo bfloat16 (float32 si la CPU no lo soporta)
+- auto:     mide keras/function/tflite y se queda con el más rápido
+
+El backend se elige con la variable de entorno SIGNBRIDGE_ENGINE, así todos los
+scripts cambian de ruta de inferencia sin modificar código.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_MODEL_PATH = "best_model.keras"
+ENGINE_ENV = "SIGNBRIDGE_ENGINE"
+TFLITE_THREADS_ENV = "SIGNBRIDGE_TFLITE_THREADS"
+BACKENDS = ("keras", "function", "tflite")
+BF16_ENV = "SIGNBRIDGE_BF16"  # "1" fuerza bfloat16, "0" lo desactiva; default: detectar CPU
+
+
+# ============================================================================
+# CONTADORES DE LATENCIA
+# ============================================================================
+
+class LatencyStats:
+    """Contadores de latencia por backend (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.samples = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    def record(self, elapsed_ms, batch_size):
+        with self._lock:
+            self.calls += 1
+            self.samples += batch_size
+            self.total_ms += elapsed_ms
+            self.last_ms = elapsed_ms
+            if self.min_ms is None or elapsed_ms < self.min_ms:
+                self.min_ms = elapsed_ms
+            if elapsed_ms > self.max_ms:
+                self.max_ms = elapsed_ms
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "samples": self.samples,
+                "avg_ms": (self.total_ms / self.calls) if self.calls else 0.0,
+                "avg_ms_per_sample": (self.total_ms / self.samples) if self.samples else 0.0,
+                "min_ms": self.min_ms or 0.0,
+                "max_ms": self.max_ms,
+                "last_ms": self.last_ms,
+            }
+
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+class InferenceEngine:
+    """
+    Interfaz común de inferencia.
+
+    infer(batch): batch (N, 24, 126) → probabilidades (N, num_classes) como np.ndarray
+    """
+
+    name = "base"
+    input_dtype = np.float32
+
+    def __init__(self, model=None):
+        self.model = model  # Modelo Keras original (None si se cargó un .tflite)
+        self.latency = LatencyStats()
+
+    @property
+    def input_shape(self):
+        return tuple(self.model.input_shape)
+
+    @property
+    def output_shape(self):
+        return tuple(self.model.output_shape)
+
+    @property
+    def num_classes(self):
+        return int(self.output_shape[-1])
+
+    def infer(self, batch):
+        batch = np.asarray(batch, dtype=self.input_dtype)
+        if batch.ndim == 2:
+            batch = batch[np.newaxis]
+        start = time.perf_counter()
+        probs = self._infer(batch)
+        self.latency.record((time.perf_counter() - start) * 1000, len(batch))
+        return probs
+
+    def _infer(self, batch):
+        raise NotImplementedError
+
+    def describe(self):
+        return {
+            "backend": self.name,
+            "input_shape": list(self.input_shape),
+            "num_classes": self.num_classes,
+            "latency": self.latency.as_dict(),
+        }
+
+
+class KerasPredictEngine(InferenceEngine):
+    """model.predict: el camino original, con su overhead por llamada"""
+
+    name = "keras"
+
+    def _infer(self, batch):
+        return self.model.predict(batch, verbose=0)
+
+
+class TFFunctionEngine(InferenceEngine):
+    """tf.function trazado una vez con batch dinámico; evita el bucle de predict"""
+
+    name = "function"
+
+    def __init__(self, model):
+        super().__init__(model)
+        import tensorflow as tf
+
+        spec = tf.TensorSpec([None] + list(model.input_shape[1:]), tf.float32)
+        self._fn = tf.function(lambda x: model(x, training=False), input_signature=[spec])
+
+    def _infer(self, batch):
+        return self._fn(batch).numpy()
+
+
+class TFLiteEngine(InferenceEngine):
+    """
+    tf.lite.Interpreter (XNNPACK se aplica por defecto en modelos float32).
+
+    Se construye desde un modelo Keras (conversión en memoria) o desde un
+    archivo .tflite; en este último caso el intérprete mapea el archivo en memoria.
+    """
+
+    name = "tflite"
+
+    def __init__(self, model=None, tflite_path=None, num_threads=None):
+        super().__init__(model)
+        if num_threads is None:
+            num_threads = int(os.getenv(TFLITE_THREADS_ENV, str(os.cpu_count() or 1)))
+        self.num_threads = num_threads
+        self.tflite_path = tflite_path
+
+        if tflite_path is not None:
+            self._interpreter = _open_tflite(tflite_path, num_threads)
+        else:
+            Interpreter = _tflite_interpreter_class()
+            self._interpreter = Interpreter(model_content=convert_to_tflite(model), num_threads=num_threads)
+
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size = None
+        # El intérprete no es thread-safe
+        self._lock = threading.Lock()
+
+    @property
+    def input_shape(self):
+        return (None,) + tuple(int(d) for d in self._input["shape"][1:])
+
+    @property
+    def output_shape(self):
+        return (None,) + tuple(int(d) for d in self._output["shape"][1:])
+
+    def _infer(self, batch):
+        with self._lock:
+            if self._batch_size != len(batch):
+                self._interpreter.resize_tensor_input(self._input["index"], list(batch.shape))
+                self._interpreter.allocate_tensors()
+                self._batch_size = len(batch)
+            self._interpreter.set_tensor(self._input["index"], batch)
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output["index"]).copy()
+
+
+def bfloat16_supported():
+    """True si la CPU tiene instrucciones bfloat16 (AVX512_BF16 / AMX); sin ellas es más lento"""
+    forced = os.getenv(BF16_ENV)
+    if forced in ("0", "1"):
+        return forced == "1"
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+class ReducedPrecisionEngine(InferenceEngine):
+    """
+    Entrada float16 (mitad de memoria por lote) y LSTM con política
+    mixed_bfloat16: pesos en float32, matmuls en bfloat16, salida float32.
+
+    Si la CPU no soporta bfloat16 o el modelo no se puede reconstruir con la
+    política, el cómputo queda en float32 y solo la entrada es float16.
+    """
+
+    name = "bf16"
+    input_dtype = np.float16
+
+    def __init__(self, model):
+        super().__init__(model)
+        import tensorflow as tf
+
+        self.compute_dtype = "float32"
+        self.fallback_reason = None
+        compute_model = model
+        if bfloat16_supported():
+            try:
+                compute_model = _clone_with_policy(model, "mixed_bfloat16")
+                self.compute_dtype = "bfloat16"
+            except Exception as e:
+                self.fallback_reason = f"no se pudo aplicar mixed_bfloat16: {e}"
+        else:
+            self.fallback_reason = "la CPU no reporta avx512_bf16/amx_bf16"
+
+        spec = tf.TensorSpec([None] + list(model.input_shape[1:]), tf.float16)
+        self._fn = tf.function(
+            lambda x: tf.cast(compute_model(tf.cast(x, tf.float32), training=False), tf.float32),
+            input_signature=[spec],
+        )
+        if self.compute_dtype == "bfloat16":
+            try:
+                self._fn(np.zeros((1,) + tuple(model.input_shape[1:]), dtype=np.float16))
+            except Exception as e:
+                # Kernel bfloat16 no disponible en este build de TF
+                self.fallback_reason = f"mixed_bfloat16 falló al trazar: {e}"
+                self.compute_dtype = "float32"
+                self._fn = tf.function(
+                    lambda x: model(tf.cast(x, tf.float32), training=False),
+                    input_signature=[spec],
+                )
+        if self.fallback_reason:
+            print(f"⚠️  bf16: cómputo en float32 ({self.fallback_reason})")
+
+    def _infer(self, batch):
+        return self._fn(batch).numpy()
+
+    def describe(self):
+        info = super().describe()
+        info["input_dtype"] = "float16"
+        info["compute_dtype"] = self.compute_dtype
+        if self.fallback_reason:
+            info["fallback_reason"] = self.fallback_reason
+        return info
+
+
+def _clone_with_policy(model, policy_name):
+    """
+    Reconstruye el modelo con otra política de precisión y copia los pesos.
+
+    La config de cada capa fija dtype='float32', así que la política global
+    no alcanza: cada capa (y las envueltas por Bidirectional) se reconstruye
+    con la política explícita. ValueError si ninguna capa quedó en bfloat16.
+    """
+    import tensorflow as tf
+
+    policy = tf.keras.mixed_precision.Policy(policy_name)
+
+    def with_policy(config):
+        config = dict(config)
+        config["dtype"] = policy
+        for key in ("layer", "backward_layer"):
+            if isinstance(config.get(key), dict) and "config" in config[key]:
+                config[key] = {**config[key], "config": with_policy(config[key]["config"])}
+        return config
+
+    def clone_layer(layer):
+        if isinstance(layer, tf.keras.layers.InputLayer):
+            return layer.__class__.from_config(layer.get_config())
+        return layer.__class__.from_config(with_policy(layer.get_config()))
+
+    clone = tf.keras.models.clone_model(model, clone_function=clone_layer)
+    clone.set_weights(model.get_weights())
+    if not any(layer.compute_dtype == policy.compute_dtype for layer in clone.layers):
+        raise ValueError(f"ninguna capa quedó con compute_dtype={policy.compute_dtype}")
+    return clone
+
+
+def _tflite_interpreter_class(prefer_runtime=False):
+    """tflite_runtime si está disponible (más liviano), si no tf.lite"""
+    if prefer_runtime:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+            return Interpreter
+        except ImportError:
+            pass
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+def _open_tflite(tflite_path, num_threads):
+    """
+    Intérprete para un .tflite: tflite_runtime si está instalado y puede
+    asignar el modelo; si no (ej. ops Flex del LSTM, que tflite_runtime no
+    trae), tf.lite.Interpreter.
+    """
+    Runtime = _tflite_interpreter_class(prefer_runtime=True)
+    try:
+        interpreter = Runtime(model_path=str(tflite_path), num_threads=num_threads)
+        interpreter.allocate_tensors()
+        return interpreter
+    except (RuntimeError, ValueError) as e:
+        Interpreter = _tflite_interpreter_class()
+        if Runtime is Interpreter:
+            raise
+        print(f"⚠️  tflite_runtime no puede cargar {tflite_path} ({e}); usando tf.lite")
+        return Interpreter(model_path=str(tflite_path), num_threads=num_threads)
+
+
+def convert_to_tflite(model):
+    """Convierte un modelo Keras a flatbuffer TFLite (con ops TF para el LSTM si hace falta)"""
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.target_spec.supported_ops = [
+        tf.lite.OpsSet.TFLITE_BUILTINS,
+        tf.lite.OpsSet.SELECT_TF_OPS,
+    ]
+    converter._experimental_lower_tensor_list_ops = False
+    return converter.convert()
+
+
+# ============================================================================
+# FÁBRICA
+# ============================================================================
+
+ENGINE_CLASSES = {
+    "keras": KerasPredictEngine,
+    "function": TFFunctionEngine,
+    "tflite": TFLiteEngine,
+    "bf16": ReducedPrecisionEngine,
+}
+
+
+def create_engine(model, backend=None):
+    """Crea un motor sobre un modelo Keras ya cargado"""
+    backend = (backend or os.getenv(ENGINE_ENV, "keras")).lower()
+    if backend == "auto":
+        return select_fastest_engine(model)
+    if backend not in ENGINE_CLASSES:
+        raise ValueError(f"Backend desconocido '{backend}'. Opciones: {', '.join(ENGINE_CLASSES)}, auto")
+    return ENGINE_CLASSES[backend](model)
+
+
+def load_engine(model_path=DEFAULT_MODEL_PATH, backend=None):
+    """
+    Carga el modelo y devuelve el motor elegido.
+
+    Un archivo .tflite se abre directamente con TFLiteEngine, sin cargar Keras.
+    """
+    if str(model_path).endswith(".tflite"):
+        return TFLiteEngine(tflite_path=model_path)
+
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(model_path)
+    return create_engine(model, backend)
+
+
+def select_fastest_engine(model, batch_size=1, runs=20):
+    """Mide cada backend sobre un lote dummy y devuelve el de menor latencia mediana"""
+    dummy = np.random.rand(batch_size, *model.input_shape[1:]).astype(np.float32)
+    best_engine, best_ms = None, None
+
+    for backend in BACKENDS:
+        try:
+            engine = ENGINE_CLASSES[backend](model)
+            engine.infer(dummy)  # Trazado / asignación de tensores
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                engine._infer(dummy)
+                timings.append((time.perf_counter() - start) * 1000)
+        except Exception as e:
+            print(f"⚠️  Backend '{backend}' no disponible: {e}")
+            continue
+
+        median_ms = float(np.median(timings))
+        print(f"   ⏱️  {backend:10} {median_ms:7.2f}ms (mediana, batch={batch_size})")
+        if best_ms is None or median_ms < best_ms:
+            best_engine, best_ms = engine, median_ms
+
+    if best_engine is None:
+        raise RuntimeError("Ningún backend de inferencia pudo inicializarse")
+    # Contadores limpios para el backend elegido
+    best_engine.latency = LatencyStats()
+    print(f"✅ Backend más rápido: {best_engine.name}")
+    return best_engine
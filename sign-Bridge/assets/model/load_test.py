@@ -0,0 +1,392 @@
+"""
+Generador de Carga y Replay - SignBridge
+Mide throughput y latencia de server.py contra un servidor local, sin
+servicios externos (solo biblioteca estándar + numpy).
+
+Modos:
+- closed: N clientes concurrentes, cada uno envía la siguiente petición al
+          recibir la respuesta (concurrencia fija)
+- open:   llegadas a tasa fija (req/s) sin importar cuánto tarde el servidor;
+          la latencia se mide desde el instante programado, así la cola del
+          lado cliente también cuenta (sin "coordinated omission")
+
+Uso:
+    python load_test.py --mode closed --concurrency 8 --duration 30
+    python load_test.py --mode open --rate 200 --duration 30 --format raw
+    python load_test.py --endpoint /api/predict/static --concurrency 4
+    python load_test.py --replay grabacion.npy --html reporte.html --label "tflite x4"
+"""
+
+import argparse
+import html
+import http.client
+import io
+import itertools
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import numpy as np
+
+from synthetic_data import generate_mixed
+from timeline import sliding_windows
+from wire_format import JSON, NPY, OCTET_STREAM, encode_raw
+
+
+# ============================================================================
+# SECUENCIAS DE PRUEBA
+# ============================================================================
+
+def synthetic_sequences(count=64, seed=0):
+    """Secuencias (24, 126) sintéticas con todos los patrones de synthetic_data mezclados"""
+    sequences, _ = generate_mixed(count, rng=seed)
+    return sequences
+
+
+def load_replay(path, stride=1):
+    """Secuencias de un .npy/.npz: (N, 24, 126) tal cual, (T, 126) en ventanas de 24"""
+    data = np.load(path, mmap_mode='r') if path.endswith('.npy') else np.load(path)
+    if isinstance(data, np.lib.npyio.NpzFile):
+        arrays = [data[name] for name in data.files]
+        data = np.concatenate([a if a.ndim == 3 else sliding_windows(a, 24, stride) for a in arrays])
+    elif data.ndim == 2:
+        data = sliding_windows(np.asarray(data, dtype=np.float32), 24, stride)
+    if data.ndim != 3 or data.shape[1:] != (24, 126):
+        raise ValueError(f"Se esperaba (N, 24, 126) o (T, 126), recibido: {data.shape}")
+    return np.ascontiguousarray(data, dtype=np.float32)
+
+
+def encode_bodies(sequences, body_format):
+    """Cuerpos pre-codificados: el costo de serializar no cuenta en la medición"""
+    if body_format == 'raw':
+        return [encode_raw(seq) for seq in sequences], OCTET_STREAM
+    if body_format in ('npy', 'npy16'):
+        dtype = np.float16 if body_format == 'npy16' else np.float32
+        bodies = []
+        for seq in sequences:
+            buffer = io.BytesIO()
+            np.save(buffer, seq.astype(dtype))
+            bodies.append(buffer.getvalue())
+        return bodies, NPY
+    return [json.dumps({'sequence': seq.tolist()}).encode('utf-8') for seq in sequences], JSON
+
+
+# ============================================================================
+# CLIENTE HTTP
+# ============================================================================
+
+class Client:
+    """Una conexión keep-alive por hilo"""
+
+    def __init__(self, url, endpoint, bodies, content_type, timeout):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 80
+        self.endpoint = endpoint
+        self.method = 'POST' if bodies else 'GET'
+        self.bodies = bodies
+        self.content_type = content_type
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def request(self, index):
+        """(status, bytes recibidos); status = nombre de la excepción si falla"""
+        conn = self._connection()
+        headers = {}
+        body = None
+        if self.bodies:
+            body = self.bodies[index % len(self.bodies)]
+            headers['Content-Type'] = self.content_type
+        try:
+            conn.request(self.method, self.endpoint, body=body, headers=headers)
+            response = conn.getresponse()
+            payload = response.read()
+            return response.status, len(payload)
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            self._local.conn = None
+            return type(e).__name__, 0
+
+
+class Recorder:
+    """Resultados por petición: (inicio relativo, latencia, status)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = []
+        self.dropped = 0
+
+    def record(self, started_at, latency_s, status, nbytes):
+        with self._lock:
+            self.samples.append((started_at, latency_s, status, nbytes))
+
+    def drop(self):
+        with self._lock:
+            self.dropped += 1
+
+
+# ============================================================================
+# MODOS DE CARGA
+# ============================================================================
+
+def run_closed_loop(client, recorder, concurrency, duration_s):
+    start = time.perf_counter()
+    deadline = start + duration_s
+    counter = itertools.count()
+
+    def worker():
+        while True:
+            sent_at = time.perf_counter()
+            if sent_at >= deadline:
+                return
+            index = next(counter)
+            status, nbytes = client.request(index)
+            recorder.record(sent_at - start, time.perf_counter() - sent_at, status, nbytes)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def run_open_loop(client, recorder, rate, duration_s, max_in_flight):
+    """Llegadas cada 1/rate s; si el cliente ya tiene max_in_flight pendientes se descarta"""
+    start = time.perf_counter()
+    total = int(rate * duration_s)
+    in_flight = threading.BoundedSemaphore(max_in_flight)
+
+    def fire(index, scheduled_at):
+        try:
+            status, nbytes = client.request(index)
+            recorder.record(scheduled_at - start, time.perf_counter() - scheduled_at, status, nbytes)
+        finally:
+            in_flight.release()
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        for index in range(total):
+            scheduled_at = start + index / rate
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if not in_flight.acquire(blocking=False):
+                recorder.drop()
+                continue
+            pool.submit(fire, index, scheduled_at)
+    return time.perf_counter() - start
+
+
+# ============================================================================
+# REPORTE
+# ============================================================================
+
+def percentiles_ms(latencies):
+    if len(latencies) == 0:
+        return {name: None for name in ('p50', 'p90', 'p95', 'p99', 'max', 'mean')}
+    values = np.asarray(latencies) * 1000
+    p50, p90, p95, p99 = np.percentile(values, [50, 90, 95, 99])
+    return {
+        'p50': float(p50), 'p90': float(p90), 'p95': float(p95), 'p99': float(p99),
+        'max': float(values.max()), 'mean': float(values.mean()),
+    }
+
+
+def summarize(recorder, elapsed_s, warmup_s, config):
+    """Resumen excluyendo los primeros warmup_s segundos"""
+    samples = [s for s in recorder.samples if s[0] >= warmup_s]
+    measured_s = max(elapsed_s - warmup_s, 1e-9)
+    ok = [s for s in samples if s[2] == 200]
+    status_counts = {}
+    for _, _, status, _ in samples:
+        status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+
+    # Serie por segundo (agrupada en una pasada)
+    per_second = {}
+    for started_at, latency_s, status, _ in samples:
+        bucket = per_second.setdefault(int(started_at), ([], [0]))
+        bucket[1][0] += 1
+        if status == 200:
+            bucket[0].append(latency_s)
+    timeline = []
+    for second in range(int(warmup_s), int(np.ceil(elapsed_s))):
+        window_ok, (requests,) = per_second.get(second, ([], [0]))
+        timeline.append({
+            'second': second,
+            'requests': requests,
+            'errors': requests - len(window_ok),
+            'p95_ms': percentiles_ms(window_ok)['p95'],
+        })
+
+    return {
+        'label': config.get('label'),
+        'config': config,
+        'elapsed_s': elapsed_s,
+        'measured_s': measured_s,
+        'requests': len(samples),
+        'successful': len(ok),
+        'errors': len(samples) - len(ok),
+        'error_rate': ((len(samples) - len(ok)) / len(samples)) if samples else 0.0,
+        'dropped_client_side': recorder.dropped,
+        'throughput_rps': len(ok) / measured_s,
+        'bytes_received': sum(s[3] for s in samples),
+        'latency_ms': percentiles_ms([s[1] for s in ok]),
+        'status_counts': status_counts,
+        'timeline': timeline,
+    }
+
+
+def _svg_series(points, color, height=120, width=600):
+    values = [v for v in points if v is not None]
+    if len(values) < 2:
+        return ''
+    top = max(values) or 1.0
+    step = width / (len(points) - 1)
+    coords = ' '.join(
+        f"{i * step:.1f},{height - (v / top) * (height - 10):.1f}"
+        for i, v in enumerate(points) if v is not None
+    )
+    return (f'<svg width="{width}" height="{height}" style="background:#f8f9fa">'
+            f'<polyline fill="none" stroke="{color}" stroke-width="2" points="{coords}"/></svg>'
+            f'<div style="color:#666">máx: {top:.1f}</div>')
+
+
+def render_html(report):
+    latency = report['latency_ms']
+    rows = ''.join(
+        f"<tr><td>{html.escape(name)}</td><td>{'-' if value is None else f'{value:.2f}'}</td></tr>"
+        for name, value in latency.items()
+    )
+    config_rows = ''.join(
+        f"<tr><td>{html.escape(str(k))}</td><td>{html.escape(str(v))}</td></tr>"
+        for k, v in report['config'].items()
+    )
+    status_rows = ''.join(
+        f"<tr><td>{html.escape(k)}</td><td>{v}</td></tr>" for k, v in sorted(report['status_counts'].items())
+    )
+    throughput = [entry['requests'] - entry['errors'] for entry in report['timeline']]
+    p95 = [entry['p95_ms'] for entry in report['timeline']]
+    title = html.escape(report['label'] or 'SignBridge load test')
+    return f"""<!DOCTYPE html>
+<html lang="es">
+<head><meta charset="UTF-8"><title>{title}</title>
+<style>
+body {{ font-family: -apple-system, 'Segoe UI', Roboto, sans-serif; margin: 30px; color: #333; }}
+h1 {{ color: #667eea; }}
+table {{ border-collapse: collapse; margin-bottom: 20px; }}
+td {{ border: 1px solid #ddd; padding: 6px 12px; }}
+</style></head>
+<body>
+<h1>🚦 {title}</h1>
+<p><strong>{report['throughput_rps']:.1f} req/s</strong> ·
+   {report['successful']} OK · {report['errors']} errores ({report['error_rate'] * 100:.2f}%) ·
+   {report['dropped_client_side']} descartadas en el cliente · {report['measured_s']:.1f}s medidos</p>
+<h2>Latencia (ms)</h2><table>{rows}</table>
+<h2>Respuestas por segundo</h2>{_svg_series(throughput, '#667eea')}
+<h2>p95 por segundo (ms)</h2>{_svg_series(p95, '#764ba2')}
+<h2>Status</h2><table>{status_rows}</table>
+<h2>Configuración</h2><table>{config_rows}</table>
+</body></html>
+"""
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="SignBridge load generator")
+    parser.add_argument("--url", default=f"http://localhost:{os.getenv('PORT', '5000')}")
+    parser.add_argument("--endpoint", default="/api/predict",
+                        help="/api/predict (POST) o /api/predict/<patrón> (GET)")
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clientes en modo closed")
+    parser.add_argument("--rate", type=float, default=100.0, help="Peticiones por segundo en modo open")
+    parser.add_argument("--max-in-flight", type=int, default=256,
+                        help="Límite de peticiones pendientes en modo open")
+    parser.add_argument("--duration", type=float, default=30.0, help="Segundos de carga")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Segundos iniciales excluidos del reporte")
+    parser.add_argument("--format", choices=("json", "raw", "npy", "npy16"), default="json",
+                        help="Codificación del cuerpo para POST /api/predict (npy16: float16)")
+    parser.add_argument("--replay", help="Secuencias grabadas (.npy/.npz); default: sintéticas")
+    parser.add_argument("--replay-stride", type=int, default=1)
+    parser.add_argument("--sequences", type=int, default=64, help="Secuencias sintéticas distintas")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--label", help="Nombre de la corrida (ej. 'tflite, 4 workers')")
+    parser.add_argument("--output", default="load_test_report.json")
+    parser.add_argument("--html", help="Reporte HTML opcional")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("🚦 SignBridge Load Test")
+    print("=" * 70)
+
+    bodies, content_type = [], None
+    if not args.endpoint.startswith('/api/predict/'):
+        if args.replay:
+            sequences = load_replay(args.replay, args.replay_stride)
+            print(f"📼 Replay: {len(sequences)} secuencias de {args.replay}")
+        else:
+            sequences = synthetic_sequences(args.sequences, args.seed)
+            print(f"🎲 {len(sequences)} secuencias sintéticas (seed {args.seed})")
+        bodies, content_type = encode_bodies(sequences, args.format)
+
+    client = Client(args.url, args.endpoint, bodies, content_type, args.timeout)
+    recorder = Recorder()
+    config = {
+        'label': args.label,
+        'url': args.url,
+        'endpoint': args.endpoint,
+        'mode': args.mode,
+        'concurrency': args.concurrency if args.mode == 'closed' else None,
+        'rate': args.rate if args.mode == 'open' else None,
+        'duration_s': args.duration,
+        'warmup_s': args.warmup,
+        'format': args.format if bodies else None,
+        'replay': args.replay,
+    }
+
+    if args.mode == 'closed':
+        print(f"🔁 Closed-loop: {args.concurrency} clientes durante {args.duration:.0f}s → {args.url}{args.endpoint}")
+        elapsed = run_closed_loop(client, recorder, args.concurrency, args.duration)
+    else:
+        print(f"⏱️  Open-loop: {args.rate:.0f} req/s durante {args.duration:.0f}s → {args.url}{args.endpoint}")
+        elapsed = run_open_loop(client, recorder, args.rate, args.duration, args.max_in_flight)
+
+    report = summarize(recorder, elapsed, min(args.warmup, elapsed / 2), config)
+    latency = report['latency_ms']
+
+    print("=" * 70)
+    print(f"📊 Throughput: {report['throughput_rps']:.1f} req/s ({report['successful']} OK)")
+    if latency['p50'] is not None:
+        print(f"⏱️  Latencia: p50 {latency['p50']:.1f}ms · p95 {latency['p95']:.1f}ms · "
+              f"p99 {latency['p99']:.1f}ms · máx {latency['max']:.1f}ms")
+    print(f"❌ Errores: {report['errors']} ({report['error_rate'] * 100:.2f}%) {report['status_counts']}")
+    if report['dropped_client_side']:
+        print(f"⚠️  {report['dropped_client_side']} llegadas descartadas: el cliente alcanzó --max-in-flight")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"💾 Reporte JSON: {args.output}")
+    if args.html:
+        with open(args.html, 'w', encoding='utf-8') as f:
+            f.write(render_html(report))
+        print(f"💾 Reporte HTML: {args.html}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Métricas en formato texto de Prometheus - SignBridge
+Contadores, histogramas por etapa y gauges, sin dependencias externas.
+
+El registro en el camino caliente es liviano: el bucket se calcula fuera
+del lock y la sección crítica son tres sumas.
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Segundos: de 0.1ms a 5s, cubre parseo, top-k, inferencia y JPEG
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _format_value(value):
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if value.is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ('_lock', '_bounds', '_counts', '_sum', '_count')
+
+    def __init__(self, bounds):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)  # Último: +Inf
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value):
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+
+
+class _Metric:
+    """Métrica con labels opcionales; sin labels se usa directamente"""
+
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._child_for(())
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _child_for(self, values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def labels(self, **labels):
+        return self._child_for(tuple(str(labels[name]) for name in self.labelnames))
+
+    def _items(self):
+        with self._lock:
+            return sorted(self._children.items())
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type_name}',
+        ]
+        lines.extend(self._render_samples())
+        return lines
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def _render_samples(self):
+        for values, child in self._items():
+            yield f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}'
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def _render_samples(self):
+        for values, child in self._items():
+            counts, total, count = child.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, values, ('le', _format_value(bound)))
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.labelnames, values)
+            yield f'{self.name}_sum{labels} {_format_value(total)}'
+            yield f'{self.name}_count{labels} {count}'
+
+
+class Gauge(_Metric):
+    """
+    Gauge calculado al momento del scrape (ej. profundidad de cola).
+
+    Con labelnames, fn devuelve {valor del label (o tupla de valores): valor}.
+    """
+
+    type_name = 'gauge'
+
+    def __init__(self, name, documentation, fn, labelnames=()):
+        self.fn = fn
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return None
+
+    def _render_samples(self):
+        try:
+            value = self.fn()
+        except Exception:
+            return
+        if not self.labelnames:
+            if value is not None:
+                yield f'{self.name} {_format_value(value)}'
+            return
+        for key, sample in sorted((value or {}).items()):
+            values = key if isinstance(key, tuple) else (key,)
+            if sample is not None:
+                yield f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(sample)}'
+
+
+class MetricsRegistry:
+    """Conjunto de métricas de un proceso; render() produce el texto de /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, fn, labelnames=()):
+        return self._register(Gauge(name, documentation, fn, labelnames))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
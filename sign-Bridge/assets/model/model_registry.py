@@ -0,0 +1,331 @@
+"""
+Registro de Modelos Versionados - SignBridge
+Un directorio con un bundle por versión:
+
+    models/
+      v1/  model.keras (o model.tflite) + labels.json
+      v2/  model.tflite + labels.json
+
+Las versiones nuevas se cargan y calientan en segundo plano (ModelStartup) y
+recién entonces entran a la tabla de ruteo, que se reemplaza de forma atómica:
+las peticiones en curso terminan con la versión que eligieron.
+
+El tráfico se reparte por peso entre versiones (canary) y cada versión
+acumula latencia y acuerdo top-1 contra la versión primaria.
+"""
+
+import json
+import os
+import random
+import re
+import threading
+from bisect import bisect_right
+
+import numpy as np
+
+from startup import ModelStartup
+
+MODEL_FILES = ("model.tflite", "model.keras", "best_model.keras")
+LABELS_FILE = "labels.json"
+VERSION_PATTERN = re.compile(r'^[A-Za-z0-9._-]+$')
+
+
+class ModelRegistryError(RuntimeError):
+    """Versión inexistente, incompleta o en un estado que no permite la operación"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def version_sort_key(name):
+    """Orden natural: v2 < v10 (los tramos numéricos se comparan como números)"""
+    return [(0, int(part), '') if part.isdigit() else (1, 0, part.lower())
+            for part in re.split(r'(\d+)', name) if part]
+
+
+def read_labels(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data['classes'] if isinstance(data, dict) else data
+
+
+class ModelVersion:
+    """Modelo + etiquetas + micro-batcher de una versión, con sus estadísticas"""
+
+    def __init__(self, version, engine, labels, batcher, model_path=None):
+        self.version = version
+        self.engine = engine
+        self.labels = labels
+        self.batcher = batcher
+        self.model_path = model_path
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.compared = 0
+        self.top1_agree = 0
+        self.max_prob_delta = 0.0
+        self._total_prob_delta = 0.0
+
+    def record_request(self, ok=True):
+        with self._lock:
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+
+    def record_agreement(self, probs, reference_probs):
+        """Compara contra la predicción de la versión primaria para la misma secuencia"""
+        probs = np.asarray(probs, dtype=np.float32)
+        reference_probs = np.asarray(reference_probs, dtype=np.float32)
+        if probs.shape != reference_probs.shape:
+            return
+        agree = int(np.argmax(probs)) == int(np.argmax(reference_probs))
+        delta = float(np.max(np.abs(probs - reference_probs)))
+        with self._lock:
+            self.compared += 1
+            self.top1_agree += int(agree)
+            self._total_prob_delta += delta
+            if delta > self.max_prob_delta:
+                self.max_prob_delta = delta
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "requests": self.requests,
+                "errors": self.errors,
+                "agreement": {
+                    "compared": self.compared,
+                    "top1_rate": (self.top1_agree / self.compared) if self.compared else None,
+                    "mean_prob_delta": (self._total_prob_delta / self.compared) if self.compared else None,
+                    "max_prob_delta": self.max_prob_delta,
+                },
+            }
+        stats["model_path"] = self.model_path
+        stats["num_classes"] = len(self.labels)
+        stats["engine"] = self.engine.describe()
+        stats["batching"] = self.batcher.stats()
+        return stats
+
+
+class ModelRegistry:
+    """
+    Versiones cargadas + tabla de ruteo (primaria, pesos).
+
+    batcher_factory(engine, version) crea el micro-batcher de cada versión;
+    on_activate(model_version) se llama tras cada cambio de versión primaria.
+    La tabla de ruteo es una tupla inmutable: leerla no requiere lock.
+    Un batcher reemplazado se cierra `drain_s` segundos después, para que las
+    peticiones que ya lo tenían terminen con él.
+    """
+
+    def __init__(self, root, batcher_factory, warmup_batch_sizes=(1,), agreement_sample_rate=0.1,
+                 on_activate=None, drain_s=5.0):
+        self.root = root
+        self.batcher_factory = batcher_factory
+        self.warmup_batch_sizes = tuple(warmup_batch_sizes)
+        self.agreement_sample_rate = float(agreement_sample_rate)
+        self.on_activate = on_activate
+        self.drain_s = float(drain_s)
+
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._loading = {}
+        # (primaria, versiones, pesos acumulados, total)
+        self._routing = (None, (), (), 0.0)
+        self._weights = {}
+
+    # ------------------------------------------------------------------
+    # Bundles en disco
+    # ------------------------------------------------------------------
+
+    def available(self):
+        """Versiones presentes en el directorio del registro, en orden natural (v2 < v10)"""
+        if not self.root or not os.path.isdir(self.root):
+            return []
+        return sorted(
+            (name for name in os.listdir(self.root)
+             if os.path.isdir(os.path.join(self.root, name))),
+            key=version_sort_key,
+        )
+
+    def resolve(self, version):
+        """(ruta del modelo, ruta de etiquetas) de un bundle"""
+        if not self.root:
+            raise ModelRegistryError("Registro no configurado (MODEL_REGISTRY_DIR)", status=409)
+        if not VERSION_PATTERN.match(version) or version in ('.', '..'):
+            raise ModelRegistryError(f"Nombre de versión inválido: '{version}' (solo [A-Za-z0-9._-])")
+        root = os.path.realpath(self.root)
+        bundle = os.path.realpath(os.path.join(root, version))
+        if os.path.dirname(bundle) != root:
+            raise ModelRegistryError(f"Nombre de versión inválido: '{version}'")
+        if not os.path.isdir(bundle):
+            raise ModelRegistryError(f"Versión '{version}' no encontrada en {self.root}", status=404)
+        labels_path = os.path.join(bundle, LABELS_FILE)
+        for name in MODEL_FILES:
+            model_path = os.path.join(bundle, name)
+            if os.path.exists(model_path) and os.path.exists(labels_path):
+                return model_path, labels_path
+        raise ModelRegistryError(f"Bundle incompleto: {bundle} necesita {LABELS_FILE} y uno de {MODEL_FILES}")
+
+    # ------------------------------------------------------------------
+    # Carga y descarga
+    # ------------------------------------------------------------------
+
+    def register(self, version, engine, labels, model_path=None):
+        """Agrega una versión ya cargada y calentada (peso 0 si no es la primera)"""
+        model_version = ModelVersion(version, engine, labels, self.batcher_factory(engine, version),
+                                     model_path=model_path)
+        with self._lock:
+            previous = self._versions.get(version)
+            self._versions[version] = model_version
+            self._loading.pop(version, None)
+            first = self._routing[0] is None
+            # Recargar la primaria con el mismo nombre también cambia el motor activo
+            is_primary = first or version == self._routing[0]
+            self._weights.setdefault(version, 100.0 if first else 0.0)
+            self._rebuild_routing_locked(version if first else self._routing[0])
+        print(f"📦 Versión {version} disponible ({len(labels)} clases, backend: {engine.name})")
+        if is_primary and self.on_activate is not None:
+            self.on_activate(model_version)
+        if previous is not None:
+            self._retire(previous)
+        return model_version
+
+    def load(self, version, weight=0.0):
+        """Carga y calienta un bundle en segundo plano; entra al ruteo al terminar"""
+        model_path, labels_path = self.resolve(version)
+        labels = read_labels(labels_path)
+        with self._lock:
+            loading = self._loading.get(version)
+            if loading is not None and loading.state != "failed":
+                raise ModelRegistryError(f"La versión '{version}' ya se está cargando", status=409)
+
+            def on_ready(engine):
+                self.register(version, engine, labels, model_path=model_path)
+                if weight:
+                    self.set_weights({version: weight})
+
+            loader = ModelStartup(model_path, self.warmup_batch_sizes, on_ready=on_ready,
+                                  name=f"model-loader-{version}")
+            self._loading[version] = loader
+        loader.start(background=True)
+        return loader
+
+    def unload(self, version):
+        """Quita una versión canary; su batcher termina lo que tenga en cola"""
+        with self._lock:
+            if version == self._routing[0]:
+                raise ModelRegistryError("No se puede descargar la versión primaria", status=409)
+            model_version = self._versions.pop(version, None)
+            if model_version is None:
+                raise ModelRegistryError(f"Versión '{version}' no cargada", status=404)
+            self._weights.pop(version, None)
+            self._rebuild_routing_locked(self._routing[0])
+        self._retire(model_version)
+
+    def _retire(self, model_version):
+        """Cierra el batcher de una versión fuera del ruteo tras el período de gracia"""
+        timer = threading.Timer(self.drain_s, model_version.batcher.close)
+        timer.daemon = True
+        timer.start()
+
+    # ------------------------------------------------------------------
+    # Ruteo
+    # ------------------------------------------------------------------
+
+    def activate(self, version):
+        """Swap atómico de la versión primaria (recibe todo el tráfico sin canary)"""
+        with self._lock:
+            if version not in self._versions:
+                raise ModelRegistryError(f"Versión '{version}' no cargada", status=404)
+            self._weights = {name: 0.0 for name in self._versions}
+            self._weights[version] = 100.0
+            self._rebuild_routing_locked(version)
+            model_version = self._versions[version]
+        print(f"🔀 Versión primaria: {version}")
+        if self.on_activate is not None:
+            self.on_activate(model_version)
+        return model_version
+
+    def set_weights(self, weights):
+        """Pesos relativos por versión, ej. {"v1": 90, "v2": 10}"""
+        with self._lock:
+            for version, weight in weights.items():
+                if version not in self._versions:
+                    raise ModelRegistryError(f"Versión '{version}' no cargada", status=404)
+                if float(weight) < 0:
+                    raise ModelRegistryError("Los pesos deben ser >= 0")
+            self._weights.update({version: float(weight) for version, weight in weights.items()})
+            self._rebuild_routing_locked(self._routing[0])
+        return self.weights()
+
+    def weights(self):
+        with self._lock:
+            return dict(self._weights)
+
+    def _rebuild_routing_locked(self, primary):
+        names = tuple(name for name in sorted(self._versions) if self._weights.get(name, 0) > 0)
+        cumulative, total = [], 0.0
+        for name in names:
+            total += self._weights[name]
+            cumulative.append(total)
+        self._routing = (primary, names, tuple(cumulative), total)
+
+    @property
+    def active(self):
+        """Versión primaria (None hasta que se registre la primera)"""
+        primary = self._routing[0]
+        return self._versions.get(primary) if primary is not None else None
+
+    def route(self):
+        """Elige una versión según los pesos; la primaria si no hay pesos positivos"""
+        primary, names, cumulative, total = self._routing
+        if len(names) > 1:
+            name = names[min(bisect_right(cumulative, random.random() * total), len(names) - 1)]
+        elif names:
+            name = names[0]
+        else:
+            name = primary
+        return self._versions.get(name) or self.active
+
+    def labels_for(self, version):
+        """Etiquetas de una versión (las de la primaria si ya no está cargada)"""
+        model_version = self._versions.get(version) or self.active
+        return model_version.labels if model_version is not None else None
+
+    def compare_with_primary(self, model_version, sequence, probabilities):
+        """Muestrea el acuerdo top-1 de una versión canary sin bloquear la respuesta"""
+        primary = self.active
+        if (primary is None or model_version is primary
+                or random.random() >= self.agreement_sample_rate):
+            return
+
+        def done(future):
+            if future.exception() is None:
+                model_version.record_agreement(probabilities, future.result()[0])
+
+        try:
+            primary.batcher.submit(sequence).add_done_callback(done)
+        except RuntimeError:
+            pass  # La primaria se está reemplazando
+
+    # ------------------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------------------
+
+    def stats(self):
+        with self._lock:
+            versions = dict(self._versions)
+            loading = {name: loader.readiness()[0] for name, loader in self._loading.items()}
+            weights = dict(self._weights)
+            primary = self._routing[0]
+        return {
+            "root": self.root,
+            "primary": primary,
+            "weights": weights,
+            "agreement_sample_rate": self.agreement_sample_rate,
+            "available": self.available(),
+            "loading": loading,
+            "versions": {name: version.stats() for name, version in sorted(versions.items())},
+        }
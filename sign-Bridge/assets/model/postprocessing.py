@@ -0,0 +1,39 @@
+"""
+Post-procesamiento vectorizado de predicciones - SignBridge
+Top-k para un lote completo con argpartition (sin argsort por fila)
+"""
+
+import numpy as np
+
+
+def top_k_batch(probabilities, k=5):
+    """
+    Top-k de todo el lote de una vez.
+
+    probabilities: (N, num_classes)
+    Devuelve (indices, probs), ambos (N, k), ordenados de mayor a menor.
+    """
+    probabilities = np.asarray(probabilities)
+    if probabilities.ndim == 1:
+        probabilities = probabilities[np.newaxis]
+    k = max(1, min(int(k), probabilities.shape[-1]))
+
+    # O(C) por fila para aislar los k mayores; solo se ordenan esos k
+    candidates = np.argpartition(probabilities, -k, axis=1)[:, -k:]
+    candidate_probs = np.take_along_axis(probabilities, candidates, axis=1)
+    order = np.argsort(-candidate_probs, axis=1)
+
+    indices = np.take_along_axis(candidates, order, axis=1)
+    probs = np.take_along_axis(candidate_probs, order, axis=1)
+    return indices, probs
+
+
+def format_top_k(labels, indices, probs):
+    """Lista [{label, probability}] para una fila de top_k_batch"""
+    return [
+        {
+            'label': labels[idx],
+            'probability': float(prob)
+        }
+        for idx, prob in zip(indices.tolist(), probs.tolist())
+    ]
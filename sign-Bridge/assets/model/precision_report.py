@@ -0,0 +1,115 @@
+"""
+Reporte de Precisión Reducida - SignBridge
+Compara el motor bf16 (entrada float16, cómputo bfloat16) contra el
+baseline float32 sobre las mismas secuencias:
+
+- Paridad: acuerdo top-1, delta máximo y medio de probabilidad
+- Throughput: secuencias/s por tamaño de lote para ambos motores
+
+Uso:
+    python precision_report.py
+    python precision_report.py --replay grabacion.npy --batch-sizes 1,32,256 --output precision.json
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from inference_engine import ReducedPrecisionEngine, TFFunctionEngine
+from load_test import load_replay, synthetic_sequences
+from startup import parse_batch_sizes
+
+
+def parity(reference_engine, candidate_engine, sequences, batch_size=256):
+    """Acuerdo top-1 y deltas de probabilidad del candidato respecto al baseline"""
+    reference, candidate = [], []
+    for start in range(0, len(sequences), batch_size):
+        batch = sequences[start:start + batch_size]
+        reference.append(reference_engine.infer(batch))
+        candidate.append(candidate_engine.infer(batch))
+    reference = np.concatenate(reference)
+    candidate = np.concatenate(candidate).astype(np.float32)
+
+    delta = np.abs(reference - candidate)
+    agree = np.argmax(reference, axis=1) == np.argmax(candidate, axis=1)
+    return {
+        "sequences": len(sequences),
+        "top1_agreement": float(agree.mean()),
+        "top1_disagreements": int((~agree).sum()),
+        "max_prob_delta": float(delta.max()),
+        "mean_prob_delta": float(delta.mean()),
+        "p99_row_max_delta": float(np.percentile(delta.max(axis=1), 99)),
+        # Error introducido solo por guardar los landmarks en float16
+        "max_input_quantization_error": float(
+            np.abs(sequences - sequences.astype(np.float16).astype(np.float32)).max()),
+    }
+
+
+def throughput(engine, sequences, batch_size, runs=20):
+    """Mediana de ms por lote y secuencias/s (tras un lote de calentamiento)"""
+    batch = np.resize(sequences, (batch_size,) + sequences.shape[1:]).astype(engine.input_dtype)
+    engine.infer(batch)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        engine.infer(batch)
+        timings.append(time.perf_counter() - start)
+    median_s = float(np.median(timings))
+    return {"batch_ms": median_s * 1000, "sequences_per_s": batch_size / median_s}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="SignBridge float32 vs bf16 parity and throughput")
+    parser.add_argument("--model", default="best_model.keras")
+    parser.add_argument("--replay", help="Secuencias grabadas (.npy/.npz); default: sintéticas")
+    parser.add_argument("--sequences", type=int, default=1024, help="Secuencias sintéticas")
+    parser.add_argument("--batch-sizes", default="1,8,32,128")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--output", default="precision_report.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    import tensorflow as tf
+
+    print("🎚️  SignBridge - Reporte de precisión reducida")
+    print("=" * 70)
+    model = tf.keras.models.load_model(args.model)
+    sequences = load_replay(args.replay) if args.replay else synthetic_sequences(args.sequences)
+    print(f"📊 {len(sequences)} secuencias ({'replay' if args.replay else 'sintéticas'})")
+
+    baseline = TFFunctionEngine(model)
+    reduced = ReducedPrecisionEngine(model)
+    print(f"🧠 bf16: entrada float16, cómputo {reduced.compute_dtype}")
+
+    report = {
+        "model": args.model,
+        "candidate": reduced.describe(),
+        "parity": parity(baseline, reduced, sequences),
+        "throughput": {},
+    }
+    result = report["parity"]
+    print(f"🎯 Acuerdo top-1: {result['top1_agreement'] * 100:.2f}% "
+          f"({result['top1_disagreements']} diferencias)")
+    print(f"📏 Delta de probabilidad: máx {result['max_prob_delta']:.5f} · "
+          f"medio {result['mean_prob_delta']:.6f}")
+
+    print(f"\n{'batch':>6} {'float32 seq/s':>14} {'bf16 seq/s':>12} {'speedup':>8}")
+    for batch_size in parse_batch_sizes(args.batch_sizes):
+        f32 = throughput(baseline, sequences, batch_size, args.runs)
+        bf16 = throughput(reduced, sequences, batch_size, args.runs)
+        speedup = bf16["sequences_per_s"] / f32["sequences_per_s"]
+        report["throughput"][batch_size] = {"float32": f32, "bf16": bf16, "speedup": speedup}
+        print(f"{batch_size:>6} {f32['sequences_per_s']:>14,.0f} {bf16['sequences_per_s']:>12,.0f} "
+              f"{speedup:>7.2f}x")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Reporte: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Caché LRU de predicciones - SignBridge
+Clave: versión del modelo + hash de la secuencia cuantizada a una precisión configurable.
+Expulsión por TTL, número de entradas y memoria; peticiones idénticas
+simultáneas se fusionan en una sola inferencia.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+# Overhead aproximado por entrada (clave, tupla, dict de info)
+_ENTRY_OVERHEAD_BYTES = 512
+
+
+def sequence_fingerprint(sequence, precision=3):
+    """Hash de la secuencia redondeada a `precision` decimales (incluye el shape)"""
+    sequence = np.asarray(sequence, dtype=np.float32)
+    quantized = np.rint(sequence * (10.0 ** precision)).astype(np.int32)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(quantized.shape).encode())
+    digest.update(quantized.tobytes())
+    return digest.hexdigest()
+
+
+def _detach(value):
+    """
+    Copia los arrays que son vistas (ej. una fila del lote del micro-batcher):
+    la vista mantendría vivo el lote completo y max_bytes no lo contaría.
+    """
+    if isinstance(value, np.ndarray):
+        return value.copy() if value.base is not None else value
+    if isinstance(value, tuple):
+        return tuple(_detach(v) for v in value)
+    if isinstance(value, list):
+        return [_detach(v) for v in value]
+    return value
+
+
+def _value_size(value):
+    """Tamaño aproximado en bytes de un resultado cacheado"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_value_size(v) for v in value)
+    return 0
+
+
+class PredictionCache:
+    """
+    LRU acotado por entradas y bytes, con TTL.
+
+    get_or_compute(sequence, compute, namespace) devuelve (valor, estado) donde
+    estado es 'hit', 'miss' o 'coalesced' (se esperó a una inferencia idéntica
+    en curso). `namespace` separa las entradas por versión del modelo.
+
+    clear() abre una nueva generación: lo que termine de calcularse después
+    con datos de la generación anterior no se guarda.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl_s=300.0, precision=3):
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.ttl_s = float(ttl_s)
+        self.precision = int(precision)
+
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_or_compute(self, sequence, compute, namespace=None):
+        key = (namespace, sequence_fingerprint(sequence, self.precision))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2], 'hit'
+                self._remove_locked(key)
+                self.expirations += 1
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+                leader = True
+            generation = self._generation
+
+        if not leader:
+            return future.result(), 'coalesced'
+
+        try:
+            value = _detach(compute())
+        except Exception as e:
+            with self._lock:
+                self._release_locked(key, future)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._release_locked(key, future)
+            if generation == self._generation:
+                self._store_locked(key, value)
+        future.set_result(value)
+        return value, 'miss'
+
+    def clear(self):
+        """Vacía la caché; los cálculos en curso ya no se guardan ni se comparten"""
+        with self._lock:
+            self._entries.clear()
+            self._inflight = {}
+            self._bytes = 0
+            self._generation += 1
+
+    def _release_locked(self, key, future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+    def _store_locked(self, key, value):
+        size = _value_size(value) + _ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove_locked(key)
+        self._entries[key] = (time.monotonic() + self.ttl_s, size, value)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove_locked(oldest)
+            self.evictions += 1
+
+    def _remove_locked(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_s': self.ttl_s,
+                'precision': self.precision,
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'hit_rate': ((self.hits + self.coalesced) / lookups) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'inflight': len(self._inflight),
+            }
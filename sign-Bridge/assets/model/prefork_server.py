@@ -0,0 +1,270 @@
+"""
+Servidor Pre-fork Multi-proceso - SignBridge
+Escala server.py a varios núcleos sin cargar N copias del modelo Keras.
+
+1. El proceso padre exporta best_model.keras una sola vez a un flatbuffer
+   TFLite (en un proceso auxiliar, para no cargar TensorFlow en el padre).
+2. Importa el runtime de inferencia (tflite_runtime, o TensorFlow si el
+   modelo necesita ops Flex) y abre el socket de escucha.
+3. Lanza N workers con fork: el heap del runtime ya importado se comparte
+   copy-on-write. Cada worker crea su propio intérprete sobre el flatbuffer,
+   mapeado en memoria de solo lectura, y sus propios hilos.
+
+Sin fork (Windows) los workers usan spawn y cada uno importa el runtime.
+
+Uso:
+    python prefork_server.py --workers 4
+    python prefork_server.py --workers 4 --port 5000 --reexport
+    python prefork_server.py --workers 4 --require-runtime   # falla si el modelo necesita TensorFlow
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+DEFAULT_MODEL_PATH = "best_model.keras"
+DEFAULT_SHARED_MODEL = "shared_model.tflite"
+
+
+# ============================================================================
+# EXPORTACIÓN DEL MODELO COMPARTIDO
+# ============================================================================
+
+def export_shared_model(model_path, shared_path):
+    """Convierte el modelo Keras a TFLite y lo escribe de forma atómica"""
+    import tensorflow as tf
+    from inference_engine import convert_to_tflite
+
+    print(f"🧠 Exportando {model_path} → {shared_path}...")
+    model = tf.keras.models.load_model(model_path)
+    flatbuffer = convert_to_tflite(model)
+
+    tmp_path = shared_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(flatbuffer)
+    os.replace(tmp_path, shared_path)
+    print(f"✅ Modelo compartido: {len(flatbuffer) / (1024 * 1024):.2f} MB")
+
+
+def ensure_shared_model(model_path, shared_path, force=False):
+    """Reutiliza el export si es más nuevo que el modelo; si no, lo regenera"""
+    if (not force and os.path.exists(shared_path)
+            and os.path.getmtime(shared_path) >= os.path.getmtime(model_path)):
+        print(f"♻️  Reutilizando modelo compartido: {shared_path}")
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    exporter = ctx.Process(target=export_shared_model, args=(model_path, shared_path))
+    exporter.start()
+    exporter.join()
+    if exporter.exitcode != 0:
+        print(f"❌ La exportación falló (exit code {exporter.exitcode})")
+        sys.exit(1)
+
+
+# ============================================================================
+# WORKERS
+# ============================================================================
+
+def rss_mb():
+    """RSS del proceso actual en MB (None si no se puede medir)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def memory_report():
+    """
+    'RSS x MB, PSS y MB, privada z MB' del proceso actual. PSS reparte cada
+    página compartida entre los procesos que la usan: la suma de PSS de los
+    workers es la memoria real; la privada es lo que cuesta cada worker extra.
+    """
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] in ("Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"):
+                    fields[parts[0][:-1]] = int(parts[1]) / 1024
+    except OSError:
+        rss = rss_mb()
+        return f"RSS {rss:.0f} MB" if rss is not None else "RSS n/d"
+    private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return f"RSS {fields.get('Rss', 0):.0f} MB, PSS {fields.get('Pss', 0):.0f} MB, privada {private:.0f} MB"
+
+
+def tflite_runtime_can_load(shared_path):
+    """True si tflite_runtime está instalado y asigna el modelo (sin ops Flex)"""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        return False
+    try:
+        Interpreter(model_path=shared_path, num_threads=1).allocate_tensors()
+    except (RuntimeError, ValueError):
+        return False
+    return True
+
+
+def preload_runtime(shared_path, require_runtime=False):
+    """
+    Importa en el padre el runtime que usarán los workers. Con TensorFlow solo
+    se importa el módulo: el intérprete Flex arranca hilos que no sobreviven
+    al fork, así que cada worker crea el suyo. Devuelve 'tflite_runtime' o 'tf.lite'.
+    """
+    import numpy  # noqa: F401  (compartido por los workers)
+
+    if tflite_runtime_can_load(shared_path):
+        runtime = "tflite_runtime"
+    else:
+        runtime = "tf.lite"
+    if require_runtime and runtime != "tflite_runtime":
+        print(f"❌ {shared_path} no se puede ejecutar con tflite_runtime (ops Flex del LSTM o "
+              "tflite_runtime no instalado). Exporta un modelo sin Flex o quita --require-runtime.")
+        sys.exit(1)
+    if runtime == "tf.lite":
+        import tensorflow  # noqa: F401
+    print(f"📚 Runtime precargado: {runtime} ({memory_report()} en el padre)")
+    return runtime
+
+
+def worker_main(listen_socket, shared_path, worker_id, require_runtime=False):
+    """Carga server.py sobre el modelo mapeado y atiende el socket compartido"""
+    # server.py lee la ruta del modelo de esta variable: con un .tflite
+    # usa TFLiteEngine sin cargar Keras
+    os.environ["SIGNBRIDGE_MODEL_PATH"] = shared_path
+    if require_runtime and "tflite_runtime" not in sys.modules:
+        preload_runtime(shared_path, require_runtime=True)  # spawn: verificar en el worker
+
+    import server
+    from werkzeug.serving import make_server
+
+    host, port = listen_socket.getsockname()[:2]
+    httpd = make_server(host, port, server.app, threaded=True, fd=listen_socket.fileno())
+
+    print(f"👷 Worker {worker_id} listo (pid {os.getpid()}, {memory_report()})", flush=True)
+    httpd.serve_forever()
+
+
+# ============================================================================
+# PROCESO PADRE
+# ============================================================================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="SignBridge pre-fork inference server")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Número de procesos worker (default: núcleos disponibles)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "5000")))
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Modelo Keras de origen")
+    parser.add_argument("--shared-model", default=DEFAULT_SHARED_MODEL,
+                        help="Flatbuffer TFLite compartido por los workers")
+    parser.add_argument("--reexport", action="store_true",
+                        help="Regenerar el modelo compartido aunque exista")
+    parser.add_argument("--require-runtime", action="store_true",
+                        help="Salir si el modelo no corre con tflite_runtime (sin TensorFlow)")
+    parser.add_argument("--max-crashes", type=int, default=5,
+                        help="Caídas seguidas de un worker (antes de --min-uptime) antes de abortar")
+    parser.add_argument("--min-uptime", type=float, default=10.0,
+                        help="Segundos de vida para que una caída no cuente como seguida")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("🚀 Iniciando SignBridge Pre-fork Server...")
+    print("=" * 70)
+
+    ensure_shared_model(args.model, args.shared_model, force=args.reexport)
+    shared_path = os.path.abspath(args.shared_model)
+
+    # Con fork los workers heredan el runtime ya importado (copy-on-write)
+    use_fork = "fork" in multiprocessing.get_all_start_methods()
+    if use_fork:
+        preload_runtime(shared_path, args.require_runtime)
+    elif args.require_runtime:
+        print("⚠️  --require-runtime se verifica en cada worker (sin fork)")
+    ctx = multiprocessing.get_context("fork" if use_fork else "spawn")
+
+    listen_socket = socket.create_server((args.host, args.port), backlog=128)
+    listen_socket.set_inheritable(True)
+    print(f"🔌 Escuchando en {args.host}:{args.port} con {args.workers} workers "
+          f"({'fork' if use_fork else 'spawn'})")
+
+    workers = {}
+    started_at = {}
+    crashes = {}
+    restart_at = {}
+
+    def spawn(worker_id):
+        sys.stdout.flush()
+        process = ctx.Process(
+            target=worker_main,
+            args=(listen_socket, shared_path, worker_id, args.require_runtime),
+            name=f"signbridge-worker-{worker_id}",
+        )
+        process.start()
+        workers[worker_id] = process
+        started_at[worker_id] = time.monotonic()
+
+    for worker_id in range(args.workers):
+        spawn(worker_id)
+
+    print("=" * 70)
+    print("💡 Presiona Ctrl+C para detener el servidor\n")
+
+    exit_code = 0
+    try:
+        while not exit_code:
+            time.sleep(1)
+            now = time.monotonic()
+            for worker_id, process in list(workers.items()):
+                if process.is_alive() or worker_id in restart_at:
+                    continue
+                # Caídas seguidas (antes de min_uptime) con backoff exponencial
+                if now - started_at[worker_id] < args.min_uptime:
+                    crashes[worker_id] = crashes.get(worker_id, 0) + 1
+                else:
+                    crashes[worker_id] = 1
+                if crashes[worker_id] > args.max_crashes:
+                    print(f"❌ Worker {worker_id} cayó {crashes[worker_id]} veces seguidas "
+                          f"(exit code {process.exitcode}). Deteniendo el servidor.")
+                    exit_code = 1
+                    break
+                delay = min(30.0, 2.0 ** (crashes[worker_id] - 1))
+                print(f"⚠️  Worker {worker_id} terminó (exit code {process.exitcode}). "
+                      f"Reiniciando en {delay:.0f}s...")
+                restart_at[worker_id] = now + delay
+            for worker_id, when in list(restart_at.items()):
+                if now >= when and not exit_code:
+                    del restart_at[worker_id]
+                    spawn(worker_id)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("\n🛑 Deteniendo workers...")
+        for process in workers.values():
+            process.terminate()
+        for process in workers.values():
+            process.join(timeout=5)
+        listen_socket.close()
+    if exit_code:
+        sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Stride adaptativo de inferencia - SignBridge
+Decide cada cuántos frames se manda una ventana al modelo en los servidores
+de cámara, en vez de un valor fijo:
+
+- Presupuesto de CPU: con latencia L y un frame cada T ms, inferir cada s
+  frames usa L / (s·T) del tiempo; s nunca baja de lo que permite el presupuesto
+- Energía de movimiento: cambio medio de los landmarks entre frames. Seña
+  activa → stride mínimo; manos quietas o ausentes → stride máximo
+
+stride = max(stride por presupuesto, stride por movimiento), acotado a [min, max]
+"""
+
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+
+class StrideScheduler:
+    """
+    Uso por frame: observe_frame(features) y luego should_infer();
+    el hilo de inferencia informa su latencia con observe_latency(ms).
+    """
+
+    def __init__(self, min_stride=1, max_stride=15, cpu_budget=0.5,
+                 motion_low=0.003, motion_high=0.015, smoothing=0.2):
+        self.min_stride = max(1, int(min_stride))
+        self.max_stride = max(self.min_stride, int(max_stride))
+        self.cpu_budget = float(cpu_budget)
+        self.motion_low = float(motion_low)
+        self.motion_high = float(motion_high)
+        self.smoothing = float(smoothing)  # Peso de la muestra nueva en los promedios móviles
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._previous = None
+            self._last_frame_at = None
+            self._frames_since = 0
+            self.frame_ms = 1000 / 30  # Hasta medir el ritmo real de la cámara
+            self.latency_ms = None
+            self.motion_energy = 0.0
+            self.hands_present = False
+            self.stride = self.max_stride
+            self.reason = 'no_hands'
+            self.scheduled = 0
+
+    def _ewma(self, current, sample):
+        return sample if current is None else current + self.smoothing * (sample - current)
+
+    def observe_latency(self, latency_ms):
+        with self._lock:
+            self.latency_ms = self._ewma(self.latency_ms, float(latency_ms))
+
+    def observe_frame(self, features, now=None):
+        """Actualiza ritmo de frames y energía de movimiento con los 126 features del frame"""
+        now = time.perf_counter() if now is None else now
+        features = np.asarray(features, dtype=np.float32)
+        hands = bool(np.any(features))
+        with self._lock:
+            if self._last_frame_at is not None:
+                self.frame_ms = self._ewma(self.frame_ms, (now - self._last_frame_at) * 1000)
+            self._last_frame_at = now
+
+            if hands and self._previous is not None and np.any(self._previous):
+                energy = float(np.abs(features - self._previous).mean())
+                self.motion_energy = self._ewma(self.motion_energy, energy)
+            elif not hands:
+                self.motion_energy = 0.0
+            self.hands_present = hands
+            self._previous = features
+
+    def _budget_stride(self):
+        """Stride mínimo para que la inferencia use a lo sumo cpu_budget del tiempo"""
+        if self.latency_ms is None or self.cpu_budget <= 0:
+            return self.min_stride
+        return math.ceil(self.latency_ms / (self.cpu_budget * self.frame_ms))
+
+    def _motion_stride(self):
+        if not self.hands_present:
+            return self.max_stride
+        span = max(self.motion_high - self.motion_low, 1e-9)
+        activity = min(1.0, max(0.0, (self.motion_energy - self.motion_low) / span))
+        return round(self.max_stride - activity * (self.max_stride - self.min_stride))
+
+    def should_infer(self):
+        """True si corresponde mandar la ventana actual al modelo (recalcula el stride)"""
+        with self._lock:
+            budget_stride = self._budget_stride()
+            motion_stride = self._motion_stride()
+            stride = max(budget_stride, motion_stride)
+            self.stride = min(self.max_stride, max(self.min_stride, stride))
+            if not self.hands_present:
+                self.reason = 'no_hands'
+            elif budget_stride > motion_stride:
+                self.reason = 'budget'
+            else:
+                self.reason = 'motion'
+
+            self._frames_since += 1
+            if self._frames_since < self.stride:
+                return False
+            self._frames_since = 0
+            self.scheduled += 1
+            return True
+
+    @property
+    def cpu_usage(self):
+        """Fracción estimada del tiempo usada por la inferencia con el stride actual"""
+        if self.latency_ms is None:
+            return 0.0
+        return self.latency_ms / (self.stride * self.frame_ms)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'stride': self.stride,
+                'reason': self.reason,
+                'min_stride': self.min_stride,
+                'max_stride': self.max_stride,
+                'cpu_budget': self.cpu_budget,
+                'cpu_usage': self.cpu_usage,
+                'latency_ms': self.latency_ms,
+                'frame_ms': self.frame_ms,
+                'motion_energy': self.motion_energy,
+                'scheduled': self.scheduled,
+            }
+
+
+def scheduler_from_env(default_min=1, default_max=15):
+    """StrideScheduler con STRIDE_MIN, STRIDE_MAX, INFERENCE_CPU_BUDGET, MOTION_LOW y MOTION_HIGH"""
+    return StrideScheduler(
+        min_stride=int(os.getenv('STRIDE_MIN', str(default_min))),
+        max_stride=int(os.getenv('STRIDE_MAX', str(default_max))),
+        cpu_budget=float(os.getenv('INFERENCE_CPU_BUDGET', '0.5')),
+        motion_low=float(os.getenv('MOTION_LOW', '0.003')),
+        motion_high=float(os.getenv('MOTION_HIGH', '0.015')),
+    )
@@ -3,13 +3,32 @@ Servidor Web para el Modelo LSTM - SignBridge
 Levanta una API REST y una interfaz web para interactuar con el modelo
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response
 from flask_cors import CORS
+try:
+    from flask_sock import Sock  # Opcional: pip install flask-sock
+except ImportError:
+    Sock = None
 import numpy as np
-import tensorflow as tf
 import json
 import os
 
+from batching import MicroBatcher
+from gating import HandPresenceGate, NO_SIGN_LABEL
+from metrics import MetricsRegistry, CONTENT_TYPE as METRICS_CONTENT_TYPE, BATCH_SIZE_BUCKETS
+from postprocessing import top_k_batch, format_top_k
+from model_registry import ModelRegistry, ModelRegistryError, read_labels
+from prediction_cache import PredictionCache
+from startup import ModelStartup, parse_batch_sizes
+from timeline import predict_timeline
+from synthetic_data import generate_sequence
+from streaming import SessionManager, SessionLimitError, decode_binary_frames
+from wire_format import (
+    JSON, OCTET_STREAM, MSGPACK, WireFormatError,
+    decode_request, negotiate, encode_msgpack,
+    encode_topk_binary, encode_topk_header, encode_topk_rows,
+)
+
 app = Flask(__name__)
 CORS(app)  # Permitir peticiones desde cualquier origen
 
@@ -20,31 +39,187 @@ CORS(app)  # Permitir peticiones desde cualquier origen
 print("🚀 Iniciando SignBridge Model Server...")
 print("=" * 70)
 
-# Cargar modelo
-MODEL_PATH = "best_model.keras"
-print(f"🧠 Cargando modelo: {MODEL_PATH}")
-model = tf.keras.models.load_model(MODEL_PATH)
-print(f"✅ Modelo cargado: {model.input_shape} → {model.output_shape}")
+MODEL_PATH = os.getenv("SIGNBRIDGE_MODEL_PATH", "best_model.keras")
+LABELS_FILE = "labels.json"
+# FAST_START=1: el puerto se abre de inmediato y el modelo carga en segundo plano
+FAST_START = os.getenv('FAST_START', '0') == '1'
+
+# Registro de modelos versionados (opcional): MODEL_REGISTRY_DIR=models
+MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR')
+MODEL_VERSION = os.getenv('MODEL_VERSION')  # Default: la última versión del registro
+REGISTRY_ADMIN_TOKEN = os.getenv('REGISTRY_ADMIN_TOKEN')
+
+# Versión primaria: se asignan en on_activate()
+engine = None
+batcher = None
+
+# Métricas Prometheus (/metrics): latencia por etapa y contadores
+metrics = MetricsRegistry()
+STAGE_SECONDS = metrics.histogram(
+    'signbridge_stage_duration_seconds', 'Duración de cada etapa del pipeline de predicción', ['stage'])
+STAGE_PARSE = STAGE_SECONDS.labels(stage='parse')
+STAGE_QUEUE_WAIT = STAGE_SECONDS.labels(stage='queue_wait')
+STAGE_INFERENCE = STAGE_SECONDS.labels(stage='inference')
+STAGE_POSTPROCESS = STAGE_SECONDS.labels(stage='postprocess')
+STAGE_SERIALIZE = STAGE_SECONDS.labels(stage='serialize')
+REQUESTS = metrics.counter('signbridge_requests_total', 'Peticiones de predicción recibidas', ['endpoint'])
+ERRORS = metrics.counter('signbridge_errors_total', 'Peticiones de predicción con error', ['endpoint'])
+SHAPE_REJECTIONS = metrics.counter(
+    'signbridge_shape_rejections_total', 'Peticiones rechazadas por shape incorrecto', ['endpoint'])
+BATCH_SIZE = metrics.histogram(
+    'signbridge_batch_size', 'Secuencias por llamada al modelo', buckets=BATCH_SIZE_BUCKETS)
+INFERENCES_SAVED = metrics.counter(
+    'signbridge_inferences_saved_total', 'Ventanas sin manos respondidas sin llamar al modelo', ['endpoint'])
+MODEL_REQUESTS = metrics.counter(
+    'signbridge_model_requests_total', 'Predicciones atendidas por versión de modelo', ['version'])
+
+
+def record_batch(batch_size, inference_ms):
+    """Callback del micro-batcher: una observación por llamada al modelo"""
+    BATCH_SIZE.observe(batch_size)
+    STAGE_INFERENCE.observe(inference_ms / 1000)
+
+
+# Micro-batching: agrupa peticiones concurrentes en una sola inferencia (un batcher por versión)
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', '32'))
+BATCH_MAX_DELAY_MS = float(os.getenv('BATCH_MAX_DELAY_MS', '3'))
+
+
+def make_batcher(model_engine, version):
+    return MicroBatcher(
+        model_engine.infer,
+        max_batch_size=BATCH_MAX_SIZE,
+        max_delay_ms=BATCH_MAX_DELAY_MS,
+        name=f"micro-batcher-{version}",
+        on_batch=record_batch,
+        dtype=model_engine.input_dtype,
+    )
+
+
+print(f"📦 Micro-batching: hasta {BATCH_MAX_SIZE} secuencias o {BATCH_MAX_DELAY_MS}ms de espera")
+
+# Carga cronometrada por fases + pre-trazado de los tamaños de lote habituales
+WARMUP_BATCH_SIZES = parse_batch_sizes(os.getenv('WARMUP_BATCH_SIZES', f'1,{BATCH_MAX_SIZE}'))
+
+
+def on_activate(model_version):
+    """Swap de la versión primaria: motor, etiquetas y batcher por defecto"""
+    global engine, labels, batcher
+    engine, labels, batcher = model_version.engine, model_version.labels, model_version.batcher
+    CONFIG.update({
+        "version": model_version.version,
+        "num_classes": len(labels),
+        "input_shape": list(engine.input_shape)[1:],
+        "labels": labels,
+    })
+    if cache is not None:
+        cache.clear()  # Las entradas son de la versión anterior
+
+
+registry = ModelRegistry(
+    MODEL_REGISTRY_DIR,
+    make_batcher,
+    warmup_batch_sizes=WARMUP_BATCH_SIZES,
+    agreement_sample_rate=float(os.getenv('AGREEMENT_SAMPLE_RATE', '0.1')),
+    on_activate=on_activate,
+    drain_s=float(os.getenv('REGISTRY_DRAIN_S', '5')),
+)
+if MODEL_REGISTRY_DIR:
+    MODEL_VERSION = MODEL_VERSION or (registry.available() or [None])[-1]
+    if MODEL_VERSION is None:
+        print(f"⚠️  Registro {MODEL_REGISTRY_DIR} vacío: usando {MODEL_PATH}")
+    else:
+        MODEL_PATH, LABELS_FILE = registry.resolve(MODEL_VERSION)
+        print(f"🗂️  Registro de modelos: {MODEL_REGISTRY_DIR} (versión inicial: {MODEL_VERSION})")
+MODEL_VERSION = MODEL_VERSION or "default"
 
 # Cargar etiquetas
-LABELS_FILE = "labels.json"
-with open(LABELS_FILE, 'r', encoding='utf-8') as f:
-    data = json.load(f)
-    labels = data['classes'] if isinstance(data, dict) else data
+labels = read_labels(LABELS_FILE)
 
 print(f"📋 Etiquetas cargadas: {len(labels)} clases")
 
 # Configuración
 CONFIG = {
     "model_name": "SignBridge LSTM",
-    "version": "1.0.0",
+    "version": MODEL_VERSION,
     "num_classes": len(labels),
-    "input_shape": list(model.input_shape)[1:],
+    "input_shape": [24, 126],
     "labels": labels
 }
 
+# Caché LRU opcional delante de la inferencia (PREDICTION_CACHE=1)
+cache = None
+if os.getenv('PREDICTION_CACHE', '0') == '1':
+    cache = PredictionCache(
+        max_entries=int(os.getenv('CACHE_MAX_ENTRIES', '1024')),
+        max_bytes=int(float(os.getenv('CACHE_MAX_MB', '64')) * 1024 * 1024),
+        ttl_s=float(os.getenv('CACHE_TTL_S', '300')),
+        precision=int(os.getenv('CACHE_PRECISION', '3')),
+    )
+    print(f"🗃️  Caché de predicciones: {cache.max_entries} entradas, TTL {cache.ttl_s:.0f}s, "
+          f"precisión {cache.precision} decimales")
+
+# Tamaño de chunk para /api/predict_batch (acota la memoria por llamada al modelo)
+PREDICT_BATCH_CHUNK = int(os.getenv('PREDICT_BATCH_CHUNK', '256'))
+
+# Gating: ventanas con menos de GATE_MIN_HAND_FRAMES frames con mano → "sin seña" sin inferencia
+gate = HandPresenceGate(int(os.getenv('GATE_MIN_HAND_FRAMES', '1')))
+if gate.enabled:
+    print(f"✋ Gating: se omite la inferencia con menos de {gate.min_hand_frames} frames con mano")
+
+# Patrones de /api/predict/<patrón>; SYNTHETIC_SEED los hace reproducibles
+synthetic_rng = np.random.default_rng(int(os.environ['SYNTHETIC_SEED']) if 'SYNTHETIC_SEED' in os.environ else None)
+
+# Timeline de grabaciones largas: ventanas por lote en /api/timeline
+TIMELINE_BATCH_SIZE = int(os.getenv('TIMELINE_BATCH_SIZE', '512'))
+
+# Streaming por WebSocket: un frame por mensaje, ventana de 24 frames en el servidor
+sessions = SessionManager(
+    max_sessions=int(os.getenv('STREAM_MAX_SESSIONS', '64')),
+    idle_timeout_s=float(os.getenv('STREAM_IDLE_TIMEOUT_S', '60')),
+    default_stride=int(os.getenv('STREAM_STRIDE', '4')),
+)
+sock = Sock(app) if Sock is not None else None
+if sock is None:
+    print("⚠️  flask-sock no instalado: /ws/stream deshabilitado")
+
+metrics.gauge('signbridge_batch_queue_depth', 'Secuencias esperando en el micro-batcher',
+              lambda: batcher.queue_depth if batcher is not None else None)
+metrics.gauge('signbridge_stream_sessions', 'Sesiones de streaming activas', lambda: len(sessions))
+metrics.gauge('signbridge_cache_entries', 'Entradas en la caché de predicciones',
+              lambda: cache.stats()['entries'] if cache is not None else None)
+
+
+def on_model_ready(loaded_engine):
+    """Registra el motor ya calentado como primera versión (activa las rutas de predicción)"""
+    registry.register(MODEL_VERSION, loaded_engine, labels, model_path=MODEL_PATH)
+    print(f"✅ Modelo cargado: {loaded_engine.input_shape} → {loaded_engine.output_shape} "
+          f"(backend: {loaded_engine.name})")
+
+
+startup = ModelStartup(MODEL_PATH, WARMUP_BATCH_SIZES, on_ready=on_model_ready)
+startup.register_routes(app)
+metrics.gauge('signbridge_model_ready', 'Modelo cargado y calentado (1) o cargando (0)',
+              lambda: int(startup.ready))
+print(f"🧠 Cargando modelo: {MODEL_PATH} (warmup lotes: {list(WARMUP_BATCH_SIZES)})")
+startup.start(background=FAST_START)
+
 print("=" * 70)
-print("✅ Servidor listo")
+print("✅ Servidor listo" if startup.ready else "✅ Servidor escuchando (modelo cargando, ver /readyz)")
+
+# Rutas que responden aunque el modelo no esté listo
+NO_MODEL_ROUTES = {'/', '/healthz', '/readyz', '/metrics'}
+
+
+@app.before_request
+def require_model():
+    """503 + Retry-After mientras el modelo carga en segundo plano"""
+    if startup.ready or request.path in NO_MODEL_ROUTES:
+        return None
+    return jsonify({
+        'error': 'Modelo cargando, reintenta en unos segundos',
+        'state': startup.state,
+    }), 503, {'Retry-After': '1'}
 
 # ============================================================================
 # RUTAS DE LA API
@@ -384,75 +559,227 @@ def api_info():
     return jsonify(CONFIG)
 
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Métricas en formato texto de Prometheus"""
+    return Response(metrics.render(), mimetype=METRICS_CONTENT_TYPE)
+
+
 @app.route('/api/predict', methods=['POST'])
 def api_predict():
-    """Hacer predicción con datos enviados"""
+    """Hacer predicción con datos enviados (JSON, raw float32, .npy o msgpack)"""
+    REQUESTS.labels(endpoint='predict').inc()
     try:
-        data = request.get_json()
-        
         # Esperar array de forma [24, 126]
-        input_data = np.array(data['sequence'], dtype=np.float32)
+        with STAGE_PARSE.time():
+            input_data, _ = decode_request(request.get_data(cache=False), request.mimetype, 'sequence')
         
         if input_data.shape != (24, 126):
+            SHAPE_REJECTIONS.labels(endpoint='predict').inc()
             return jsonify({
                 'error': f'Shape incorrecto. Esperado: (24, 126), recibido: {input_data.shape}'
             }), 400
         
-        # Hacer predicción
-        import time
-        start = time.time()
-        input_batch = input_data.reshape(1, 24, 126)
-        prediction = model.predict(input_batch, verbose=0)
-        inference_time = (time.time() - start) * 1000
-        
-        # Procesar resultados
-        top_5_idx = np.argsort(prediction[0])[-5:][::-1]
-        top_5_prob = prediction[0][top_5_idx]
-        
-        result = {
-            'predicted_class': labels[top_5_idx[0]],
-            'confidence': float(top_5_prob[0]),
-            'inference_time_ms': inference_time,
-            'top_5': [
-                {
-                    'label': labels[idx],
-                    'probability': float(prob)
-                }
-                for idx, prob in zip(top_5_idx, top_5_prob)
-            ]
-        }
+        return make_prediction(input_data)
+    
+    except WireFormatError as e:
+        ERRORS.labels(endpoint='predict').inc()
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        ERRORS.labels(endpoint='predict').inc()
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/predict_batch', methods=['POST'])
+def api_predict_batch():
+    """Predicción para N secuencias en una sola petición (respuesta en streaming, en orden)"""
+    REQUESTS.labels(endpoint='predict_batch').inc()
+    try:
+        # Esperar array de forma [N, 24, 126]
+        with STAGE_PARSE.time():
+            input_data, options = decode_request(request.get_data(cache=False), request.mimetype, 'sequences')
+        try:
+            top_k = int(options.get('top_k', request.args.get('top_k', 5)))
+        except (TypeError, ValueError):
+            top_k = 0
+        if top_k < 1:
+            return jsonify({'error': 'top_k debe ser un entero >= 1'}), 400
         
-        return jsonify(result)
+        if input_data.ndim != 3 or input_data.shape[1:] != (24, 126) or len(input_data) == 0:
+            SHAPE_REJECTIONS.labels(endpoint='predict_batch').inc()
+            return jsonify({
+                'error': f'Shape incorrecto. Esperado: (N, 24, 126), recibido: {input_data.shape}'
+            }), 400
     
+    except WireFormatError as e:
+        ERRORS.labels(endpoint='predict_batch').inc()
+        return jsonify({'error': str(e)}), e.status
     except Exception as e:
+        ERRORS.labels(endpoint='predict_batch').inc()
         return jsonify({'error': str(e)}), 500
+    
+    response_type = negotiate(request.accept_mimetypes)
+    if response_type == OCTET_STREAM:
+        return Response(
+            stream_batch_predictions_binary(input_data, top_k),
+            mimetype=OCTET_STREAM
+        )
+    if response_type == MSGPACK:
+        return Response(
+            stream_batch_predictions_msgpack(input_data, top_k),
+            mimetype=MSGPACK
+        )
+    return Response(
+        stream_batch_predictions(input_data, top_k),
+        mimetype='application/x-ndjson'
+    )
 
 
-def generate_pattern(pattern_type, num_frames=24):
-    """Genera patrones de prueba"""
-    frames = []
-    for i in range(num_frames):
-        # Mano base
-        if pattern_type == "static":
-            left_hand = np.full(63, 0.5) + np.random.randn(63) * 0.02
-            right_hand = np.full(63, 0.6) + np.random.randn(63) * 0.02
-        elif pattern_type == "movement":
-            progress = i / num_frames
-            left_hand = np.full(63, 0.3 + progress * 0.4) + np.random.randn(63) * 0.02
-            right_hand = np.full(63, 0.4 + progress * 0.3) + np.random.randn(63) * 0.02
-        elif pattern_type == "dynamic":
-            progress = (i / num_frames) * 2 * np.pi
-            spread = 0.5 + 0.2 * np.sin(progress)
-            left_hand = np.full(63, spread) + np.random.randn(63) * 0.03
-            right_hand = np.full(63, spread + 0.1) + np.random.randn(63) * 0.03
-        else:  # random
-            left_hand = np.random.rand(63)
-            right_hand = np.random.rand(63)
-        
-        frame = np.concatenate([left_hand, right_hand])
-        frames.append(frame)
+@app.route('/api/timeline', methods=['POST'])
+def api_timeline():
+    """
+    Timeline de una grabación (T, 126): ventanas de 24 frames cada `stride`
+    frames, emitidas como NDJSON mientras se calculan los lotes siguientes.
+    Opciones (cuerpo o query string): stride, top_k, fps, batch_size.
+    """
+    REQUESTS.labels(endpoint='timeline').inc()
+    try:
+        with STAGE_PARSE.time():
+            landmarks, options = decode_request(request.get_data(cache=False), request.mimetype, 'landmarks')
+        try:
+            stride = int(options.get('stride', request.args.get('stride', 1)))
+            top_k = int(options.get('top_k', request.args.get('top_k', 5)))
+            fps = float(options.get('fps', request.args.get('fps', 0)))
+            batch_size = int(options.get('batch_size', request.args.get('batch_size', TIMELINE_BATCH_SIZE)))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'stride, top_k y batch_size deben ser enteros; fps un número'}), 400
+        
+        if landmarks.ndim != 2 or landmarks.shape[1] != 126 or landmarks.shape[0] < 24:
+            SHAPE_REJECTIONS.labels(endpoint='timeline').inc()
+            return jsonify({
+                'error': f'Shape incorrecto. Esperado: (T >= 24, 126), recibido: {landmarks.shape}'
+            }), 400
+        if stride < 1 or batch_size < 1 or top_k < 1:
+            return jsonify({'error': 'stride, top_k y batch_size deben ser >= 1'}), 400
+        if not 0 <= fps < float('inf'):
+            return jsonify({'error': 'fps debe ser >= 0'}), 400
+        fps = fps or None
+        # Un cliente no puede forzar lotes más grandes que el configurado
+        batch_size = min(batch_size, TIMELINE_BATCH_SIZE)
+    
+    except WireFormatError as e:
+        ERRORS.labels(endpoint='timeline').inc()
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        ERRORS.labels(endpoint='timeline').inc()
+        return jsonify({'error': str(e)}), 500
+    
+    version = registry.active
+    
+    def generate():
+        infer = lambda batch: infer_timed(batch, version.engine)
+        for entry in predict_timeline(infer, landmarks, version.labels, stride, batch_size, top_k, fps):
+            with STAGE_SERIALIZE.time():
+                line = json.dumps(entry, ensure_ascii=False) + '\n'
+            yield line
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
+
+def infer_timed(batch, model_engine=None):
+    """engine.infer registrando la latencia y el tamaño de lote en /metrics"""
+    with STAGE_INFERENCE.time():
+        probabilities = (model_engine or engine).infer(batch)
+    BATCH_SIZE.observe(len(batch))
+    return probabilities
+
+
+def clamp_top_k(top_k, labels):
+    """k efectivo: entre 1 y el número de clases"""
+    return max(1, min(int(top_k), len(labels)))
+
+
+def iter_batch_top_k(sequences, top_k=5, chunk_size=None, version=None):
+    """
+    Ejecuta el lote en chunks y entrega (offset, indices, probs) por chunk, en orden.
+    Las secuencias sin manos no pasan por el modelo: su fila queda con índices -1.
+    """
+    chunk_size = chunk_size or PREDICT_BATCH_CHUNK
+    version = version or registry.active
+    k = clamp_top_k(top_k, version.labels)
     
-    return np.array(frames, dtype=np.float32)
+    for offset in range(0, len(sequences), chunk_size):
+        chunk = sequences[offset:offset + chunk_size]
+        keep = gate.mask(chunk)
+        kept = int(np.count_nonzero(keep))
+        if kept < len(chunk):
+            INFERENCES_SAVED.labels(endpoint='predict_batch').inc(len(chunk) - kept)
+        if kept == len(chunk):
+            probabilities = infer_timed(chunk, version.engine)
+            with STAGE_POSTPROCESS.time():
+                indices, probs = top_k_batch(probabilities, k)
+        else:
+            indices = np.full((len(chunk), k), -1, dtype=np.int64)
+            probs = np.zeros((len(chunk), k), dtype=np.float32)
+            if kept:
+                probabilities = infer_timed(chunk[keep], version.engine)
+                with STAGE_POSTPROCESS.time():
+                    indices[keep], probs[keep] = top_k_batch(probabilities, k)
+        yield offset, indices, probs
+
+
+def batch_entry(index, indices, probs, class_labels=None):
+    """Resultado de una secuencia dentro de /api/predict_batch"""
+    class_labels = class_labels or labels
+    if indices[0] < 0:
+        return {'index': index, 'predicted_class': NO_SIGN_LABEL, 'confidence': 0.0, 'top_k': [], 'no_sign': True}
+    return {
+        'index': index,
+        'predicted_class': class_labels[indices[0]],
+        'confidence': float(probs[0]),
+        'top_k': format_top_k(class_labels, indices, probs)
+    }
+
+
+def stream_batch_predictions(sequences, top_k=5, chunk_size=None):
+    """Emite una línea JSON por secuencia (NDJSON), en orden"""
+    version = registry.active  # Toda la respuesta con la misma versión
+    for offset, indices, probs in iter_batch_top_k(sequences, top_k, chunk_size, version):
+        with STAGE_SERIALIZE.time():
+            lines = []
+            for i in range(len(indices)):
+                entry = batch_entry(offset + i, indices[i], probs[i], version.labels)
+                lines.append(json.dumps(entry, ensure_ascii=False))
+            chunk = '\n'.join(lines) + '\n'
+        yield chunk
+
+
+def stream_batch_predictions_binary(sequences, top_k=5, chunk_size=None):
+    """Header (n, k) y luego filas binarias de top-k por chunk"""
+    version = registry.active
+    k = clamp_top_k(top_k, version.labels)  # El mismo k en el header y en cada fila
+    yield encode_topk_header(len(sequences), k)
+    for _, indices, probs in iter_batch_top_k(sequences, k, chunk_size, version):
+        with STAGE_SERIALIZE.time():
+            chunk = encode_topk_rows(indices, probs)
+        yield chunk
+
+
+def stream_batch_predictions_msgpack(sequences, top_k=5, chunk_size=None):
+    """Un objeto msgpack por secuencia, concatenados (leer con msgpack.Unpacker)"""
+    version = registry.active
+    for offset, indices, probs in iter_batch_top_k(sequences, top_k, chunk_size, version):
+        with STAGE_SERIALIZE.time():
+            chunk = b''.join(
+                encode_msgpack(batch_entry(offset + i, indices[i], probs[i], version.labels))
+                for i in range(len(indices))
+            )
+        yield chunk
+
+
+def generate_pattern(pattern_type, num_frames=24):
+    """Genera patrones de prueba (vectorizado, ver synthetic_data.py)"""
+    return generate_sequence(pattern_type, synthetic_rng, num_frames)
 
 
 @app.route('/api/predict/random')
@@ -483,33 +810,268 @@ def predict_dynamic():
     return make_prediction(sequence)
 
 
-def make_prediction(sequence):
-    """Hacer predicción y devolver resultados"""
-    import time
+@app.route('/api/stats')
+def api_stats():
+    """Estadísticas del micro-batching y latencia del backend de inferencia"""
+    return jsonify(collect_stats())
+
+
+def collect_stats():
+    """Estadísticas de todas las etapas (también usadas por server_asgi.py)"""
+    stats = batcher.stats() if batcher is not None else {}
+    stats['engine'] = engine.describe() if engine is not None else None
+    stats['startup'] = startup.readiness()[0]
+    stats['models'] = registry.stats()
+    stats['gating'] = gate.stats()
+    stats['streaming'] = sessions.stats()
+    stats['cache'] = cache.stats() if cache is not None else None
+    return stats
+
+
+def require_admin():
+    """
+    Las rutas de administración del registro exigen REGISTRY_ADMIN_TOKEN;
+    sin token configurado solo se aceptan desde loopback
+    """
+    if REGISTRY_ADMIN_TOKEN:
+        if request.headers.get('X-Admin-Token') != REGISTRY_ADMIN_TOKEN:
+            return jsonify({'error': 'Token de administración inválido'}), 403
+    elif request.remote_addr not in ('127.0.0.1', '::1'):
+        return jsonify({'error': 'Administración solo desde localhost (definir REGISTRY_ADMIN_TOKEN)'}), 403
+    return None
+
+
+@app.route('/api/models')
+def api_models():
+    """Versiones cargadas, pesos de ruteo y estadísticas por versión (latencia, acuerdo)"""
+    return jsonify(registry.stats())
+
+
+@app.route('/api/models/<version>/load', methods=['POST'])
+def api_models_load(version):
+    """Carga y calienta una versión en segundo plano; body opcional {"weight": 10}"""
+    denied = require_admin()
+    if denied:
+        return denied
+    options = request.get_json(silent=True) or {}
+    try:
+        weight = float(options.get('weight', 0) if isinstance(options, dict) else 0)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'weight debe ser un número >= 0'}), 400
+    if not 0 <= weight < float('inf'):
+        return jsonify({'error': 'weight debe ser un número >= 0'}), 400
+    try:
+        registry.load(version, weight=weight)
+    except ModelRegistryError as e:
+        return jsonify({'error': str(e)}), e.status
+    return jsonify({'version': version, 'state': 'loading'}), 202
+
+
+@app.route('/api/models/<version>/activate', methods=['POST'])
+def api_models_activate(version):
+    """Promueve una versión a primaria (swap atómico; rollback = activar la anterior)"""
+    denied = require_admin()
+    if denied:
+        return denied
+    try:
+        registry.activate(version)
+    except ModelRegistryError as e:
+        return jsonify({'error': str(e)}), e.status
+    return jsonify({'primary': version, 'weights': registry.weights()})
+
+
+@app.route('/api/models/<version>/unload', methods=['POST'])
+def api_models_unload(version):
+    denied = require_admin()
+    if denied:
+        return denied
+    try:
+        registry.unload(version)
+    except ModelRegistryError as e:
+        return jsonify({'error': str(e)}), e.status
+    return jsonify({'unloaded': version, 'weights': registry.weights()})
+
+
+@app.route('/api/models/weights', methods=['POST'])
+def api_models_weights():
+    """Reparte el tráfico, ej. {"v1": 90, "v2": 10}"""
+    denied = require_admin()
+    if denied:
+        return denied
+    try:
+        weights = registry.set_weights(request.get_json(force=True))
+    except (ModelRegistryError, TypeError, ValueError, AttributeError) as e:
+        return jsonify({'error': str(e)}), getattr(e, 'status', 400)
+    return jsonify({'weights': weights})
+
+
+def stream_session(ws):
+    """
+    Sesión de streaming: el cliente envía frames de 126 floats y recibe
+    predicciones cada `stride` frames por la misma conexión.
+
+    Query params: session (retomar una sesión), stride.
+    Mensajes del cliente:
+      - binario: k × 126 float32 little-endian
+      - texto:   {"frame": [...]}, {"frames": [[...], ...]},
+                 {"type": "config", "stride": n} o {"type": "reset"}
+    """
+    try:
+        session = sessions.open(request.args.get('session'), request.args.get('stride', type=int))
+    except SessionLimitError as e:
+        ws.send(json.dumps({'type': 'error', 'error': str(e)}))
+        ws.close()
+        return
     
-    start = time.time()
-    input_batch = sequence.reshape(1, 24, 126)
-    prediction = model.predict(input_batch, verbose=0)
-    inference_time = (time.time() - start) * 1000
+    ws.send(json.dumps({'type': 'session', **session.describe()}))
     
-    # Top 5
-    top_5_idx = np.argsort(prediction[0])[-5:][::-1]
-    top_5_prob = prediction[0][top_5_idx]
+    while True:
+        message = ws.receive(timeout=sessions.idle_timeout_s)
+        if message is None:
+            # Inactiva: se libera la sesión para acotar memoria
+            sessions.close(session.session_id)
+            ws.close()
+            return
+        
+        try:
+            if isinstance(message, (bytes, bytearray)):
+                frames = decode_binary_frames(message)
+            else:
+                data = json.loads(message)
+                if data.get('type') == 'reset':
+                    session.reset()
+                    continue
+                if data.get('type') == 'config':
+                    session.stride = max(1, int(data.get('stride', session.stride)))
+                    ws.send(json.dumps({'type': 'session', **session.describe()}))
+                    continue
+                frames = data['frames'] if 'frames' in data else [data['frame']]
+            
+            window = session.push(frames)
+        except (ValueError, KeyError, TypeError) as e:
+            ERRORS.labels(endpoint='stream').inc()
+            ws.send(json.dumps({'type': 'error', 'error': f'Frame inválido: {e}'}))
+            continue
+        
+        if window is None:
+            continue
+        
+        REQUESTS.labels(endpoint='stream').inc()
+        no_sign = gated_result(window, 'stream', {'type': 'prediction', 'frame_index': session.frames_received})
+        if no_sign is not None:
+            ws.send(json.dumps(no_sign, ensure_ascii=False))
+            continue
+        probabilities, info = predict_batched(window, registry.route())
+        result = format_prediction(probabilities, info['inference_time_ms'], {
+            'type': 'prediction',
+            'frame_index': session.frames_received,
+            'batch_size': info['batch_size'],
+            'queue_wait_ms': info['queue_wait_ms'],
+            'model_version': info['model_version'],
+        }, registry.labels_for(info['model_version']))
+        ws.send(json.dumps(result, ensure_ascii=False))
+
+
+if sock is not None:
+    sock.route('/ws/stream')(stream_session)
+
+
+def format_prediction(probabilities, inference_time, extra=None, class_labels=None):
+    """Construye la respuesta JSON con el Top 5"""
+    class_labels = class_labels or labels
+    indices, probs = top_k_batch(probabilities, 5)
     
     result = {
-        'predicted_class': labels[top_5_idx[0]],
-        'confidence': float(top_5_prob[0]),
+        'predicted_class': class_labels[indices[0, 0]],
+        'confidence': float(probs[0, 0]),
         'inference_time_ms': inference_time,
-        'top_5': [
-            {
-                'label': labels[idx],
-                'probability': float(prob)
-            }
-            for idx, prob in zip(top_5_idx, top_5_prob)
-        ]
+        'top_5': format_top_k(class_labels, indices[0], probs[0])
     }
+    if extra:
+        result.update(extra)
+    return result
+
+
+def gated_result(sequence, endpoint, extra=None):
+    """Resultado "sin seña" si la ventana tiene muy pocos frames con mano (None = inferir)"""
+    allowed, hand_frame_count = gate.check(sequence)
+    if allowed:
+        return None
+    INFERENCES_SAVED.labels(endpoint=endpoint).inc()
+    return gate.no_sign_result(hand_frame_count, extra)
+
+
+def make_prediction(sequence):
+    """Hacer predicción (vía caché y micro-batching) y devolver resultados"""
+    sequence = sequence.reshape(24, 126)
+    no_sign = gated_result(sequence, 'predict')
+    if no_sign is not None:
+        return respond(no_sign, None)
+    probabilities, info = run_inference(sequence)
+    
+    with STAGE_POSTPROCESS.time():
+        result = format_prediction(probabilities, info['inference_time_ms'], {
+            'batch_size': info['batch_size'],
+            'queue_wait_ms': info['queue_wait_ms'],
+            'model_version': info['model_version'],
+        }, registry.labels_for(info['model_version']))
+    if 'cache' in info:
+        result['cache'] = info['cache']
+    
+    return respond(result, probabilities)
+
+
+def run_inference(sequence):
+    """
+    (probs, info) para una secuencia (24, 126): elige versión según los pesos
+    canary; la caché (si está activa) solo guarda resultados de la primaria.
+    """
+    version = registry.route()
+    if cache is None or version is not registry.active:
+        return predict_batched(sequence, version)
     
-    return jsonify(result)
+    (probabilities, info), status = cache.get_or_compute(
+        sequence, lambda: predict_batched(sequence, version), namespace=version.version)
+    info = dict(info, cache=status)
+    if status == 'hit':
+        info.update(inference_time_ms=0.0, queue_wait_ms=0.0, batch_size=0)
+    return probabilities, info
+
+
+def predict_batched(sequence, version):
+    """Predicción vía el micro-batcher de la versión, registrando la espera en cola en /metrics"""
+    try:
+        probabilities, info = version.batcher.predict(sequence)
+    except Exception:
+        version.record_request(ok=False)
+        raise
+    version.record_request()
+    MODEL_REQUESTS.labels(version=version.version).inc()
+    STAGE_QUEUE_WAIT.observe(info['queue_wait_ms'] / 1000)
+    registry.compare_with_primary(version, sequence, probabilities)
+    return probabilities, dict(info, model_version=version.version)
+
+
+def respond(result, probabilities):
+    """Serializa la predicción según el header Accept (JSON por defecto)"""
+    with STAGE_SERIALIZE.time():
+        body, mimetype = encode_result(result, probabilities, negotiate(request.accept_mimetypes))
+    response = Response(body, mimetype=mimetype)
+    if mimetype == OCTET_STREAM:
+        response.headers['X-Inference-Time-Ms'] = f"{result['inference_time_ms']:.3f}"
+    return response
+
+
+def encode_result(result, probabilities, response_type):
+    """(bytes, mimetype) de una predicción para el tipo de respuesta negociado"""
+    if response_type == OCTET_STREAM:
+        if probabilities is None:  # "Sin seña": fila con índices -1
+            return encode_topk_binary(np.full((1, 5), -1), np.zeros((1, 5))), OCTET_STREAM
+        indices, probs = top_k_batch(probabilities, 5)
+        return encode_topk_binary(indices, probs), OCTET_STREAM
+    if response_type == MSGPACK:
+        return encode_msgpack(result), MSGPACK
+    return json.dumps(result, ensure_ascii=False).encode('utf-8'), JSON
 
 
 # ============================================================================
@@ -525,6 +1087,14 @@ if __name__ == '__main__':
     print("\n📡 API REST disponible en:")
     print("   GET  http://localhost:5000/api/info")
     print("   POST http://localhost:5000/api/predict")
+    print("   POST http://localhost:5000/api/predict_batch")
+    print("   POST http://localhost:5000/api/timeline")
+    print("   GET  http://localhost:5000/api/stats")
+    print("   GET  http://localhost:5000/metrics")
+    print("   GET  http://localhost:5000/healthz · /readyz")
+    print("   GET  http://localhost:5000/api/models (POST .../<version>/load|activate|unload, /weights)")
+    if sock is not None:
+        print("   WS   ws://localhost:5000/ws/stream")
     print("   GET  http://localhost:5000/api/predict/random")
     print("   GET  http://localhost:5000/api/predict/static")
     print("   GET  http://localhost:5000/api/predict/movement")
@@ -0,0 +1,204 @@
+"""
+Modo de Servicio Async (ASGI) - SignBridge
+El HTTP corre en un event loop y la inferencia en un pool de hilos acotado.
+Si la cola de inferencia se llena se responde 429 con Retry-After en lugar
+de acumular latencia.
+
+POST /api/predict y GET /api/stats se atienden de forma nativa; el resto de
+rutas de server.py (interfaz web, /api/info, /api/predict_batch, ...) pasan
+por el adaptador WSGI → ASGI.
+
+Uso:
+    python server_asgi.py
+    uvicorn server_asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import json
+import os
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+import server
+from bounded_executor import BoundedInferenceExecutor, QueueFullError
+from wire_format import WireFormatError, decode_request, negotiate
+
+ASYNC_WORKERS = int(os.getenv('ASYNC_WORKERS', str(server.BATCH_MAX_SIZE)))
+ASYNC_MAX_QUEUE = int(os.getenv('ASYNC_MAX_QUEUE', '64'))
+
+# Cada worker entrega su secuencia al micro-batcher, así los workers concurrentes
+# se agrupan en una sola llamada al modelo
+executor = BoundedInferenceExecutor(
+    server.run_inference,
+    max_workers=ASYNC_WORKERS,
+    max_queue=ASYNC_MAX_QUEUE,
+)
+flask_app = WsgiToAsgi(server.app)
+
+# La espera en el micro-batcher ya la registra predict_batched() como queue_wait
+STAGE_EXECUTOR_WAIT = server.STAGE_SECONDS.labels(stage='executor_wait')
+BACKPRESSURE_REJECTIONS = server.metrics.counter(
+    'signbridge_backpressure_rejections_total', 'Peticiones rechazadas con 429 por cola llena')
+server.metrics.gauge('signbridge_executor_queue_depth', 'Peticiones esperando un worker de inferencia',
+                     lambda: executor.queue_depth)
+
+print(f"⚡ Modo ASGI: {ASYNC_WORKERS} workers de inferencia, cola máxima {ASYNC_MAX_QUEUE}")
+
+
+# ============================================================================
+# HELPERS ASGI
+# ============================================================================
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+async def send_response(send, status, body, content_type='application/json', headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type.encode('latin-1')),
+            (b'content-length', str(len(body)).encode('latin-1')),
+            (b'access-control-allow-origin', b'*'),
+        ] + [(k.encode('latin-1'), v.encode('latin-1')) for k, v in headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_json(send, status, payload, headers=()):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    await send_response(send, status, body, headers=headers)
+
+
+def request_headers(scope):
+    return {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+
+
+# ============================================================================
+# RUTAS NATIVAS
+# ============================================================================
+
+async def predict(scope, receive, send):
+    """POST /api/predict con backpressure: 429 + Retry-After cuando la cola está llena"""
+    server.REQUESTS.labels(endpoint='predict').inc()
+    if not server.startup.ready:
+        return await send_json(send, 503, {
+            'error': 'Modelo cargando, reintenta en unos segundos',
+            'state': server.startup.state,
+        }, headers=[('Retry-After', '1')])
+    headers = request_headers(scope)
+    body = await read_body(receive)
+
+    try:
+        with server.STAGE_PARSE.time():
+            sequence, _ = decode_request(body, headers.get('content-type'), 'sequence')
+    except WireFormatError as e:
+        server.ERRORS.labels(endpoint='predict').inc()
+        return await send_json(send, e.status, {'error': str(e)})
+
+    if sequence.shape != (24, 126):
+        server.SHAPE_REJECTIONS.labels(endpoint='predict').inc()
+        return await send_json(send, 400, {
+            'error': f'Shape incorrecto. Esperado: (24, 126), recibido: {sequence.shape}'
+        })
+
+    no_sign = server.gated_result(sequence, 'predict')
+    if no_sign is not None:
+        accept = MIMEAccept(parse_accept_header(headers.get('accept', '')))
+        payload, content_type = server.encode_result(no_sign, None, negotiate(accept))
+        return await send_response(send, 200, payload, content_type)
+
+    try:
+        future = executor.submit(sequence)
+    except QueueFullError as e:
+        BACKPRESSURE_REJECTIONS.inc()
+        return await send_json(send, 429, {
+            'error': str(e),
+            'retry_after_s': e.retry_after_s,
+        }, headers=[('Retry-After', str(e.retry_after_s))])
+
+    try:
+        (probabilities, info), timing = await asyncio.wrap_future(future)
+    except Exception as e:
+        server.ERRORS.labels(endpoint='predict').inc()
+        return await send_json(send, 500, {'error': str(e)})
+
+    # Espera total en colas (executor + micro-batcher) separada del cómputo
+    queue_wait_ms = timing['executor_wait_ms'] + info['queue_wait_ms']
+    STAGE_EXECUTOR_WAIT.observe(timing['executor_wait_ms'] / 1000)
+    with server.STAGE_POSTPROCESS.time():
+        result = server.format_prediction(probabilities, info['inference_time_ms'], {
+            'batch_size': info['batch_size'],
+            'queue_wait_ms': queue_wait_ms,
+            'executor_wait_ms': timing['executor_wait_ms'],
+            'model_version': info['model_version'],
+        }, server.registry.labels_for(info['model_version']))
+    if 'cache' in info:
+        result['cache'] = info['cache']
+
+    accept = MIMEAccept(parse_accept_header(headers.get('accept', '')))
+    with server.STAGE_SERIALIZE.time():
+        payload, content_type = server.encode_result(result, probabilities, negotiate(accept))
+    await send_response(send, 200, payload, content_type, headers=[(
+        'Server-Timing',
+        f"queue;dur={queue_wait_ms:.3f}, inference;dur={info['inference_time_ms']:.3f}",
+    )])
+
+
+async def stats(scope, receive, send):
+    payload = server.collect_stats()
+    payload['executor'] = executor.stats()
+    await send_json(send, 200, payload)
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """Aplicación ASGI principal"""
+    if scope['type'] == 'lifespan':
+        return await lifespan(scope, receive, send)
+
+    if scope['type'] == 'http':
+        path, method = scope['path'], scope['method']
+        if path == '/api/predict' and method == 'POST':
+            return await predict(scope, receive, send)
+        if path == '/api/stats' and method == 'GET':
+            return await stats(scope, receive, send)
+
+    return await flask_app(scope, receive, send)
+
+
+# ============================================================================
+# INICIAR SERVIDOR
+# ============================================================================
+
+if __name__ == '__main__':
+    import uvicorn
+
+    port = int(os.getenv('PORT', '5000'))
+    print("\n" + "=" * 70)
+    print("🌐 Servidor ASGI iniciado")
+    print("=" * 70)
+    print(f"\n📍 http://localhost:{port}")
+    print("   POST /api/predict  → 429 + Retry-After si la cola está llena")
+    print("   GET  /api/stats    → incluye 'executor' (espera en cola vs cómputo)")
+    print("\n💡 Presiona Ctrl+C para detener el servidor\n")
+
+    uvicorn.run(app, host='0.0.0.0', port=port)
@@ -0,0 +1,147 @@
+"""
+Arranque rápido de los servidores de inferencia - SignBridge
+Carga el modelo (opcionalmente en segundo plano), pre-traza los tamaños de
+lote configurados y cronometra cada fase del arranque.
+
+Expone /healthz (el proceso responde) y /readyz (modelo cargado y calentado).
+"""
+
+import importlib
+import threading
+import time
+
+import numpy as np
+
+from inference_engine import load_engine
+
+# Referencia para medir el tiempo total hasta estar listo
+PROCESS_START = time.monotonic()
+
+
+def parse_batch_sizes(value, default=(1,)):
+    """'1,4,16' → (1, 4, 16)"""
+    sizes = tuple(sorted({int(v) for v in str(value).split(',') if v.strip()}))
+    return sizes or tuple(default)
+
+
+class ModelStartup:
+    """
+    Carga el motor de inferencia por fases cronometradas:
+    import_tensorflow → load_model → warmup (un trazado por tamaño de lote).
+
+    on_ready(engine) se llama antes de marcar el servidor como listo, para que
+    el script publique el motor en sus variables globales.
+    """
+
+    def __init__(self, model_path, warmup_batch_sizes=(1,), on_ready=None, name="model-loader"):
+        self.model_path = str(model_path)
+        self.warmup_batch_sizes = tuple(warmup_batch_sizes)
+        self.on_ready = on_ready
+        self.name = name
+
+        self.engine = None
+        self.state = "pending"  # pending → loading → warming → ready | failed
+        self.error = None
+        self.phases_ms = {}
+        self.time_to_ready_ms = None
+        self._ready = threading.Event()
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Ciclo de carga
+    # ------------------------------------------------------------------
+
+    def start(self, background=False):
+        """En background el puerto se abre de inmediato; si no, bloquea hasta estar listo"""
+        if background:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            print(f"🧵 Cargando modelo en segundo plano ({self.model_path})")
+            return
+        self._run()
+        if self.state == "failed":
+            raise RuntimeError(f"No se pudo cargar el modelo: {self.error}")
+
+    def _run(self):
+        try:
+            self.state = "loading"
+            if not self.model_path.endswith(".tflite"):
+                self._phase("import_tensorflow", lambda: importlib.import_module("tensorflow"))
+            self.engine = self._phase("load_model", lambda: load_engine(self.model_path))
+
+            self.state = "warming"
+            self._phase("warmup", self._warmup)
+
+            if self.on_ready is not None:
+                self.on_ready(self.engine)
+            self.time_to_ready_ms = (time.monotonic() - PROCESS_START) * 1000
+            self.state = "ready"
+            self._ready.set()
+            print(f"✅ Modelo listo en {self.time_to_ready_ms:.0f}ms desde el inicio del proceso")
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            print(f"❌ Error cargando el modelo: {e}")
+
+    def _phase(self, name, fn):
+        start = time.perf_counter()
+        result = fn()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.phases_ms[name] = elapsed_ms
+        print(f"⏱️  Fase {name}: {elapsed_ms:.0f}ms")
+        return result
+
+    def _warmup(self):
+        """Una inferencia por tamaño de lote: deja trazados los grafos / tensores"""
+        sample_shape = tuple(self.engine.input_shape[1:])
+        for batch_size in self.warmup_batch_sizes:
+            start = time.perf_counter()
+            self.engine.infer(np.zeros((batch_size,) + sample_shape, dtype=np.float32))
+            self.phases_ms[f"warmup_batch_{batch_size}"] = (time.perf_counter() - start) * 1000
+        # Los contadores de latencia no deben incluir el calentamiento
+        self.engine.latency = type(self.engine.latency)()
+
+    # ------------------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------------------
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def health(self):
+        return {
+            "status": "ok",
+            "uptime_s": time.monotonic() - PROCESS_START,
+        }
+
+    def readiness(self):
+        """(payload, status HTTP) para /readyz"""
+        payload = {
+            "ready": self.ready,
+            "state": self.state,
+            "model_path": self.model_path,
+            "backend": self.engine.name if self.engine is not None else None,
+            "warmup_batch_sizes": list(self.warmup_batch_sizes),
+            "phases_ms": dict(self.phases_ms),
+            "time_to_ready_ms": self.time_to_ready_ms,
+        }
+        if self.error:
+            payload["error"] = self.error
+        return payload, (200 if self.ready else 503)
+
+    def register_routes(self, app):
+        """Agrega /healthz y /readyz a una app Flask"""
+        from flask import jsonify
+
+        @app.route("/healthz")
+        def healthz():
+            return jsonify(self.health())
+
+        @app.route("/readyz")
+        def readyz():
+            payload, status = self.readiness()
+            return jsonify(payload), status
@@ -0,0 +1,176 @@
+"""
+Sesiones de streaming con ring buffer - SignBridge
+El cliente envía un frame de 126 floats a la vez; el servidor mantiene la
+ventana de 24 frames por sesión y decide cuándo inferir (stride).
+"""
+
+import threading
+import time
+import uuid
+
+import numpy as np
+
+NUM_FRAMES = 24
+NUM_FEATURES = 126
+
+
+class SessionLimitError(RuntimeError):
+    """Se alcanzó el máximo de sesiones concurrentes"""
+
+
+class FrameRingBuffer:
+    """Ventana circular (24, 126) preasignada; push O(1) sin realocar"""
+
+    def __init__(self, num_frames=NUM_FRAMES, num_features=NUM_FEATURES):
+        self.num_frames = num_frames
+        self.num_features = num_features
+        self._data = np.zeros((num_frames, num_features), dtype=np.float32)
+        self._next = 0
+        self.count = 0
+
+    def push(self, frame):
+        self._data[self._next] = frame
+        self._next = (self._next + 1) % self.num_frames
+        self.count = min(self.count + 1, self.num_frames)
+
+    @property
+    def full(self):
+        return self.count == self.num_frames
+
+    def window(self):
+        """Copia ordenada del más antiguo al más reciente"""
+        if not self.full:
+            return self._data[:self.count].copy()
+        return np.concatenate((self._data[self._next:], self._data[:self._next]))
+
+    def clear(self):
+        self._next = 0
+        self.count = 0
+
+
+class StreamSession:
+    """Estado de una sesión: ring buffer, stride y contadores"""
+
+    def __init__(self, session_id, stride):
+        self.session_id = session_id
+        self.stride = max(1, int(stride))
+        self.buffer = FrameRingBuffer()
+        self.frames_received = 0
+        self.predictions = 0
+        self._frames_since_inference = 0
+        self.last_seen = time.monotonic()
+        self.lock = threading.Lock()
+
+    def push(self, frames):
+        """
+        Agrega uno o más frames (k, 126). Devuelve la ventana a inferir
+        si corresponde según el stride, o None.
+        """
+        frames = np.asarray(frames, dtype=np.float32).reshape(-1, NUM_FEATURES)
+        with self.lock:
+            self.last_seen = time.monotonic()
+            for frame in frames:
+                self.buffer.push(frame)
+            self.frames_received += len(frames)
+            self._frames_since_inference += len(frames)
+
+            if not self.buffer.full or self._frames_since_inference < self.stride:
+                return None
+            self._frames_since_inference = 0
+            self.predictions += 1
+            return self.buffer.window()
+
+    def reset(self):
+        with self.lock:
+            self.buffer.clear()
+            self._frames_since_inference = 0
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    def describe(self):
+        return {
+            'session_id': self.session_id,
+            'stride': self.stride,
+            'window': NUM_FRAMES,
+            'buffered_frames': self.buffer.count,
+            'frames_received': self.frames_received,
+            'predictions': self.predictions,
+        }
+
+
+class SessionManager:
+    """
+    Registro de sesiones con límite de concurrencia y expulsión por inactividad.
+
+    Las sesiones sobreviven a una reconexión (el cliente reenvía su session_id)
+    hasta que pasan `idle_timeout_s` sin recibir frames.
+    """
+
+    def __init__(self, max_sessions=64, idle_timeout_s=60.0, default_stride=4):
+        self.max_sessions = int(max_sessions)
+        self.idle_timeout_s = float(idle_timeout_s)
+        self.default_stride = int(default_stride)
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.rejected = 0
+
+    def open(self, session_id=None, stride=None):
+        """Retoma una sesión existente o crea una nueva"""
+        with self._lock:
+            self._evict_idle_locked()
+            if session_id and session_id in self._sessions:
+                session = self._sessions[session_id]
+                session.touch()
+                if stride:
+                    session.stride = max(1, int(stride))
+                return session
+
+            if len(self._sessions) >= self.max_sessions:
+                self.rejected += 1
+                raise SessionLimitError(
+                    f'Máximo de sesiones concurrentes alcanzado ({self.max_sessions})'
+                )
+            session = StreamSession(session_id or uuid.uuid4().hex, stride or self.default_stride)
+            self._sessions[session.session_id] = session
+            return session
+
+    def close(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def evict_idle(self):
+        with self._lock:
+            return self._evict_idle_locked()
+
+    def _evict_idle_locked(self):
+        now = time.monotonic()
+        idle = [sid for sid, s in self._sessions.items()
+                if now - s.last_seen > self.idle_timeout_s]
+        for sid in idle:
+            del self._sessions[sid]
+        self.evicted += len(idle)
+        return len(idle)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'active_sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'idle_timeout_s': self.idle_timeout_s,
+                'default_stride': self.default_stride,
+                'evicted': self.evicted,
+                'rejected': self.rejected,
+            }
+
+
+def decode_binary_frames(message):
+    """Mensaje WebSocket binario (k × 126 float32 little-endian) → vista (k, 126)"""
+    if len(message) == 0 or len(message) % (NUM_FEATURES * 4) != 0:
+        raise ValueError(f'Mensaje binario debe contener múltiplos de {NUM_FEATURES} float32')
+    return np.frombuffer(message, dtype='<f4').reshape(-1, NUM_FEATURES)
@@ -0,0 +1,164 @@
+"""
+Generador de Secuencias Sintéticas - SignBridge
+Lotes (N, 24, 126) de patrones de landmarks generados con NumPy vectorizado
+(sin bucles por frame ni por landmark) y un RNG con semilla.
+
+Patrones:
+- Features planos (los de /api/predict/<patrón> en server.py):
+    random, static, movement, dynamic
+- Geometría de mano (muñeca + 20 landmarks alrededor, los de demo_model.py):
+    hand_static, move_right, move_up, open_close
+
+Uso:
+    batch = generate_batch("open_close", 10_000, rng=42)
+    for batch, pattern_ids in stream_batches(1024, seed=0):  # infinito
+        ...
+"""
+
+import numpy as np
+
+NUM_FRAMES = 24
+NUM_FEATURES = 126
+NUM_LANDMARKS = 21
+
+# Landmark i se ubica en el ángulo i/21·2π; la distancia a la muñeca varía con i % 4
+_ANGLES = np.arange(NUM_LANDMARKS) / NUM_LANDMARKS * 2 * np.pi
+_COS = np.cos(_ANGLES).astype(np.float32)
+_SIN = np.sin(_ANGLES).astype(np.float32)
+_WRIST_MASK = (np.arange(NUM_LANDMARKS) > 0).astype(np.float32)  # La muñeca (0) no se desplaza
+_HAND_DIST = (0.05 + (np.arange(NUM_LANDMARKS) % 4) * 0.02).astype(np.float32) * _WRIST_MASK
+_RIGHT_HAND_OFFSET_X = 0.1
+
+
+def _rng(rng):
+    """Acepta una semilla, un Generator o None"""
+    return np.random.default_rng(rng)
+
+
+def _progress(num_frames):
+    """(1, F, 1) con i / F para broadcasting sobre (N, F, ·)"""
+    return (np.arange(num_frames, dtype=np.float32) / num_frames)[np.newaxis, :, np.newaxis]
+
+
+# ============================================================================
+# FEATURES PLANOS (server.py)
+# ============================================================================
+
+def _flat(rng, n, num_frames, left, right, noise):
+    out = np.empty((n, num_frames, NUM_FEATURES), dtype=np.float32)
+    out[..., :63] = left
+    out[..., 63:] = right
+    out += rng.standard_normal(out.shape, dtype=np.float32) * np.float32(noise)
+    return out
+
+
+def _random(rng, n, num_frames):
+    return rng.random((n, num_frames, NUM_FEATURES), dtype=np.float32)
+
+
+def _static(rng, n, num_frames):
+    return _flat(rng, n, num_frames, 0.5, 0.6, 0.02)
+
+
+def _movement(rng, n, num_frames):
+    progress = _progress(num_frames)
+    return _flat(rng, n, num_frames, 0.3 + progress * 0.4, 0.4 + progress * 0.3, 0.02)
+
+
+def _dynamic(rng, n, num_frames):
+    spread = 0.5 + 0.2 * np.sin(_progress(num_frames) * 2 * np.pi)
+    return _flat(rng, n, num_frames, spread, spread + 0.1, 0.03)
+
+
+# ============================================================================
+# GEOMETRÍA DE MANO (demo_model.py)
+# ============================================================================
+
+def _hand(rng, n, num_frames, base_x, base_y, dist):
+    """
+    (N, F, 63) con x, y, z intercalados por landmark.
+    base_x / base_y: broadcast a (N, F, 1); dist: (21,) o (1, F, 21)
+    """
+    shape = (n, num_frames, NUM_LANDMARKS)
+    hand = np.empty(shape + (3,), dtype=np.float32)
+    hand[..., 0] = base_x + _COS * dist
+    hand[..., 1] = base_y + _SIN * dist
+    hand[..., 2] = rng.uniform(-0.02, 0.02, size=shape).astype(np.float32) * _WRIST_MASK
+    return hand.reshape(n, num_frames, NUM_LANDMARKS * 3)
+
+
+def _two_hands(rng, n, num_frames, base_x=0.5, base_y=0.5, dist=_HAND_DIST):
+    out = np.empty((n, num_frames, NUM_FEATURES), dtype=np.float32)
+    out[..., :63] = _hand(rng, n, num_frames, base_x, base_y, dist)
+    out[..., 63:] = _hand(rng, n, num_frames, base_x, base_y, dist)
+    out[..., 63::3] += _RIGHT_HAND_OFFSET_X
+    return out
+
+
+def _hand_static(rng, n, num_frames):
+    return _two_hands(rng, n, num_frames)
+
+
+def _move_right(rng, n, num_frames):
+    return _two_hands(rng, n, num_frames, base_x=0.3 + _progress(num_frames) * 0.4)
+
+
+def _move_up(rng, n, num_frames):
+    return _two_hands(rng, n, num_frames, base_y=0.7 - _progress(num_frames) * 0.4)
+
+
+def _open_close(rng, n, num_frames):
+    spread = 0.05 + 0.03 * np.sin(_progress(num_frames) * 2 * np.pi)  # (1, F, 1)
+    return _two_hands(rng, n, num_frames, dist=spread * _WRIST_MASK)
+
+
+PATTERNS = {
+    "random": _random,
+    "static": _static,
+    "movement": _movement,
+    "dynamic": _dynamic,
+    "hand_static": _hand_static,
+    "move_right": _move_right,
+    "move_up": _move_up,
+    "open_close": _open_close,
+}
+
+
+# ============================================================================
+# API
+# ============================================================================
+
+def generate_batch(pattern, n=1, rng=None, num_frames=NUM_FRAMES, dtype=np.float32):
+    """(n, num_frames, 126) del patrón indicado"""
+    if pattern not in PATTERNS:
+        raise ValueError(f"Patrón desconocido '{pattern}'. Opciones: {', '.join(PATTERNS)}")
+    batch = PATTERNS[pattern](_rng(rng), int(n), int(num_frames))
+    return batch if dtype == np.float32 else batch.astype(dtype)
+
+
+def generate_sequence(pattern, rng=None, num_frames=NUM_FRAMES):
+    """Una secuencia (num_frames, 126)"""
+    return generate_batch(pattern, 1, rng, num_frames)[0]
+
+
+def generate_mixed(n, patterns=None, rng=None, num_frames=NUM_FRAMES):
+    """
+    Lote mezclado en orden aleatorio: (batch (n, F, 126), ids (n,)) donde ids
+    indexa `patterns` (default: todos los de PATTERNS).
+    """
+    rng = _rng(rng)
+    patterns = list(patterns or PATTERNS)
+    counts = rng.multinomial(int(n), [1 / len(patterns)] * len(patterns))
+    batch = np.concatenate([
+        generate_batch(pattern, count, rng, num_frames) for pattern, count in zip(patterns, counts)
+    ])
+    ids = np.repeat(np.arange(len(patterns)), counts)
+    order = rng.permutation(int(n))
+    return batch[order], ids[order]
+
+
+def stream_batches(batch_size=1024, patterns=None, seed=None, num_frames=NUM_FRAMES):
+    """Generador infinito de (batch, ids) para benchmarks; reproducible con `seed`"""
+    rng = _rng(seed)
+    while True:
+        yield generate_mixed(batch_size, patterns, rng, num_frames)
@@ -0,0 +1,9 @@
+"""
+Configuración de pytest - SignBridge
+Los módulos del servidor son planos en assets/model/, sin paquete.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
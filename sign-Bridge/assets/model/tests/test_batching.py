@@ -0,0 +1,125 @@
+"""
+Pruebas de MicroBatcher - SignBridge
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from batching import MicroBatcher
+
+SEQUENCE_SHAPE = (24, 126)
+NUM_CLASSES = 5
+
+
+def _probs(inputs):
+    """(N, 24, 126) → (N, 5) con la media de cada secuencia en todas las columnas"""
+    means = inputs.reshape(len(inputs), -1).mean(axis=1)
+    return np.repeat(means[:, None], NUM_CLASSES, axis=1)
+
+
+@pytest.fixture
+def make_batcher():
+    batchers = []
+
+    def factory(predict_fn=_probs, **kwargs):
+        kwargs.setdefault('max_delay_ms', 1.0)
+        batcher = MicroBatcher(predict_fn, **kwargs)
+        batchers.append(batcher)
+        return batcher
+
+    yield factory
+    for batcher in batchers:
+        batcher.close()
+
+
+def test_each_caller_gets_its_own_row(make_batcher):
+    batcher = make_batcher(max_batch_size=8, max_delay_ms=50.0)
+    futures = [batcher.submit(np.full(SEQUENCE_SHAPE, i, dtype=np.float32)) for i in range(8)]
+
+    for i, future in enumerate(futures):
+        probs, info = future.result(timeout=2)
+        assert probs.shape == (NUM_CLASSES,)
+        assert np.allclose(probs, i)
+        assert info['batch_size'] == 8
+
+    stats = batcher.stats()
+    assert stats['requests'] == 8
+    assert stats['batches'] == 1
+    assert stats['errors'] == 0
+
+
+def test_batch_never_exceeds_max_batch_size(make_batcher):
+    batcher = make_batcher(max_batch_size=3, max_delay_ms=50.0)
+    futures = [batcher.submit(np.zeros(SEQUENCE_SHAPE)) for _ in range(7)]
+
+    sizes = [future.result(timeout=2)[1]['batch_size'] for future in futures]
+    assert max(sizes) <= 3
+    assert sum(batcher.stats()['batch_size_histogram'].values()) == batcher.stats()['batches']
+
+
+def test_predict_fn_exception_reaches_every_future(make_batcher):
+    def broken(inputs):
+        raise RuntimeError("modelo roto")
+
+    batcher = make_batcher(broken, max_batch_size=4, max_delay_ms=50.0)
+    futures = [batcher.submit(np.zeros(SEQUENCE_SHAPE)) for _ in range(4)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="modelo roto"):
+            future.result(timeout=2)
+    assert batcher.stats()['errors'] == 4
+    assert batcher.stats()['batches'] == 0
+
+
+def test_row_count_mismatch_is_an_error(make_batcher):
+    batcher = make_batcher(lambda inputs: _probs(inputs)[:1], max_batch_size=2, max_delay_ms=50.0)
+    futures = [batcher.submit(np.zeros(SEQUENCE_SHAPE)) for _ in range(2)]
+
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=2)
+    assert batcher.stats()['errors'] == 2
+
+
+def test_futures_resolved_before_on_batch(make_batcher):
+    futures = []
+    seen = []
+    hook_ran = threading.Event()
+
+    def on_batch(size, inference_ms):
+        seen.append([future.done() for future in futures])
+        hook_ran.set()
+
+    batcher = make_batcher(max_batch_size=2, max_delay_ms=50.0, on_batch=on_batch)
+    futures.extend(batcher.submit(np.zeros(SEQUENCE_SHAPE)) for _ in range(2))
+
+    assert hook_ran.wait(2)
+    assert seen == [[True, True]]
+
+
+def test_failing_on_batch_does_not_break_results(make_batcher):
+    def on_batch(size, inference_ms):
+        raise RuntimeError("métricas caídas")
+
+    batcher = make_batcher(on_batch=on_batch)
+    probs, _ = batcher.predict(np.ones(SEQUENCE_SHAPE), timeout=2)
+    assert np.allclose(probs, 1.0)
+
+    # El hilo despachador sigue vivo para el siguiente lote
+    probs, _ = batcher.predict(np.zeros(SEQUENCE_SHAPE), timeout=2)
+    assert np.allclose(probs, 0.0)
+    assert batcher.stats()['errors'] == 0
+
+
+def test_submit_after_close_raises(make_batcher):
+    batcher = make_batcher()
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(np.zeros(SEQUENCE_SHAPE))
+
+
+def test_invalid_max_batch_size():
+    with pytest.raises(ValueError):
+        MicroBatcher(_probs, max_batch_size=0)
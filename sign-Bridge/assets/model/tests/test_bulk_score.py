@@ -0,0 +1,150 @@
+"""
+Pruebas de reanudación de bulk_score - SignBridge
+El motor se reemplaza por uno falso: no hace falta TensorFlow.
+"""
+
+import csv
+import json
+import sys
+
+import numpy as np
+import pytest
+
+import bulk_score
+import inference_engine
+
+LABELS = ['hola', 'gracias', 'adios']
+
+
+class _Latency:
+    def as_dict(self):
+        return {'avg_ms_per_sample': 0.0}
+
+
+class _FakeEngine:
+    """Probabilidades deterministas por secuencia; puede simular un Ctrl+C tras N lotes"""
+
+    name = 'fake'
+
+    def __init__(self, interrupt_after=None):
+        self.interrupt_after = interrupt_after
+        self.batches = 0
+        self.latency = _Latency()
+
+    def infer(self, batch):
+        if self.interrupt_after is not None and self.batches >= self.interrupt_after:
+            raise KeyboardInterrupt
+        self.batches += 1
+        means = batch.reshape(len(batch), -1).mean(axis=1)
+        logits = means[:, None] * np.array([1.0, 2.0, 3.0], dtype=np.float32)
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    rng = np.random.default_rng(7)
+    np.save(tmp_path / 'shard_a.npy', rng.uniform(-1, 1, (10, 24, 126)).astype(np.float32))
+    np.save(tmp_path / 'shard_b.npy', rng.uniform(-1, 1, (7, 24, 126)).astype(np.float32))
+    (tmp_path / 'labels.json').write_text(json.dumps(LABELS), encoding='utf-8')
+    return tmp_path
+
+
+def _run(monkeypatch, corpus, output, *extra, engine=None):
+    engine = engine or _FakeEngine()
+    monkeypatch.setattr(inference_engine, 'load_engine', lambda path, backend=None: engine)
+    monkeypatch.setattr(sys, 'argv', [
+        'bulk_score.py', str(corpus / 'shard_a.npy'), str(corpus / 'shard_b.npy'),
+        '--output', str(output), '--labels', str(corpus / 'labels.json'),
+        '--model', str(corpus / 'model.tflite'), '--batch-size', '4', '--top-k', '2', *extra,
+    ])
+    bulk_score.main()
+    return engine
+
+
+def _checkpoint(output):
+    with open(f'{output}.checkpoint.json', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def reference(monkeypatch, corpus):
+    """Salida de una corrida completa sin interrupciones"""
+    output = corpus / 'reference.csv'
+    _run(monkeypatch, corpus, output)
+    return output.read_bytes()
+
+
+def test_full_run(reference, corpus):
+    rows = list(csv.reader(reference.decode('utf-8').splitlines()))
+    assert rows[0] == ['source', 'index', 'top1_label', 'top1_prob', 'top2_label', 'top2_prob']
+    assert len(rows) == 1 + 17
+    assert _checkpoint(corpus / 'reference.csv')['done'] is True
+
+
+def test_interrupted_run_resumes_to_identical_output(monkeypatch, corpus, reference):
+    output = corpus / 'scores.csv'
+    _run(monkeypatch, corpus, output, engine=_FakeEngine(interrupt_after=2))
+    state = _checkpoint(output)
+    assert (state['shard'], state['offset'], state['rows'], state['done']) == (0, 8, 8, False)
+
+    engine = _run(monkeypatch, corpus, output)
+    assert engine.batches == 3  # shard_a[8:10], shard_b[0:4], shard_b[4:7]
+    assert output.read_bytes() == reference
+
+
+def test_resume_discards_bytes_written_after_checkpoint(monkeypatch, corpus, reference):
+    output = corpus / 'scores.csv'
+    _run(monkeypatch, corpus, output, engine=_FakeEngine(interrupt_after=1))
+    with open(output, 'ab') as f:
+        f.write(b'fila,a medio escr')
+
+    _run(monkeypatch, corpus, output)
+    assert output.read_bytes() == reference
+
+
+@pytest.mark.parametrize('damage', ['missing', 'truncated'])
+def test_resume_starts_over_when_output_is_missing_or_short(monkeypatch, corpus, reference, damage):
+    output = corpus / 'scores.csv'
+    _run(monkeypatch, corpus, output, engine=_FakeEngine(interrupt_after=2))
+    if damage == 'missing':
+        output.unlink()
+    else:
+        output.write_bytes(output.read_bytes()[:10])
+
+    engine = _run(monkeypatch, corpus, output)
+    assert engine.batches == 5
+    data = output.read_bytes()
+    assert b'\x00' not in data
+    assert data == reference
+
+
+def test_checkpoint_from_another_run_is_rejected(monkeypatch, corpus):
+    output = corpus / 'scores.csv'
+    _run(monkeypatch, corpus, output, engine=_FakeEngine(interrupt_after=1))
+    with pytest.raises(SystemExit):
+        _run(monkeypatch, corpus, output, '--top-k', '3')
+
+    # --restart descarta el checkpoint y reescribe la salida
+    _run(monkeypatch, corpus, output, '--top-k', '3', '--restart')
+    assert _checkpoint(output)['done'] is True
+
+
+def test_header_and_rows_use_the_clamped_top_k(monkeypatch, corpus):
+    output = corpus / 'scores.csv'
+    _run(monkeypatch, corpus, output, '--top-k', '10')
+
+    rows = list(csv.reader(output.read_text(encoding='utf-8').splitlines()))
+    assert rows[0] == bulk_score.csv_header(len(LABELS)).strip().split(',')
+    assert {len(row) for row in rows} == {2 + 2 * len(LABELS)}
+
+
+def test_jsonl_output(monkeypatch, corpus):
+    output = corpus / 'scores.jsonl'
+    _run(monkeypatch, corpus, output)
+
+    records = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+    assert len(records) == 17
+    assert records[0]['source'].endswith('shard_a.npy')
+    assert records[-1]['index'] == 6
+    assert all(record['predicted_class'] == record['top_k'][0]['label'] for record in records)
@@ -0,0 +1,76 @@
+"""
+Pruebas de DropOldestQueue - SignBridge
+"""
+
+import threading
+import time
+
+from camera_pipeline import DropOldestQueue
+
+
+def test_fifo_within_capacity():
+    queue = DropOldestQueue(maxsize=3)
+    for item in (1, 2, 3):
+        queue.put(item)
+    assert len(queue) == 3
+    assert [queue.get(timeout=0) for _ in range(3)] == [1, 2, 3]
+
+
+def test_put_drops_oldest_when_full():
+    queue = DropOldestQueue(maxsize=2)
+    for item in range(5):
+        queue.put(item)
+
+    assert [queue.get(timeout=0), queue.get(timeout=0)] == [3, 4]
+    stats = queue.stats()
+    assert stats['put'] == 5
+    assert stats['dropped'] == 3
+    assert stats['depth'] == 0
+
+
+def test_get_timeout_returns_none():
+    queue = DropOldestQueue()
+    start = time.perf_counter()
+    assert queue.get(timeout=0.05) is None
+    assert time.perf_counter() - start >= 0.04
+
+
+def test_close_wakes_blocked_consumer():
+    queue = DropOldestQueue()
+    results = []
+    consumer = threading.Thread(target=lambda: results.append(queue.get()))
+    consumer.start()
+    time.sleep(0.05)
+    queue.close()
+    consumer.join(2)
+    assert not consumer.is_alive()
+    assert results == [None]
+
+
+def test_put_wakes_blocked_consumer():
+    queue = DropOldestQueue()
+    results = []
+    consumer = threading.Thread(target=lambda: results.append(queue.get(timeout=2)))
+    consumer.start()
+    queue.put('frame')
+    consumer.join(2)
+    assert results == ['frame']
+
+
+def test_items_left_after_close_are_still_delivered():
+    queue = DropOldestQueue(maxsize=2)
+    queue.put('a')
+    queue.close()
+    assert queue.get() == 'a'
+    assert queue.get() is None
+
+
+def test_mean_occupancy_and_minimum_size():
+    queue = DropOldestQueue(maxsize=0)
+    assert queue.maxsize == 1
+    assert queue.stats()['mean_occupancy'] == 0.0
+
+    queue = DropOldestQueue(maxsize=4)
+    queue.put(1)  # profundidad 1
+    queue.put(2)  # profundidad 2
+    assert queue.stats()['mean_occupancy'] == 1.5 / 4
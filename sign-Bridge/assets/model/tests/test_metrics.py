@@ -0,0 +1,84 @@
+"""
+Pruebas de las métricas Prometheus - SignBridge
+"""
+
+import math
+
+import pytest
+
+from metrics import MetricsRegistry, _format_value
+
+
+def _samples(text):
+    """Líneas de muestra (sin # HELP / # TYPE) → {nombre con labels: valor}"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = value
+    return samples
+
+
+@pytest.mark.parametrize('value, expected', [
+    (float('nan'), 'NaN'),
+    (float('inf'), '+Inf'),
+    (float('-inf'), '-Inf'),
+    (3.0, '3'),
+    (-2, '-2'),
+    (0.25, '0.25'),
+])
+def test_format_value(value, expected):
+    assert _format_value(value) == expected
+
+
+def test_counter_with_labels():
+    registry = MetricsRegistry()
+    requests = registry.counter('signbridge_requests_total', 'Peticiones', ['endpoint'])
+    requests.labels(endpoint='/api/predict').inc()
+    requests.labels(endpoint='/api/predict').inc(2)
+    requests.labels(endpoint='/say "hi"').inc()
+
+    text = registry.render()
+    assert '# TYPE signbridge_requests_total counter' in text
+    samples = _samples(text)
+    assert samples['signbridge_requests_total{endpoint="/api/predict"}'] == '3'
+    assert samples['signbridge_requests_total{endpoint="/say \\"hi\\""}'] == '1'
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram('signbridge_latency_seconds', 'Latencia', buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+
+    samples = _samples(registry.render())
+    assert samples['signbridge_latency_seconds_bucket{le="0.1"}'] == '2'
+    assert samples['signbridge_latency_seconds_bucket{le="1"}'] == '3'
+    assert samples['signbridge_latency_seconds_bucket{le="+Inf"}'] == '4'
+    assert samples['signbridge_latency_seconds_count'] == '4'
+    assert math.isclose(float(samples['signbridge_latency_seconds_sum']), 3.65)
+
+
+def test_gauges_render_nan_and_infinities():
+    registry = MetricsRegistry()
+    registry.gauge('signbridge_nan', 'NaN', lambda: float('nan'))
+    registry.gauge('signbridge_bounds', 'Límites', lambda: {'low': float('-inf'), 'high': float('inf')}, ['side'])
+
+    samples = _samples(registry.render())
+    assert samples['signbridge_nan'] == 'NaN'
+    assert samples['signbridge_bounds{side="low"}'] == '-Inf'
+    assert samples['signbridge_bounds{side="high"}'] == '+Inf'
+
+
+def test_gauge_skips_none_and_failing_callbacks():
+    registry = MetricsRegistry()
+    registry.gauge('signbridge_missing', 'Sin valor', lambda: None)
+    registry.gauge('signbridge_broken', 'Falla', lambda: 1 / 0)
+    registry.gauge('signbridge_depth', 'Cola', lambda: {('a', 'x'): 2, ('b', 'y'): None}, ['queue', 'kind'])
+
+    text = registry.render()
+    samples = _samples(text)
+    assert '# TYPE signbridge_broken gauge' in text
+    assert 'signbridge_missing' not in samples
+    assert not any(name.startswith('signbridge_broken') for name in samples)
+    assert samples == {'signbridge_depth{queue="a",kind="x"}': '2'}
@@ -0,0 +1,192 @@
+"""
+Pruebas del registro de modelos (rutas de bundles y ruteo canary) - SignBridge
+"""
+
+import json
+import os
+import time
+from collections import Counter
+
+import pytest
+
+import model_registry
+from model_registry import LABELS_FILE, ModelRegistry, ModelRegistryError, version_sort_key
+
+
+class _Engine:
+    name = 'fake'
+
+    def describe(self):
+        return {'backend': self.name}
+
+
+class _Batcher:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def stats(self):
+        return {}
+
+
+def _bundle(root, version, model_file='model.tflite', labels=True):
+    path = root / version
+    path.mkdir()
+    if model_file:
+        (path / model_file).write_bytes(b'modelo')
+    if labels:
+        (path / LABELS_FILE).write_text(json.dumps(['hola', 'gracias']), encoding='utf-8')
+    return path
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = ModelRegistry(str(tmp_path / 'models'), lambda engine, version: _Batcher(), drain_s=0)
+    os.mkdir(registry.root)
+    return registry
+
+
+def _register(registry, *versions):
+    for version in versions:
+        registry.register(version, _Engine(), ['hola', 'gracias'])
+
+
+# ----------------------------------------------------------------------------
+# resolve / available
+# ----------------------------------------------------------------------------
+
+def test_resolve_valid_bundle(registry, tmp_path):
+    bundle = _bundle(tmp_path / 'models', 'v1')
+    model_path, labels_path = registry.resolve('v1')
+    assert model_path == os.path.join(os.path.realpath(bundle), 'model.tflite')
+    assert labels_path == os.path.join(os.path.realpath(bundle), LABELS_FILE)
+
+
+@pytest.mark.parametrize('version', ['..', '.', '../v1', 'v1/../v2', '/etc', 'v 1', '', 'v1\x00'])
+def test_resolve_rejects_unsafe_names(registry, tmp_path, version):
+    _bundle(tmp_path / 'models', 'v1')
+    with pytest.raises(ModelRegistryError) as excinfo:
+        registry.resolve(version)
+    assert excinfo.value.status == 400
+
+
+@pytest.mark.skipif(not hasattr(os, 'symlink'), reason='sin symlinks')
+def test_resolve_rejects_symlink_outside_root(registry, tmp_path):
+    outside = _bundle(tmp_path, 'fuera')
+    try:
+        os.symlink(outside, tmp_path / 'models' / 'escape')
+    except OSError:
+        pytest.skip('no se pueden crear symlinks')
+    with pytest.raises(ModelRegistryError) as excinfo:
+        registry.resolve('escape')
+    assert excinfo.value.status == 400
+
+
+def test_resolve_missing_and_incomplete_bundles(registry, tmp_path):
+    with pytest.raises(ModelRegistryError) as excinfo:
+        registry.resolve('v9')
+    assert excinfo.value.status == 404
+
+    _bundle(tmp_path / 'models', 'sin-labels', labels=False)
+    _bundle(tmp_path / 'models', 'sin-modelo', model_file=None)
+    for version in ('sin-labels', 'sin-modelo'):
+        with pytest.raises(ModelRegistryError) as excinfo:
+            registry.resolve(version)
+        assert excinfo.value.status == 400
+
+
+def test_resolve_without_root_is_409():
+    registry = ModelRegistry(None, lambda engine, version: _Batcher())
+    with pytest.raises(ModelRegistryError) as excinfo:
+        registry.resolve('v1')
+    assert excinfo.value.status == 409
+    assert registry.available() == []
+
+
+def test_available_uses_natural_order(registry, tmp_path):
+    for version in ('v10', 'v2', 'beta', 'v1.10', 'v1.9', 'v1'):
+        _bundle(tmp_path / 'models', version)
+    (tmp_path / 'models' / 'notas.txt').write_text('no es un bundle')
+    assert registry.available() == ['beta', 'v1', 'v1.9', 'v1.10', 'v2', 'v10']
+    assert version_sort_key('v2') < version_sort_key('v10')
+
+
+# ----------------------------------------------------------------------------
+# Ruteo
+# ----------------------------------------------------------------------------
+
+def test_route_without_versions(registry):
+    assert registry.route() is None
+    assert registry.active is None
+
+
+def test_first_registered_version_is_primary(registry):
+    activated = []
+    registry.on_activate = activated.append
+    _register(registry, 'v1', 'v2')
+
+    assert registry.active.version == 'v1'
+    assert registry.weights() == {'v1': 100.0, 'v2': 0.0}
+    assert [model_version.version for model_version in activated] == ['v1']
+    assert {registry.route().version for _ in range(50)} == {'v1'}
+
+
+def test_route_splits_traffic_by_weight(registry, monkeypatch):
+    _register(registry, 'v1', 'v2')
+    registry.set_weights({'v1': 75, 'v2': 25})
+
+    draws = iter(i / 100 for i in range(100))
+    monkeypatch.setattr(model_registry.random, 'random', lambda: next(draws))
+    counts = Counter(registry.route().version for _ in range(100))
+    assert counts == {'v1': 75, 'v2': 25}
+
+
+def test_route_falls_back_to_primary_with_zero_weights(registry):
+    _register(registry, 'v1', 'v2')
+    registry.set_weights({'v1': 0, 'v2': 0})
+    assert registry.route().version == 'v1'
+
+
+def test_set_weights_validation(registry):
+    _register(registry, 'v1')
+    with pytest.raises(ModelRegistryError) as excinfo:
+        registry.set_weights({'v9': 10})
+    assert excinfo.value.status == 404
+    with pytest.raises(ModelRegistryError) as excinfo:
+        registry.set_weights({'v1': -1})
+    assert excinfo.value.status == 400
+    assert registry.weights() == {'v1': 100.0}
+
+
+def test_activate_moves_all_traffic(registry):
+    _register(registry, 'v1', 'v2')
+    registry.set_weights({'v2': 50})
+    registry.activate('v2')
+
+    assert registry.active.version == 'v2'
+    assert registry.weights() == {'v1': 0.0, 'v2': 100.0}
+    assert {registry.route().version for _ in range(50)} == {'v2'}
+
+
+def test_unload_canary_closes_its_batcher(registry):
+    _register(registry, 'v1')
+    canary = registry.register('v2', _Engine(), ['hola', 'gracias'])
+    registry.set_weights({'v2': 50})
+
+    with pytest.raises(ModelRegistryError) as excinfo:
+        registry.unload('v1')
+    assert excinfo.value.status == 409
+
+    registry.unload('v2')
+    assert {registry.route().version for _ in range(50)} == {'v1'}
+    with pytest.raises(ModelRegistryError) as excinfo:
+        registry.unload('v2')
+    assert excinfo.value.status == 404
+
+    # drain_s=0: el Timer cierra el batcher casi de inmediato
+    deadline = time.monotonic() + 2
+    while not canary.batcher.closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert canary.batcher.closed
@@ -0,0 +1,178 @@
+"""
+Pruebas de PredictionCache - SignBridge
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+import prediction_cache
+from prediction_cache import PredictionCache, sequence_fingerprint
+
+
+def _sequence(value=0.0):
+    return np.full((24, 126), value, dtype=np.float32)
+
+
+class _Clock:
+    """Reemplazo de time.monotonic que solo avanza a mano"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(prediction_cache.time, 'monotonic', clock)
+    return clock
+
+
+def test_fingerprint_ignores_noise_below_precision():
+    base = _sequence(0.5)
+    assert sequence_fingerprint(base) == sequence_fingerprint(base + 1e-5)
+    assert sequence_fingerprint(base) != sequence_fingerprint(base + 1e-2)
+    # El shape forma parte de la clave
+    assert sequence_fingerprint(np.zeros((2, 3))) != sequence_fingerprint(np.zeros((3, 2)))
+
+
+def test_hit_after_miss():
+    cache = PredictionCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return np.arange(5, dtype=np.float32)
+
+    value, status = cache.get_or_compute(_sequence(), compute)
+    assert status == 'miss'
+    value, status = cache.get_or_compute(_sequence(), compute)
+    assert status == 'hit'
+    assert np.array_equal(value, np.arange(5))
+    assert len(calls) == 1
+
+
+def test_namespace_separates_model_versions():
+    cache = PredictionCache()
+    cache.get_or_compute(_sequence(), lambda: 'v1', namespace='v1')
+    value, status = cache.get_or_compute(_sequence(), lambda: 'v2', namespace='v2')
+    assert (value, status) == ('v2', 'miss')
+
+
+def test_ttl_expiration(clock):
+    cache = PredictionCache(ttl_s=10)
+    cache.get_or_compute(_sequence(), lambda: 1)
+
+    clock.now += 9
+    assert cache.get_or_compute(_sequence(), lambda: 2) == (1, 'hit')
+
+    clock.now += 2
+    assert cache.get_or_compute(_sequence(), lambda: 3) == (3, 'miss')
+    assert cache.stats()['expirations'] == 1
+
+
+def test_byte_budget_evicts_least_recently_used():
+    row = np.zeros(256, dtype=np.float32)  # 1 KiB
+    entry = row.nbytes + prediction_cache._ENTRY_OVERHEAD_BYTES
+    cache = PredictionCache(max_bytes=2 * entry)
+
+    cache.get_or_compute(_sequence(1), row.copy)
+    cache.get_or_compute(_sequence(2), row.copy)
+    cache.get_or_compute(_sequence(1), row.copy)  # 1 pasa a ser el más reciente
+    cache.get_or_compute(_sequence(3), row.copy)
+
+    stats = cache.stats()
+    assert stats['entries'] == 2
+    assert stats['bytes'] <= cache.max_bytes
+    assert stats['evictions'] == 1
+    assert cache.get_or_compute(_sequence(1), row.copy)[1] == 'hit'
+    assert cache.get_or_compute(_sequence(2), row.copy)[1] == 'miss'
+
+
+def test_entry_larger_than_budget_is_not_stored():
+    cache = PredictionCache(max_bytes=1024)
+    big = np.zeros(1024, dtype=np.float32)
+    assert cache.get_or_compute(_sequence(), big.copy)[1] == 'miss'
+    assert cache.stats()['entries'] == 0
+    assert cache.stats()['bytes'] == 0
+
+
+def test_row_views_are_copied_before_caching():
+    batch = np.ones((32, 67), dtype=np.float32)
+    (probs, info), status = PredictionCache().get_or_compute(_sequence(), lambda: (batch[3], {'batch_size': 32}))
+    assert status == 'miss'
+    assert probs.base is None
+    assert np.array_equal(probs, batch[3])
+    assert info == {'batch_size': 32}
+
+
+def test_identical_concurrent_requests_are_coalesced():
+    cache = PredictionCache()
+    release = threading.Event()
+    started = threading.Event()
+    calls = []
+
+    def slow_compute():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return 'resultado'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_compute(_sequence(), slow_compute)))
+    leader.start()
+    assert started.wait(2)
+
+    follower = threading.Thread(target=lambda: results.append(cache.get_or_compute(_sequence(), slow_compute)))
+    follower.start()
+    while cache.stats()['coalesced'] == 0:
+        follower.join(0.01)
+    release.set()
+    leader.join(2)
+    follower.join(2)
+
+    assert len(calls) == 1
+    assert sorted(status for _, status in results) == ['coalesced', 'miss']
+    assert all(value == 'resultado' for value, _ in results)
+    assert cache.stats()['inflight'] == 0
+
+
+def test_compute_exception_propagates_and_is_not_cached():
+    cache = PredictionCache()
+
+    def broken():
+        raise RuntimeError("inferencia falló")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute(_sequence(), broken)
+    assert cache.stats()['inflight'] == 0
+    assert cache.get_or_compute(_sequence(), lambda: 'ok') == ('ok', 'miss')
+
+
+def test_clear_bumps_generation_and_drops_inflight_result():
+    cache = PredictionCache()
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_compute():
+        started.set()
+        release.wait(2)
+        return 'modelo viejo'
+
+    worker = threading.Thread(target=cache.get_or_compute, args=(_sequence(), slow_compute))
+    worker.start()
+    assert started.wait(2)
+
+    cache.clear()
+    # Tras clear() no se comparte el cálculo en curso: esta petición calcula de nuevo
+    assert cache.get_or_compute(_sequence(), lambda: 'modelo nuevo') == ('modelo nuevo', 'miss')
+
+    release.set()
+    worker.join(2)
+    # El resultado de la generación anterior no pisa al nuevo
+    assert cache.get_or_compute(_sequence(), lambda: 'otro') == ('modelo nuevo', 'hit')
+    assert cache.stats()['inflight'] == 0
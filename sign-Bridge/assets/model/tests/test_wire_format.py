@@ -0,0 +1,188 @@
+"""
+Pruebas de wire_format - SignBridge
+"""
+
+import io
+import json
+import struct
+
+import numpy as np
+import pytest
+
+import wire_format
+from wire_format import (
+    JSON, MSGPACK, NPY, OCTET_STREAM, WireFormatError,
+    decode_npy, decode_raw, decode_request, decode_topk_binary, encode_raw, encode_topk_binary,
+    negotiate,
+)
+
+
+def _npy_bytes(array):
+    buffer = io.BytesIO()
+    np.save(buffer, array, allow_pickle=True)
+    return buffer.getvalue()
+
+
+def _status(excinfo):
+    return excinfo.value.status
+
+
+# ----------------------------------------------------------------------------
+# raw
+# ----------------------------------------------------------------------------
+
+def test_raw_round_trip_without_copy():
+    sequence = np.random.default_rng(0).random((24, 126), dtype=np.float32)
+    array, options = decode_request(encode_raw(sequence), OCTET_STREAM)
+    assert options == {}
+    assert array.dtype == np.float32
+    assert np.array_equal(array, sequence)
+    assert not array.flags.owndata
+
+
+@pytest.mark.parametrize('body', [
+    b'',
+    b'\x01\x00',
+    struct.pack('<I', 0),
+    struct.pack('<I', wire_format.MAX_NDIM + 1),
+    struct.pack('<I', 3) + struct.pack('<I', 24),
+    struct.pack('<II', 2, 24) + struct.pack('<I', 126) + b'\x00' * 8,
+])
+def test_raw_malformed_is_400(body):
+    with pytest.raises(WireFormatError) as excinfo:
+        decode_raw(body)
+    assert _status(excinfo) == 400
+
+
+# ----------------------------------------------------------------------------
+# .npy
+# ----------------------------------------------------------------------------
+
+@pytest.mark.parametrize('dtype', [np.float32, np.float64, np.int16, np.uint8])
+def test_npy_numeric_dtypes_become_float32(dtype):
+    array = decode_npy(_npy_bytes(np.ones((24, 126), dtype=dtype)))
+    assert array.dtype == np.float32
+    assert array.shape == (24, 126)
+
+
+def test_npy_float16_is_kept():
+    assert decode_npy(_npy_bytes(np.ones((2, 3), dtype=np.float16))).dtype == np.float16
+
+
+def test_npy_fortran_order_is_preserved():
+    original = np.asfortranarray(np.arange(6, dtype=np.float32).reshape(2, 3))
+    assert np.array_equal(decode_npy(_npy_bytes(original)), original)
+
+
+@pytest.mark.parametrize('array', [
+    np.array([{'a': 1}, None], dtype=object),
+    np.ones(3, dtype=np.complex64),
+    np.zeros(2, dtype=[('x', '<f4'), ('y', '<f4')]),
+    np.array(['a', 'b']),
+    np.array([True, False]),
+], ids=['object', 'complex', 'structured', 'unicode', 'bool'])
+def test_npy_non_numeric_dtype_is_400(array):
+    with pytest.raises(WireFormatError) as excinfo:
+        decode_request(_npy_bytes(array), NPY)
+    assert _status(excinfo) == 400
+
+
+def test_npy_truncated_and_garbage_are_400():
+    body = _npy_bytes(np.ones((24, 126), dtype=np.float32))
+    for bad in (body[:-4], b'no es un npy'):
+        with pytest.raises(WireFormatError) as excinfo:
+            decode_npy(bad)
+        assert _status(excinfo) == 400
+
+
+# ----------------------------------------------------------------------------
+# JSON y mapas (msgpack comparte _array_from_mapping)
+# ----------------------------------------------------------------------------
+
+def test_json_sequence_and_options():
+    body = json.dumps({'sequence': [[0.5] * 126] * 24, 'top_k': 3})
+    array, options = decode_request(body, 'application/json; charset=utf-8')
+    assert array.shape == (24, 126)
+    assert options == {'top_k': 3}
+
+
+@pytest.mark.parametrize('body', [
+    '{no es json',
+    json.dumps([1, 2, 3]),
+    json.dumps({'otra': 1}),
+    json.dumps({'sequence': [[1, 2], [3]]}),
+    json.dumps({'sequence': 'abc'}),
+])
+def test_json_errors_are_400(body):
+    with pytest.raises(WireFormatError) as excinfo:
+        decode_request(body, JSON)
+    assert _status(excinfo) == 400
+
+
+def test_mapping_with_binary_payload():
+    data = np.arange(6, dtype='<f4').tobytes()
+    array, _ = wire_format._array_from_mapping({'sequence': {'shape': [2, 3], 'data': data}}, 'sequence')
+    assert np.array_equal(array, np.arange(6).reshape(2, 3))
+
+
+@pytest.mark.parametrize('payload', [
+    {'shape': [2, 3], 'data': b'\x00' * 4},
+    {'shape': [], 'data': b''},
+    {'shape': [-1, 3], 'data': b''},
+    {'shape': ['x'], 'data': b''},
+    {'shape': [2], 'dtype': 'O', 'data': b'\x00' * 16},
+    {'shape': [2], 'dtype': 'no-es-dtype', 'data': b'\x00' * 8},
+    {'shape': [2], 'data': 'no son bytes'},
+])
+def test_mapping_bad_binary_payload_is_400(payload):
+    with pytest.raises(WireFormatError) as excinfo:
+        wire_format._array_from_mapping({'sequence': payload}, 'sequence')
+    assert _status(excinfo) == 400
+
+
+def test_unsupported_content_type_is_415():
+    with pytest.raises(WireFormatError) as excinfo:
+        decode_request(b'', 'text/plain')
+    assert _status(excinfo) == 415
+
+
+def test_msgpack_without_library_is_415(monkeypatch):
+    monkeypatch.setattr(wire_format, 'msgpack', None)
+    with pytest.raises(WireFormatError) as excinfo:
+        decode_request(b'\x80', MSGPACK)
+    assert _status(excinfo) == 415
+
+
+# ----------------------------------------------------------------------------
+# Respuestas y negociación
+# ----------------------------------------------------------------------------
+
+def test_topk_binary_round_trip():
+    indices = np.array([[3, 1], [0, 2]], dtype=np.int32)
+    probs = np.array([[0.7, 0.2], [0.5, 0.4]], dtype=np.float32)
+    decoded_indices, decoded_probs = decode_topk_binary(encode_topk_binary(indices, probs))
+    assert np.array_equal(decoded_indices, indices)
+    assert np.array_equal(decoded_probs, probs)
+
+
+class _Accept:
+    """Imita werkzeug.MIMEAccept.best_match con una lista de tipos aceptados"""
+
+    def __init__(self, *accepted):
+        self.accepted = accepted
+
+    def best_match(self, available, default=None):
+        return next((t for t in self.accepted if t in available), default)
+
+
+def test_negotiate_skips_msgpack_when_not_installed(monkeypatch):
+    monkeypatch.setattr(wire_format, 'msgpack', None)
+    assert negotiate(_Accept(MSGPACK)) == JSON
+    assert negotiate(_Accept(MSGPACK, OCTET_STREAM)) == OCTET_STREAM
+
+
+def test_negotiate_with_werkzeug_accept_header():
+    datastructures = pytest.importorskip('werkzeug.datastructures')
+    assert negotiate(datastructures.MIMEAccept([('text/html', 1), ('*/*', 0.8)])) == JSON
+    assert negotiate(datastructures.MIMEAccept([(OCTET_STREAM, 1)])) == OCTET_STREAM
+    assert negotiate(datastructures.MIMEAccept([('image/png', 1)])) == JSON
@@ -0,0 +1,113 @@
+"""
+Timeline de grabaciones largas - SignBridge
+Ventanas deslizantes de 24 frames (vista con strides, sin copias) sobre un
+array (T, 126), inferidas en lotes grandes y entregadas en orden mientras
+los lotes siguientes se siguen calculando.
+"""
+
+import queue
+import threading
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from postprocessing import top_k_batch, format_top_k
+
+NUM_FRAMES = 24
+NUM_FEATURES = 126
+
+_DONE = object()
+
+
+def sliding_windows(landmarks, window=NUM_FRAMES, stride=1):
+    """
+    (T, F) → vista de solo lectura (W, window, F) con W = (T - window) // stride + 1.
+    No copia datos: cada ventana comparte memoria con el array original.
+    """
+    landmarks = np.asarray(landmarks)
+    if landmarks.ndim != 2:
+        raise ValueError(f'Se esperaba un array (T, {NUM_FEATURES}), recibido {landmarks.shape}')
+    stride = int(stride)
+    if stride < 1:
+        raise ValueError('stride debe ser >= 1')
+
+    total_frames, num_features = landmarks.shape
+    if total_frames < window:
+        raise ValueError(f'Se necesitan al menos {window} frames, recibido {total_frames}')
+
+    num_windows = (total_frames - window) // stride + 1
+    frame_stride, feature_stride = landmarks.strides
+    return as_strided(
+        landmarks,
+        shape=(num_windows, window, num_features),
+        strides=(frame_stride * stride, frame_stride, feature_stride),
+        writeable=False,
+    )
+
+
+def iter_timeline_batches(infer, landmarks, stride=1, batch_size=512, top_k=5, prefetch=2):
+    """
+    Entrega (primera_ventana, indices, probs) por lote, en orden.
+
+    Un hilo calcula los lotes siguientes mientras el consumidor serializa/envía
+    el actual; `prefetch` acota cuántos lotes terminados quedan en memoria.
+    """
+    windows = sliding_windows(np.asarray(landmarks, dtype=np.float32), stride=stride)
+    results = queue.Queue(maxsize=max(1, int(prefetch)))
+    stop = threading.Event()
+
+    def producer():
+        try:
+            for start in range(0, len(windows), batch_size):
+                if stop.is_set():
+                    return
+                probabilities = infer(windows[start:start + batch_size])
+                indices, probs = top_k_batch(probabilities, top_k)
+                results.put((start, indices, probs))
+        except Exception as e:
+            results.put(e)
+        finally:
+            results.put(_DONE)
+
+    worker = threading.Thread(target=producer, name='timeline-producer', daemon=True)
+    worker.start()
+
+    try:
+        while True:
+            item = results.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Si el consumidor se corta (cliente desconectado) el productor se detiene
+        stop.set()
+        while worker.is_alive():
+            try:
+                results.get_nowait()
+            except queue.Empty:
+                worker.join(timeout=0.05)
+
+
+def predict_timeline(infer, landmarks, labels, stride=1, batch_size=512, top_k=5, fps=None):
+    """
+    Genera una entrada por ventana:
+    {window, start_frame, end_frame, [start_s, end_s], predicted_class, confidence, top_k}
+    """
+    for start, indices, probs in iter_timeline_batches(infer, landmarks, stride, batch_size, top_k):
+        for i in range(len(indices)):
+            window_index = start + i
+            start_frame = window_index * stride
+            entry = {
+                'window': window_index,
+                'start_frame': start_frame,
+                'end_frame': start_frame + NUM_FRAMES - 1,
+            }
+            if fps:
+                entry['start_s'] = start_frame / fps
+                entry['end_s'] = (start_frame + NUM_FRAMES) / fps
+            entry['predicted_class'] = labels[indices[i, 0]]
+            entry['confidence'] = float(probs[i, 0])
+            entry['top_k'] = format_top_k(labels, indices[i], probs[i])
+            yield entry
@@ -0,0 +1,273 @@
+"""
+Escalera de calidad para el video MJPEG - SignBridge
+Cada frame anotado se codifica a JPEG a lo sumo una vez por nivel (calidad +
+escala) y todos los visores de un mismo nivel comparten esos bytes.
+
+Cada visor lleva su propio ritmo. El generador de Flask se bloquea mientras
+el socket no acepta más datos; los frames publicados en ese tiempo, además de
+los que el visor saltea a propósito, son su cola atrasada ("missed"). Si se
+atrasa en `down_after` envíos seguidos baja un nivel y, ya en el último,
+salta frames; tras `up_after` envíos al día deshace los saltos y vuelve a subir.
+
+VIDEO_LADDER="high:85:1.0,medium:70:0.75,low:50:0.5"  (nombre:calidad:escala)
+"""
+
+import itertools
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+
+BANDWIDTH_WINDOW_S = 2.0
+
+
+class QualityLevel:
+    """Un escalón: calidad JPEG y escala respecto al frame de cámara"""
+
+    def __init__(self, name, quality, scale=1.0):
+        self.name = name
+        self.quality = int(quality)
+        self.scale = float(scale)
+        self._lock = threading.Lock()
+        self._sent = deque()  # (t, bytes) de la ventana de ancho de banda
+        self.encoded = 0
+        self.failed = 0
+        self.encode_s = 0.0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+
+    def encode(self, image):
+        """Bytes JPEG del frame en este nivel, o None si falla la codificación"""
+        start = time.perf_counter()
+        if self.scale != 1.0:
+            height, width = image.shape[:2]
+            size = (max(1, int(width * self.scale)), max(1, int(height * self.scale)))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        ret, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            if not ret:
+                self.failed += 1
+                return None
+            self.encoded += 1
+            self.encode_s += elapsed
+        return buffer.tobytes()
+
+    def record_sent(self, size):
+        now = time.perf_counter()
+        with self._lock:
+            self.frames_sent += 1
+            self.bytes_sent += size
+            self._sent.append((now, size))
+            self._prune(now)
+
+    def _prune(self, now):
+        while self._sent and now - self._sent[0][0] > BANDWIDTH_WINDOW_S:
+            self._sent.popleft()
+
+    def stats(self):
+        with self._lock:
+            self._prune(time.perf_counter())
+            return {
+                'quality': self.quality,
+                'scale': self.scale,
+                'encoded': self.encoded,
+                'failed': self.failed,
+                'encode_ms': (self.encode_s / self.encoded * 1000) if self.encoded else 0.0,
+                'frames_sent': self.frames_sent,
+                'bytes_sent': self.bytes_sent,
+                'bandwidth_bps': sum(size for _, size in self._sent) / BANDWIDTH_WINDOW_S,
+            }
+
+
+class EncodedFrame:
+    """Frame anotado con sus JPEG por nivel, cada uno codificado una sola vez"""
+
+    def __init__(self, image, ladder):
+        self.image = image
+        self.ladder = ladder
+        self._jpeg = {}
+        self._lock = threading.Lock()
+
+    def jpeg(self, index):
+        with self._lock:
+            if index not in self._jpeg:
+                self._jpeg[index] = self.ladder.levels[index].encode(self.image)
+            return self._jpeg[index]
+
+
+class ClientPacer:
+    """Nivel y salto de frames de un visor, ajustados según cuánto se atrasa"""
+
+    def __init__(self, client_id, ladder):
+        self.client_id = client_id
+        self.ladder = ladder
+        self.level = 0
+        self.skip = 1  # Enviar uno de cada `skip` frames
+        self.sent = 0
+        self.missed = 0
+        self.skipped = 0
+        self.send_ms = None
+        self._behind = 0
+        self._on_time = 0
+
+    def observe(self, missed):
+        """Frames perdidos (además de los salteados a propósito) antes de este envío"""
+        self.missed += missed
+        if not self.ladder.adaptive:
+            return
+        if missed > 0:
+            self._behind += 1
+            self._on_time = 0
+        else:
+            self._on_time += 1
+            self._behind = 0
+
+        if self._behind >= self.ladder.down_after:
+            self._behind = 0
+            self._step_down()
+        elif self._on_time >= self.ladder.up_after:
+            self._on_time = 0
+            self._step_up()
+
+    def _step_down(self):
+        if self.level < len(self.ladder.levels) - 1:
+            self.level += 1
+        elif self.skip < self.ladder.max_skip:
+            self.skip += 1
+        else:
+            return
+        print(f"📉 Visor {self.client_id}: {self.ladder.levels[self.level].name}, 1 de cada {self.skip} frames")
+
+    def _step_up(self):
+        if self.skip > 1:
+            self.skip -= 1
+        elif self.level > 0:
+            self.level -= 1
+        else:
+            return
+        print(f"📈 Visor {self.client_id}: {self.ladder.levels[self.level].name}, 1 de cada {self.skip} frames")
+
+    def record_send(self, elapsed_s):
+        self.sent += 1
+        sample = elapsed_s * 1000
+        self.send_ms = sample if self.send_ms is None else self.send_ms + 0.2 * (sample - self.send_ms)
+
+    def stats(self):
+        return {
+            'id': self.client_id,
+            'level': self.ladder.levels[self.level].name,
+            'skip': self.skip,
+            'sent': self.sent,
+            'missed': self.missed,
+            'skipped': self.skipped,
+            'send_ms': self.send_ms,
+        }
+
+
+class QualityLadder:
+    """
+    Niveles de calidad compartidos por todos los visores de una fuente.
+    El productor publica wrap(frame); cada visor consume stream(source.frames(with_seq=True)).
+    """
+
+    def __init__(self, levels, adaptive=True, down_after=3, up_after=90, max_skip=6):
+        if not levels:
+            raise ValueError("La escalera necesita al menos un nivel")
+        self.levels = levels
+        self.adaptive = adaptive
+        self.down_after = max(1, int(down_after))
+        self.up_after = max(1, int(up_after))
+        self.max_skip = max(1, int(max_skip))
+        self.clients = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def levels_in_use(self):
+        with self._lock:
+            return sorted({client.level for client in self.clients.values()})
+
+    def wrap(self, image):
+        """
+        EncodedFrame con los niveles que usan los visores ya codificados (sin
+        visores, solo el más alto). None si falla alguna codificación.
+        """
+        frame = EncodedFrame(image, self)
+        for index in self.levels_in_use() or [0]:
+            if frame.jpeg(index) is None:
+                return None
+        return frame
+
+    def stream(self, frames):
+        """Bytes JPEG para un visor; `frames` produce (seq, EncodedFrame)"""
+        with self._lock:
+            client = ClientPacer(next(self._ids), self)
+            self.clients[client.client_id] = client
+        try:
+            last_sent = None
+            for seq, frame in frames:
+                if last_sent is not None:
+                    gap = seq - last_sent
+                    if gap < client.skip:
+                        client.skipped += 1
+                        continue
+                    # Frames perdidos más allá del salto buscado: cola atrasada
+                    client.observe(gap - client.skip)
+
+                level = self.levels[client.level]
+                data = frame.jpeg(client.level)
+                if data is None:
+                    continue
+                start = time.perf_counter()
+                yield data  # Bloquea mientras el socket del visor no acepta más datos
+                client.record_send(time.perf_counter() - start)
+                level.record_sent(len(data))
+                last_sent = seq
+        finally:
+            with self._lock:
+                self.clients.pop(client.client_id, None)
+            frames.close()
+
+    def viewers_by_level(self):
+        with self._lock:
+            counts = {level.name: 0 for level in self.levels}
+            for client in self.clients.values():
+                counts[self.levels[client.level].name] += 1
+            return counts
+
+    def stats(self):
+        viewers = self.viewers_by_level()
+        with self._lock:
+            clients = [client.stats() for client in self.clients.values()]
+        return {
+            'adaptive': self.adaptive,
+            'levels': {level.name: {**level.stats(), 'viewers': viewers[level.name]} for level in self.levels},
+            'clients': clients,
+        }
+
+
+def parse_ladder(spec):
+    """'high:85:1.0,low:50:0.5' → [QualityLevel]; la escala es opcional (1.0)"""
+    levels = []
+    for item in (part.strip() for part in spec.split(',')):
+        if not item:
+            continue
+        fields = item.split(':')
+        if len(fields) not in (2, 3):
+            raise ValueError(f"Nivel inválido '{item}' (esperado nombre:calidad[:escala])")
+        levels.append(QualityLevel(fields[0], int(fields[1]), float(fields[2]) if len(fields) == 3 else 1.0))
+    return levels
+
+
+def ladder_from_env(default_quality=95):
+    """QualityLadder con VIDEO_LADDER, VIDEO_ADAPTIVE, VIDEO_DOWN_AFTER, VIDEO_UP_AFTER y VIDEO_MAX_SKIP"""
+    default = f"high:{default_quality}:1.0,medium:70:0.75,low:50:0.5"
+    return QualityLadder(
+        parse_ladder(os.getenv('VIDEO_LADDER', default)),
+        adaptive=os.getenv('VIDEO_ADAPTIVE', '1') == '1',
+        down_after=int(os.getenv('VIDEO_DOWN_AFTER', '3')),
+        up_after=int(os.getenv('VIDEO_UP_AFTER', '90')),
+        max_skip=int(os.getenv('VIDEO_MAX_SKIP', '6')),
+    )
@@ -11,6 +11,8 @@ import numpy as np
 import tensorflow as tf
 from pathlib import Path
 
+from inference_engine import create_engine
+
 print("=" * 70)
 print("🎯 VISUALIZACIÓN DEL MODELO LSTM - SIGNBRIDGE")
 print("=" * 70)
@@ -32,7 +34,8 @@ if not os.path.exists(MODEL_PATH):
     exit(1)
 
 model = tf.keras.models.load_model(MODEL_PATH)
-print(f"✅ Modelo cargado exitosamente")
+engine = create_engine(model)
+print(f"✅ Modelo cargado exitosamente (backend: {engine.name})")
 
 # ============================================================================
 # INFORMACIÓN DEL MODELO
@@ -113,10 +116,11 @@ print(f"\n   Input generado: {dummy_input.shape}")
 print(f"   Rango de valores: [{dummy_input.min():.3f}, {dummy_input.max():.3f}]")
 
 print(f"\n🔮 Ejecutando predicción...")
-prediction = model.predict(dummy_input, verbose=0)
+prediction = engine.infer(dummy_input)
 
 print(f"✅ Predicción completada")
 print(f"   Output shape: {prediction.shape}")
+print(f"   Tiempo ({engine.name}): {engine.latency.last_ms:.1f}ms")
 
 # Obtener top 5 predicciones
 top_5_indices = np.argsort(prediction[0])[-5:][::-1]
@@ -0,0 +1,232 @@
+"""
+Formatos binarios para secuencias de landmarks - SignBridge
+Decodifica cuerpos raw float32 / .npy / msgpack sin copias (np.frombuffer)
+y codifica respuestas compactas según el header Accept.
+
+Formato raw (application/octet-stream), todo little-endian:
+    uint32 ndim | uint32 dim[0] ... uint32 dim[ndim-1] | float32 datos (orden C)
+
+Respuesta binaria de top-k (application/octet-stream):
+    uint32 n | uint32 k | n filas de (k × int32 índice, k × float32 probabilidad)
+"""
+
+import io
+import json
+import struct
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # Opcional: pip install msgpack
+    msgpack = None
+
+JSON = 'application/json'
+OCTET_STREAM = 'application/octet-stream'
+NPY = 'application/x-npy'
+MSGPACK = 'application/msgpack'
+
+NPY_TYPES = {NPY, 'application/npy'}
+MSGPACK_TYPES = {MSGPACK, 'application/x-msgpack'}
+RESPONSE_TYPES = [JSON, OCTET_STREAM, MSGPACK]
+
+MAX_NDIM = 4
+_TOPK_HEADER = struct.Struct('<II')
+
+
+class WireFormatError(ValueError):
+    """Cuerpo mal formado o tipo de contenido no soportado"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# ============================================================================
+# DECODIFICACIÓN
+# ============================================================================
+
+def _numeric_dtype(dtype):
+    """dtype de enteros o flotantes reales; cualquier otro (objeto, complejo, estructurado) es 400"""
+    try:
+        dtype = np.dtype(dtype)
+    except (TypeError, ValueError) as e:
+        raise WireFormatError(f'dtype inválido: {e}')
+    if dtype.kind not in 'iuf':
+        raise WireFormatError(f'dtype no permitido: {dtype} (se espera entero o flotante)')
+    return dtype
+
+
+def _landmarks_array(array):
+    """float16 se conserva (entrada del motor bf16, sin copia); el resto pasa a float32"""
+    if array.dtype == np.float16:
+        return array
+    try:
+        return array.astype(np.float32, copy=False)
+    except (TypeError, ValueError) as e:
+        raise WireFormatError(f'No se puede convertir a float32: {e}')
+
+
+def decode_request(body, content_type, key='sequence'):
+    """
+    Devuelve (array float32, o float16 si así llegó, opciones) a partir del cuerpo de la petición.
+
+    JSON y msgpack pueden traer opciones extra (ej. top_k) junto a `key`;
+    los formatos raw y .npy solo traen el array.
+    """
+    content_type = (content_type or JSON).split(';')[0].strip().lower()
+
+    if content_type == OCTET_STREAM:
+        return decode_raw(body), {}
+    if content_type in NPY_TYPES:
+        return decode_npy(body), {}
+    if content_type in MSGPACK_TYPES:
+        return decode_msgpack(body, key)
+    if content_type == JSON or content_type.endswith('+json'):
+        try:
+            data = json.loads(body)
+        except ValueError as e:
+            raise WireFormatError(f'JSON inválido: {e}')
+        return _array_from_mapping(data, key)
+
+    raise WireFormatError(f'Content-Type no soportado: {content_type}', status=415)
+
+
+def decode_raw(body):
+    """Header de shape + float32 little-endian → vista sin copia"""
+    if len(body) < 4:
+        raise WireFormatError('Cuerpo binario vacío o truncado')
+    (ndim,) = struct.unpack_from('<I', body, 0)
+    if not 1 <= ndim <= MAX_NDIM:
+        raise WireFormatError(f'ndim inválido en header: {ndim}')
+
+    offset = 4 + 4 * ndim
+    if len(body) < offset:
+        raise WireFormatError('Header de shape truncado')
+    shape = struct.unpack_from(f'<{ndim}I', body, 4)
+
+    expected = int(np.prod(shape)) * 4
+    if len(body) - offset != expected:
+        raise WireFormatError(
+            f'Tamaño de datos incorrecto para shape {tuple(shape)}: '
+            f'esperado {expected} bytes, recibido {len(body) - offset}'
+        )
+    array = np.frombuffer(body, dtype='<f4', offset=offset).reshape(shape)
+    return array.astype(np.float32, copy=False)
+
+
+def decode_npy(body):
+    """Archivo .npy en memoria → vista sin copia (si ya es float32 en orden C)"""
+    buffer = io.BytesIO(body)
+    try:
+        version = np.lib.format.read_magic(buffer)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(buffer)
+        elif version == (2, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(buffer)
+        else:
+            raise WireFormatError(f'Versión .npy no soportada: {version}')
+    except (TypeError, ValueError) as e:
+        raise WireFormatError(f'Archivo .npy inválido: {e}')
+
+    # Rechaza objetos Python, complejos y dtypes estructurados antes de leer datos
+    dtype = _numeric_dtype(dtype)
+
+    offset = buffer.tell()
+    count = int(np.prod(shape))
+    if len(body) - offset != count * dtype.itemsize:
+        raise WireFormatError(f'Datos .npy truncados para shape {shape}')
+
+    array = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+    array = array.reshape(shape, order='F' if fortran_order else 'C')
+    return _landmarks_array(array)
+
+
+def decode_msgpack(body, key='sequence'):
+    """
+    Mapa msgpack. El array puede venir como bytes crudos
+    ({key: {"shape": [...], "dtype": "<f4", "data": b"..."}}) o como listas anidadas.
+    """
+    if msgpack is None:
+        raise WireFormatError('msgpack no está instalado en el servidor', status=415)
+    try:
+        data = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise WireFormatError(f'msgpack inválido: {e}')
+    return _array_from_mapping(data, key)
+
+
+def _array_from_mapping(data, key):
+    if not isinstance(data, dict) or key not in data:
+        raise WireFormatError(f"Falta el campo '{key}'")
+    value = data[key]
+    options = {k: v for k, v in data.items() if k != key}
+
+    if isinstance(value, dict) and 'data' in value:
+        dtype = _numeric_dtype(value.get('dtype', '<f4'))
+        raw = value['data']
+        try:
+            shape = tuple(int(dim) for dim in value.get('shape', ()))
+        except (TypeError, ValueError) as e:
+            raise WireFormatError(f'shape inválido: {e}')
+        if (not shape or min(shape) < 0 or not isinstance(raw, bytes)
+                or len(raw) != int(np.prod(shape)) * dtype.itemsize):
+            raise WireFormatError(f'Datos binarios inconsistentes con shape {shape}')
+        array = np.frombuffer(raw, dtype=dtype).reshape(shape)
+        return _landmarks_array(array), options
+
+    try:
+        return np.asarray(value, dtype=np.float32), options
+    except (TypeError, ValueError) as e:
+        raise WireFormatError(f"Campo '{key}' no es un array numérico: {e}")
+
+
+# ============================================================================
+# CODIFICACIÓN
+# ============================================================================
+
+def encode_raw(array):
+    """Codifica un array en el formato raw (útil para clientes Python)"""
+    array = np.ascontiguousarray(array, dtype='<f4')
+    header = struct.pack(f'<I{array.ndim}I', array.ndim, *array.shape)
+    return header + array.tobytes()
+
+
+def encode_topk_header(n, k):
+    return _TOPK_HEADER.pack(n, k)
+
+
+def encode_topk_rows(indices, probs):
+    """Filas (k × int32, k × float32) consecutivas; se pueden emitir por chunks"""
+    rows = np.empty(len(indices), dtype=[
+        ('indices', '<i4', (indices.shape[1],)),
+        ('probs', '<f4', (probs.shape[1],)),
+    ])
+    rows['indices'] = indices
+    rows['probs'] = probs
+    return rows.tobytes()
+
+
+def encode_topk_binary(indices, probs):
+    """Respuesta binaria completa de top-k"""
+    return encode_topk_header(*indices.shape) + encode_topk_rows(indices, probs)
+
+
+def decode_topk_binary(body):
+    """Inversa de encode_topk_binary (para clientes y pruebas)"""
+    n, k = _TOPK_HEADER.unpack_from(body, 0)
+    rows = np.frombuffer(body, dtype=[('indices', '<i4', (k,)), ('probs', '<f4', (k,))],
+                         count=n, offset=_TOPK_HEADER.size)
+    return rows['indices'], rows['probs']
+
+
+def encode_msgpack(obj):
+    if msgpack is None:
+        raise WireFormatError('msgpack no está instalado en el servidor', status=406)
+    return msgpack.packb(obj, use_bin_type=True)
+
+
+def negotiate(accept_mimetypes):
+    """Elige el tipo de respuesta a partir del Accept (JSON por defecto para navegadores)"""
+    available = [t for t in RESPONSE_TYPES if t != MSGPACK or msgpack is not None]
+    return accept_mimetypes.best_match(available, default=JSON) or JSON